@@ -1,14 +1,37 @@
 """
 This file initializes the package and exposes the necessary modules and functions.
+
+Light modules are imported eagerly. Modules pulling in TensorFlow or Flask are only 
+imported when one of their functions is first accessed, so tools like `monitoring` 
+or `create_gif` start without paying for them.
 """
 
-from .app import run_app
-from .generate_gif import create_gif
-from .monitoring import monitoring
+from gan_config import lazy_module
+from .generate_gif import create_gif, create_video
+from .monitoring import monitoring, step_monitoring, follow_monitoring, compare_runs
+
+_lazy_exports = {
+    "run_app": ".app",
+    "export_generator": ".export_model",
+    "run_pipeline": ".pipeline",
+    "check_memorization": ".memorization",
+    "run_sweep": ".sweep",
+    "render_walk": ".latent_walk"
+}
 
 # The original content of the file starts here
 __all__ = ["run_app", 
+           "export_generator", 
+           "run_pipeline", 
+           "check_memorization", 
+           "run_sweep", 
+           "render_walk", 
            "create_gif", 
-           "monitoring"
+           "create_video", 
+           "monitoring", 
+           "step_monitoring", 
+           "follow_monitoring", 
+           "compare_runs"
            ]
 
+__getattr__, __dir__ = lazy_module(__name__, _lazy_exports)
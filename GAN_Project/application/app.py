@@ -1,43 +1,439 @@
-from flask import Flask, send_file
-from .generate_image import load_generator_model, generate_image
+import io
+import os
+import atexit
+import tempfile
+from time import perf_counter
+from concurrent.futures import TimeoutError
+import numpy as np
+import psutil
+from flask import Blueprint, Flask, Response, current_app, g, request, send_file
+from gan_config import config
+from .generate_image import sample_noise, denormalize, encode_png
+from .latent_walk import INTERPOLATIONS, MAX_SEED, count_walk_frames, render_walk
+from .inference import InferenceExecutor, QueueFullError
+from .model_registry import ModelRegistry
+from .metrics import (StageTimer, generate_latest, REQUESTS, REQUEST_DURATION, IN_FLIGHT,
+                      STAGE_DURATION, MODEL_INFO, RESIDENT_MODELS, PROCESS_RSS)
 
-app = Flask(__name__)
+api = Blueprint('api', __name__)
 
-@app.route('/image', methods=['GET'])
+@api.before_app_request
+def start_request():
+    g.request_start = perf_counter()
+    IN_FLIGHT.inc()
+
+@api.after_app_request
+def record_request(response):
+    endpoint = request.endpoint or "unknown"
+    REQUESTS.inc(endpoint, response.status_code)
+    REQUEST_DURATION.observe(perf_counter() - g.request_start, endpoint)
+    return response
+
+@api.teardown_app_request
+def end_request(exception):
+    IN_FLIGHT.dec()
+
+def render_image(registry, model=None, acceptance_rate=None):
+
+    """
+    Generates an image with a generator model of the registry and encodes it as PNG in memory.
+
+    The time spent in each stage (model lookup, noise sampling, generator forward pass, 
+    denormalization and PNG encoding) is recorded in the stage duration histogram.
+
+    Args:
+        registry (ModelRegistry): Registry holding the generator models.
+        model (str, optional): Name of the model file to use. Defaults to the registry's default model.
+        acceptance_rate (float, optional): Acceptance rate of the rejection sampling, instead of
+            `SERVING.ACCEPTANCE_RATE`. Only used when rejection sampling is enabled.
+
+    Returns:
+        tuple: (name of the model used, io.BytesIO buffer holding the PNG image, rewound to its start)
+    """
+
+    timer = StageTimer(STAGE_DURATION)
+
+    name, generator = registry.get(model)
+    timer.lap("model")
+
+    noise = sample_noise()
+    timer.lap("noise")
+
+    if acceptance_rate is None:
+        generated_images = np.asarray(generator(noise))
+    else:
+        generated_images = np.asarray(generator(noise, acceptance_rate=acceptance_rate))
+    timer.lap("forward")
+
+    generated_image = denormalize(generated_images)[0]
+    timer.lap("denormalize")
+
+    buffer = io.BytesIO()
+    encode_png(generated_image, buffer)
+    buffer.seek(0)
+    timer.lap("encode")
+
+    return name, buffer
+
+def parse_acceptance_rate(value):
+
+    """
+    Parses the `acceptance` query parameter.
+
+    Raises:
+        ValueError: If rejection sampling is disabled or the value is not a number in (0, 1].
+    """
+
+    if config.serving.acceptance_rate is None:
+        raise ValueError("L'échantillonnage par rejet n'est pas activé (SERVING.ACCEPTANCE_RATE).")
+
+    try:
+        acceptance_rate = float(value)
+    except ValueError:
+        raise ValueError(f"Taux d'acceptation invalide : {value}")
+
+    if not 0 < acceptance_rate <= 1:
+        raise ValueError(f"Le taux d'acceptation doit être compris entre 0 (exclu) et 1 : {value}")
+
+    return acceptance_rate
+
+@api.route('/image', methods=['GET'])
 def get_image():
 
     """
     Generates an image using the generator model and returns it as a PNG file.
 
-    The image is saved locally as 'image.png' and then sent as a response to the client.
+    The optional `model` query parameter selects a model file of the models directory
+    (e.g. `/image?model=generator_epoch_100.keras`); the default model is used otherwise.
+    When rejection sampling is enabled (`SERVING.ACCEPTANCE_RATE`), the optional `acceptance`
+    query parameter sets the fraction of the candidates kept for this request (e.g. `/image?acceptance=0.1`).
+    Inference runs on the application's inference executor and the image is encoded 
+    in memory, so concurrent requests never share a file on disk.
+    If the executor is saturated, it returns a JSON error with a 429 status code.
     If an error occurs, it returns a JSON response with the error message and a 500 status code.
 
     Returns:
-        Response: The generated PNG image file or a JSON error message with a 500 status code.
+        Response: The generated PNG image file or a JSON error message with a 4xx or 5xx status code.
+    """
+
+    state = current_app.extensions['gan']
+    model = request.args.get('model')
+    acceptance_rate = request.args.get('acceptance')
+
+    try:
+        if model:
+            state['registry'].validate(model)
+        if acceptance_rate is not None:
+            acceptance_rate = parse_acceptance_rate(acceptance_rate)
+        future = state['executor'].submit(render_image, state['registry'], model, acceptance_rate)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    except QueueFullError as e:
+        return {"error": str(e)}, 429, {"Retry-After": "1"}
+
+    try:
+        name, buffer = future.result(timeout=config.serving.request_timeout)
+        send_start = perf_counter()
+        response = send_file(buffer, mimetype='image/png')
+        response.headers['X-Model'] = name
+        response.call_on_close(lambda: STAGE_DURATION.observe(perf_counter() - send_start, "send"))
+        return response
+    except TimeoutError:
+        return {"error": "Le délai de génération de l'image a été dépassé."}, 503
+    except FileNotFoundError as e:
+        return {"error": str(e)}, 404
+    except Exception as e:
+        return {"error": f"Une erreur est survenue : {str(e)}"}, 500
+
+# Media type of each walk format
+WALK_MIMETYPES = {
+    "gif": "image/gif",
+    "mp4": "video/mp4",
+    "webm": "video/webm"
+}
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def iter_file(path, block_size=1 << 16):
+
+    """
+    Yields the content of a file by blocks, so that large files are sent without being loaded in memory.
+    """
+
+    with open(path, 'rb') as file:
+        while block := file.read(block_size):
+            yield block
+
+def remove_walk_file(future):
+
+    """
+    Removes the file of a walk whose request has timed out, once it is rendered.
+    """
+
+    if not future.cancelled() and future.exception() is None:
+        remove_file(future.result()[1])
+
+def render_walk_file(registry, model, seeds, frames_per_seed, interpolation, loop, width, file_format):
+
+    """
+    Renders a latent walk with a generator model of the registry to a temporary file.
+
+    The walk is encoded frame by frame to disk (see `render_walk`), so the memory of a request does not
+    grow with the number of frames. The file is removed if rendering fails.
+
+    Returns:
+        tuple: (name of the model used, path of the temporary file)
+    """
+
+    timer = StageTimer(STAGE_DURATION)
+
+    name, generator = registry.get(model)
+    timer.lap("model")
+
+    descriptor, path = tempfile.mkstemp(prefix="walk_", suffix=f".{file_format}")
+    os.close(descriptor)
+
+    try:
+        render_walk(generator, path, seeds, frames_per_seed, interpolation, loop, width=width)
+    except BaseException:
+        remove_file(path)
+        raise
+    timer.lap("walk")
+
+    return name, path
+
+def parse_walk_arguments(args):
+
+    """
+    Parses and checks the query parameters of `/walk`.
+
+    Raises:
+        ValueError: If a parameter is invalid, or the walk has more than `WALK.MAX_SEEDS` seeds
+            or `WALK.MAX_FRAMES` frames.
+    """
+
+    seeds = [seed for seed in args.get('seeds', '').split(',') if seed.strip()]
+    if len(seeds) > config.walk.max_seeds:
+        raise ValueError(f"La promenade compte {len(seeds)} graines, au-delà de la limite de {config.walk.max_seeds}.")
+
+    try:
+        seeds = [int(seed) for seed in seeds]
+        frames_per_seed = int(args.get('frames', config.walk.frames_per_seed))
+        width = int(args['width']) if args.get('width') else None
+    except ValueError:
+        raise ValueError("Les paramètres 'seeds', 'frames' et 'width' doivent être des entiers.")
+
+    if not seeds:
+        seeds = np.random.randint(0, 2**31, size=4).tolist()
+    if len(seeds) < 2:
+        raise ValueError("Une promenade latente nécessite au moins deux graines.")
+    if not all(0 <= seed < MAX_SEED for seed in seeds):
+        raise ValueError(f"Les graines doivent être comprises entre 0 et {MAX_SEED - 1}.")
+    if frames_per_seed < 1 or (width is not None and not 2 <= width <= 2048):
+        raise ValueError("Les paramètres 'frames' et 'width' sont hors limites.")
+
+    interpolation = args.get('interpolation', config.walk.interpolation)
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Interpolation inconnue : {interpolation}. Interpolations possibles : {list(INTERPOLATIONS)}")
+
+    file_format = args.get('format', 'gif')
+    if file_format not in WALK_MIMETYPES:
+        raise ValueError(f"Format non supporté : {file_format}. Formats possibles : {list(WALK_MIMETYPES)}")
+
+    loop = args.get('loop', 'false').lower() in ('1', 'true', 'yes')
+
+    n_frames = count_walk_frames(len(seeds), frames_per_seed, loop)
+    if n_frames > config.walk.max_frames:
+        raise ValueError(f"La promenade compte {n_frames} images, au-delà de la limite de {config.walk.max_frames}.")
+
+    return seeds, frames_per_seed, interpolation, loop, width, file_format
+
+@api.route('/walk', methods=['GET'])
+def get_walk():
+
+    """
+    Renders a latent walk between the latent vectors of several seeds and returns it as a GIF or a video.
+
+    Query parameters: `seeds` (comma-separated integers, 4 random seeds by default), `frames` (frames
+    from one seed to the next), `interpolation` ('slerp' or 'lerp'), `loop`, `width`, `format`
+    ('gif', 'mp4' or 'webm') and `model`, e.g. `/walk?seeds=1,2,3&frames=60&format=mp4`.
+    Frames are generated by chunks of `WALK.CHUNK_SIZE` with one batched generator call each, on the
+    inference executor, and encoded to a temporary file streamed back by blocks and removed once sent.
+    With rejection sampling enabled, the walk is rendered by the raw generator.
+
+    Returns:
+        Response: The walk, or a JSON error message with a 4xx or 5xx status code.
     """
 
-    generate_image(generator, './application/image.png')
+    state = current_app.extensions['gan']
+    model = request.args.get('model')
+
+    try:
+        if model:
+            state['registry'].validate(model)
+        seeds, frames_per_seed, interpolation, loop, width, file_format = parse_walk_arguments(request.args)
+        future = state['executor'].submit(
+            render_walk_file, state['registry'], model, seeds, frames_per_seed, interpolation, loop, width, file_format
+        )
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    except QueueFullError as e:
+        return {"error": str(e)}, 429, {"Retry-After": "1"}
 
     try:
-        return send_file('./image.png', mimetype='image/png')
+        name, path = future.result(timeout=config.walk.request_timeout)
+    except TimeoutError:
+        future.add_done_callback(remove_walk_file)
+        return {"error": "Le délai de génération de la promenade a été dépassé."}, 503
+    except FileNotFoundError as e:
+        return {"error": str(e)}, 404
     except Exception as e:
         return {"error": f"Une erreur est survenue : {str(e)}"}, 500
 
-def run_app(model_api=""):
+    # Streamed from a generator rather than `send_file`, whose responses skip the close callbacks
+    response = Response(iter_file(path), mimetype=WALK_MIMETYPES[file_format])
+    response.headers['Content-Length'] = os.path.getsize(path)
+    response.headers['Content-Disposition'] = f"inline; filename=walk.{file_format}"
+    response.headers['X-Model'] = name
+    response.headers['X-Seeds'] = ",".join(map(str, seeds))
+    response.call_on_close(lambda: remove_file(path))
+
+    return response
+
+@api.route('/models', methods=['GET'])
+def get_models():
+
+    """
+    Lists the default model and the models currently held in memory.
+
+    Returns:
+        Response: JSON object with the 'default' model name and the 'resident' model names.
+    """
+
+    registry = current_app.extensions['gan']['registry']
+
+    return {"default": registry.default, "resident": registry.resident()}
+
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+
+    """
+    Exposes the API metrics in the Prometheus text format.
+
+    Reports request counts, request and per-stage latency histograms, in-flight requests, 
+    the default model and the process resident memory. With a multi-process server, 
+    each worker process reports its own metrics.
+
+    Returns:
+        Response: The metrics page.
+    """
+
+    registry = current_app.extensions['gan']['registry']
+
+    MODEL_INFO.clear()
+    MODEL_INFO.set(1, registry.default)
+    RESIDENT_MODELS.set(len(registry.resident()))
+    PROCESS_RSS.set(psutil.Process().memory_info().rss)
+
+    return generate_latest(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@api.route('/admin/reload', methods=['POST'])
+def reload_model():
+
+    """
+    Loads a model in the background and makes it the default one once warmed up.
+
+    The optional `model` query parameter selects the model file to activate; 
+    the latest model of the models directory is activated otherwise.
+
+    Returns:
+        Response: JSON acknowledgement with a 202 status code, or a JSON error with a 400 status code.
+    """
+
+    model = request.args.get('model')
+
+    try:
+        current_app.extensions['gan']['registry'].reload_async(model)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    return {"status": "reloading", "model": model or "latest"}, 202
+
+def create_app(model_api="", max_workers=None, queue_size=None, watch=True):
+
+    """
+    Builds the Flask application serving the generator models.
+
+    The generator models are held by a model registry and run by an inference executor with
+    a bounded queue. Unless a model is pinned through `model_api`, the registry polls the models
+    directory and switches to new checkpoints without restarting the server.
+
+    This factory can be used directly by a multi-process WSGI server, e.g.
+    `gunicorn -w 4 -b 0.0.0.0:8000 "application.app:create_app()"`, each worker process
+    then owning its own model and executor.
+
+    Args:
+        model_api (str): Path or URL to the generator model to be loaded. Default is an empty string.
+        max_workers (int, optional): Number of inference threads. Defaults to the configuration.
+        queue_size (int, optional): Number of requests allowed to wait for inference. Defaults to the configuration.
+        watch (bool): If True, follows new checkpoints of the models directory. Default is True.
+
+    Returns:
+        Flask: The configured Flask application.
+    """
+
+    app = Flask(__name__)
+
+    executor = InferenceExecutor(
+        max_workers or config.serving.inference_workers,
+        queue_size if queue_size is not None else config.serving.queue_size
+    )
+    atexit.register(executor.shutdown)
+
+    registry = ModelRegistry(model_api)
+    if watch:
+        registry.watch()
+    atexit.register(registry.stop)
+
+    app.extensions['gan'] = {
+        'registry': registry,
+        'executor': executor
+    }
+    app.register_blueprint(api)
+
+    return app
+
+def run_app(model_api="", production=False):
 
     """
     Loads a generator model and starts the Flask application.
 
     The generator model is loaded from the specified path or URL.
-    The Flask app runs on host '0.0.0.0' and port 8000 with debug mode disabled.
+    By default the Flask development server is used. In production mode the app is served 
+    by waitress with a pool of server threads, and the inference executor is drained 
+    before returning when the server stops.
 
     Args:
         model_api (str): Path or URL to the generator model to be loaded. Default is an empty string.
+        production (bool): If True, serves the app with waitress instead of the development server.
 
     Returns:
         None
     """
 
-    global generator
-    generator = load_generator_model(model_api)
-    app.run(host='0.0.0.0', port=8000, debug=False)
\ No newline at end of file
+    app = create_app(model_api)
+    state = app.extensions['gan']
+
+    try:
+        if production:
+            from waitress import serve
+            serve(app, host=config.serving.host, port=config.serving.port, threads=config.serving.threads)
+        else:
+            app.run(host=config.serving.host, port=config.serving.port, debug=False)
+    finally:
+        state['registry'].stop()
+        state['executor'].shutdown(wait=True)
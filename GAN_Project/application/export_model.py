@@ -0,0 +1,246 @@
+import os
+import argparse
+from time import perf_counter
+import numpy as np
+import psutil
+import tensorflow as tf
+from gan_config import config, add_config_arguments, configure_from_args
+from domain.gan_checkpoints import CheckpointStore, CHECKPOINT_EXTENSION
+from .generate_image import get_latest_generator_model, load_generator_model
+
+QUANTIZATIONS = (None, "float16", "int8")
+
+def fold_batch_norm_weights(kernel, batch_norm, channel_axis):
+
+    """
+    Folds an inference-mode BatchNormalization layer into the preceding kernel.
+
+    Args:
+        kernel (np.ndarray): Kernel of the Dense or Conv2DTranspose layer (without bias).
+        batch_norm (tf.keras.layers.BatchNormalization): The BatchNormalization layer following it.
+        channel_axis (int): Axis of the kernel holding the output channels.
+
+    Returns:
+        tuple: (folded kernel, folded bias)
+    """
+
+    scale = batch_norm.gamma.numpy() / np.sqrt(batch_norm.moving_variance.numpy() + batch_norm.epsilon)
+    bias = batch_norm.beta.numpy() - batch_norm.moving_mean.numpy() * scale
+
+    shape = [1] * kernel.ndim
+    shape[channel_axis] = -1
+
+    return kernel * scale.reshape(shape), bias
+
+def fold_generator(generator):
+
+    """
+    Builds an inference-only functional copy of the generator with BatchNorm folded into the weights.
+
+    Each Dense/Conv2DTranspose + BatchNormalization pair becomes a single layer with a bias,
+    so the exported graph only holds matmuls, transposed convolutions and activations.
+
+    Args:
+        generator (Generator): The trained generator model.
+
+    Returns:
+        tf.keras.Model: The folded generator.
+    """
+
+    latent_size = generator.Dense_inputs.kernel.shape[0]
+    inputs = tf.keras.Input(shape=(latent_size,))
+
+    kernel, bias = fold_batch_norm_weights(generator.Dense_inputs.kernel.numpy(), generator.BatchNormalization_inputs, -1)
+    dense = tf.keras.layers.Dense(kernel.shape[-1])
+    x = dense(inputs)
+    dense.set_weights([kernel, bias])
+
+    x = tf.keras.layers.LeakyReLU.from_config(generator.LeakyReLU_inputs.get_config())(x)
+    x = tf.keras.layers.Reshape.from_config(generator.Reshape.get_config())(x)
+
+    for i in range(1, generator.n_blocks + 1):
+        conv = getattr(generator, f"Conv2DTranspose_{i}")
+        batch_norm = getattr(generator, f"BatchNormalization_{i}")
+
+        # Conv2DTranspose kernels are laid out as (height, width, out_channels, in_channels)
+        kernel, bias = fold_batch_norm_weights(conv.kernel.numpy(), batch_norm, 2)
+        conv_config = conv.get_config()
+        conv_config['use_bias'] = True
+        folded_conv = tf.keras.layers.Conv2DTranspose.from_config(conv_config)
+        x = folded_conv(x)
+        folded_conv.set_weights([kernel, bias])
+
+        x = tf.keras.layers.LeakyReLU.from_config(getattr(generator, f"LeakyReLU_{i}").get_config())(x)
+
+    output_conv = tf.keras.layers.Conv2DTranspose.from_config(generator.Conv2DTranspose_output.get_config())
+    outputs = output_conv(x)
+    output_conv.set_weights(generator.Conv2DTranspose_output.get_weights())
+
+    return tf.keras.Model(inputs, outputs, name="folded_generator")
+
+def convert_to_tflite(model, quantization=None):
+
+    """
+    Converts a Keras model to a TFLite flatbuffer.
+
+    Args:
+        model (tf.keras.Model): The model to convert, taking latent vectors as input.
+        quantization (str, optional): None for float32, 'float16' for float16 weights, or 'int8'
+            for int8 weights and activations calibrated on random latent vectors.
+
+    Returns:
+        bytes: The TFLite model.
+
+    Raises:
+        ValueError: If the quantization mode is unknown.
+    """
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Quantification inconnue : {quantization}. Valeurs possibles : {QUANTIZATIONS}")
+
+    latent_size = model.input_shape[-1]
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+
+    elif quantization == "int8":
+        # The generator's inputs are Gaussian noise, so random latents are a faithful calibration set
+        def representative_dataset():
+            for _ in range(100):
+                yield [np.random.normal(size=(1, latent_size)).astype("float32")]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+
+    return converter.convert()
+
+def export_generator(model_api="", quantization=None):
+
+    """
+    Exports a trained generator to an inference-only TFLite model in the models directory.
+
+    The exported file is named after the source model, e.g. 'generator_epoch_1440.tflite' or
+    'generator_epoch_1440_float16.tflite', and can be served with `run_app` like a '.keras' model.
+
+    Args:
+        model_api (str): Name of the '.keras' model file to export. If empty, exports the latest model.
+        quantization (str, optional): None, 'float16' or 'int8'.
+
+    Returns:
+        str: Path to the exported TFLite model.
+    """
+
+    model_path = os.path.join(config.paths.models_dir, model_api) if model_api else get_latest_generator_model()
+    generator = load_generator_model(os.path.basename(model_path))
+    folded = fold_generator(generator)
+
+    noise = np.random.normal(size=(8, config.training.latent_dim)).astype("float32")
+    error = np.max(np.abs(np.asarray(folded(noise)) - np.asarray(generator(noise, training=False))))
+    print(f"Écart maximal après fusion des BatchNorm : {error:.2e}")
+
+    suffix = f"_{quantization}" if quantization else ""
+    export_path = os.path.splitext(model_path)[0] + f"{suffix}.tflite"
+
+    with open(export_path, "wb") as file:
+        file.write(convert_to_tflite(folded, quantization))
+
+    print(f"Modèle exporté : {export_path} ({os.path.getsize(export_path) / 1e6:.1f} Mo)")
+
+    return export_path
+
+def get_model_size(model_api):
+
+    """
+    Returns the bytes on disk of a model file, or of the chunks of a checkpoint of the store.
+    """
+
+    if model_api.endswith(CHECKPOINT_EXTENSION):
+        return CheckpointStore().size(model_api)
+
+    return os.path.getsize(os.path.join(config.paths.models_dir, model_api))
+
+def benchmark_model(model_api, n_images=100):
+
+    """
+    Measures load time, memory and per-image latency of a generator model.
+
+    Args:
+        model_api (str): Name of the model file in the models directory ('.keras' or '.tflite').
+        n_images (int): Number of single-image generations to time.
+
+    Returns:
+        dict: Load time (s), resident memory increase (MB), file size (MB) and latency statistics (ms).
+    """
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+
+    start = perf_counter()
+    generator = load_generator_model(model_api)
+    load_time = perf_counter() - start
+
+    noise = np.random.normal(size=(1, config.training.latent_dim)).astype("float32")
+    np.asarray(generator(noise))
+
+    latencies = []
+    for _ in range(n_images):
+        start = perf_counter()
+        np.asarray(generator(noise))
+        latencies.append((perf_counter() - start) * 1000)
+
+    return {
+        'model': model_api,
+        'size_mb': get_model_size(model_api) / 1e6,
+        'load_s': load_time,
+        'rss_mb': (process.memory_info().rss - rss_before) / 1e6,
+        'latency_mean_ms': float(np.mean(latencies)),
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95))
+    }
+
+def benchmark_export(keras_model_api, tflite_model_api, n_images=100):
+
+    """
+    Compares an exported TFLite generator against the Keras model it comes from.
+
+    Memory is measured in the current process, so the Keras model is benchmarked last
+    to keep TensorFlow's own footprint out of the TFLite figures where possible.
+
+    Args:
+        keras_model_api (str): Name of the '.keras' model file.
+        tflite_model_api (str): Name of the exported '.tflite' model file.
+        n_images (int): Number of single-image generations to time for each model.
+
+    Returns:
+        list: Benchmark results of the TFLite and Keras models.
+    """
+
+    results = [benchmark_model(tflite_model_api, n_images), benchmark_model(keras_model_api, n_images)]
+
+    print(f"{'Model':<40}{'Size MB':>10}{'Load s':>10}{'RSS MB':>10}{'Mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for result in results:
+        print(f"{result['model']:<40}{result['size_mb']:>10.1f}{result['load_s']:>10.2f}{result['rss_mb']:>10.1f}"
+              f"{result['latency_mean_ms']:>10.2f}{result['latency_p50_ms']:>10.2f}{result['latency_p95_ms']:>10.2f}")
+
+    return results
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Export a trained generator to an inference-only TFLite model.")
+    parser.add_argument("model", nargs="?", default="", help="'.keras' model file in the models directory (default: latest)")
+    parser.add_argument("--quantization", choices=["float16", "int8"], default=None)
+    parser.add_argument("--benchmark", type=int, default=0, metavar="N", help="Benchmark against the Keras model over N images")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(parser, args)
+
+    export_path = export_generator(args.model, args.quantization)
+
+    if args.benchmark:
+        keras_model_api = args.model or os.path.basename(get_latest_generator_model())
+        benchmark_export(keras_model_api, os.path.basename(export_path), args.benchmark)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,40 @@
 import os
 import re
-from PIL import Image, ImageDraw, ImageFont
-from .config import *
+import shutil
+import subprocess
+from functools import lru_cache
+from gan_config import config
+
+# Encoder arguments used by ffmpeg for each supported video container
+VIDEO_CODECS = {
+    ".mp4": ["-c:v", "libx264", "-pix_fmt", "yuv420p"],
+    ".webm": ["-c:v", "libvpx-vp9", "-pix_fmt", "yuv420p"]
+}
+
+def find_ffmpeg(ffmpeg="ffmpeg"):
+
+    """
+    Finds the ffmpeg executable, falling back to the one bundled with imageio-ffmpeg.
+
+    Args:
+        ffmpeg (str): Name or path of the ffmpeg executable. Default is 'ffmpeg'.
+
+    Returns:
+        str: Path to the executable.
+
+    Raises:
+        FileNotFoundError: If ffmpeg is neither found nor provided by imageio-ffmpeg.
+    """
+
+    executable = shutil.which(ffmpeg)
+    if executable is not None:
+        return executable
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        raise FileNotFoundError(f"L'encodeur '{ffmpeg}' est introuvable et imageio-ffmpeg n'est pas installé.")
 
 def natural_sort_key(text):
 
@@ -20,49 +53,337 @@ def natural_sort_key(text):
 
     return [int(s) if s.isdigit() else s.lower() for s in re.split(r'(\d+)', text)]
 
-def create_gif(gif_path, duration=200, font_size=50):
+def list_frames(step=1):
+
+    """
+    Lists the PNG images of the images directory in natural order.
+
+    Args:
+        step (int): Keeps one image out of `step`. The last image is always kept. Default is 1.
+
+    Returns:
+        list: Paths to the selected images.
+
+    Raises:
+        ValueError: If no PNG image is found.
+    """
+
+    image_files = [os.path.join(config.paths.images_dir, f) for f in os.listdir(config.paths.images_dir) if f.endswith('.png')]
+    image_files.sort(key=natural_sort_key) 
+
+    if not image_files:
+        raise ValueError("Aucune image PNG trouvée dans le dossier spécifié.")
+
+    selected_files = image_files[::step]
+    if selected_files[-1] != image_files[-1]:
+        selected_files.append(image_files[-1])
+
+    return selected_files
+
+@lru_cache(maxsize=None)
+def load_font(font_size):
+
+    """
+    Loads the annotation font once per process and size.
+    """
+
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("arial.ttf", font_size)  
+    except IOError:
+        return ImageFont.load_default() 
+
+def get_frame_size(image_path, width=None):
+
+    """
+    Computes the size of the output frames from the first image.
+
+    Args:
+        image_path (str): Path to the first image.
+        width (int, optional): Width of the frames, the height keeping the aspect ratio. 
+            Defaults to the image width.
+
+    Returns:
+        tuple: (width, height), rounded down to even values as required by video encoders.
+    """
+
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        frame_width, frame_height = image.size
+
+    if width:
+        frame_width, frame_height = width, round(frame_height * width / frame_width)
+
+    return frame_width - frame_width % 2, frame_height - frame_height % 2
+
+def prepare_frame(image_path, size, font_size, palette=None):
+
+    """
+    Decodes, annotates with the epoch number and resizes a single image.
+
+    Args:
+        image_path (str): Path to the image.
+        size (tuple): Size of the output frame.
+        font_size (int): Font size for epoch annotation.
+        palette (PIL.Image.Image, optional): 'P' image holding the palette to quantize the frame to.
+
+    Returns:
+        PIL.Image.Image: The frame, in 'RGB' mode or quantized to the palette.
+    """
+
+    from PIL import Image, ImageDraw
+
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+
+    draw = ImageDraw.Draw(image)
+    epoch = ''.join(re.findall(r'\d+', os.path.basename(image_path)))
+    draw.text((10, 10), f"Epoch {epoch}", font=load_font(font_size), fill=(255, 0, 0))  
+
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+    if palette is not None:
+        image = image.quantize(palette=palette)
+
+    return image
+
+def build_palette(image_files, size, font_size, samples=8):
+
+    """
+    Builds a 256-colour palette shared by all the frames of a GIF.
+
+    The palette is computed on a few frames evenly spread over the training, 
+    annotation included, so early noisy frames and late faces are both covered.
+
+    Args:
+        image_files (list): Paths to the images.
+        size (tuple): Size of the output frames.
+        font_size (int): Font size for epoch annotation.
+        samples (int): Number of frames used to compute the palette. Default is 8.
+
+    Returns:
+        PIL.Image.Image: A 1x1 'P' image holding the palette.
+    """
+
+    from PIL import Image
+
+    count = min(samples, len(image_files))
+    indices = sorted({round(i * (len(image_files) - 1) / max(count - 1, 1)) for i in range(count)})
+
+    montage = Image.new("RGB", (size[0], size[1] * len(indices)))
+    for row, index in enumerate(indices):
+        montage.paste(prepare_frame(image_files[index], size, font_size), (0, row * size[1]))
+
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(montage.quantize(colors=256, method=Image.Quantize.MEDIANCUT).getpalette())
+
+    return palette
+
+def iter_frames(image_files, size, font_size, palette=None, n_jobs=1):
+
+    """
+    Prepares the frames in parallel and yields them in order.
+
+    Only a few frames per worker are in flight at any time, so memory does not grow 
+    with the number of images.
+
+    Args:
+        image_files (list): Paths to the images.
+        size (tuple): Size of the output frames.
+        font_size (int): Font size for epoch annotation.
+        palette (PIL.Image.Image, optional): Palette to quantize the frames to.
+        n_jobs (int): Number of parallel jobs (-1 for all available cores, 1 for sequential).
+
+    Returns:
+        generator: The prepared frames.
+    """
+
+    from joblib import Parallel, delayed
+
+    return Parallel(n_jobs=n_jobs, return_as="generator", pre_dispatch="2*n_jobs")(
+        delayed(prepare_frame)(image_path, size, font_size, palette) for image_path in image_files
+    )
+
+class GifWriter:
+
+    """
+    Writes a GIF frame by frame, with a single global palette.
+
+    Used as a context manager, the partial file is removed if an exception is raised while writing.
+
+    Args:
+        gif_path (str): Path where the GIF will be saved.
+        duration (int): Duration of each frame in milliseconds.
+        loop (int): Number of loops, 0 looping forever. Default is 0.
+    """
+
+    def __init__(self, gif_path, duration, loop=0):
+
+        self._path = gif_path
+        self._file = open(gif_path, "wb")
+        self._duration = duration
+        self._loop = loop
+        self._started = False
+
+    def append(self, frame):
+
+        """
+        Appends a frame quantized to the shared palette.
+        """
+
+        from PIL import GifImagePlugin
+
+        if not self._started:
+            header, _ = GifImagePlugin.getheader(frame, info={"loop": self._loop, "duration": self._duration})
+            self._file.writelines(header)
+            self._started = True
+
+        self._file.writelines(GifImagePlugin.getdata(frame, duration=self._duration))
+
+    def close(self):
+        if self._started:
+            self._file.write(b";")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+            return
+
+        # Not terminated with a trailer, the partial GIF is unreadable
+        self._file.close()
+        os.remove(self._path)
+
+class VideoWriter:
+
+    """
+    Pipes raw RGB frames to a local ffmpeg encoder.
+
+    Used as a context manager, ffmpeg is killed and the partial video removed if an exception is
+    raised while writing, instead of waiting for it to encode the frames received so far.
+
+    Args:
+        video_path (str): Path where the video will be saved, ending with '.mp4' or '.webm'.
+        size (tuple): Size of the frames.
+        fps (float): Frame rate of the video.
+        ffmpeg (str): Name or path of the ffmpeg executable. Default is 'ffmpeg', falling back to the
+            executable of imageio-ffmpeg when it is not found (see `find_ffmpeg`).
+
+    Raises:
+        ValueError: If the container is not supported.
+        FileNotFoundError: If ffmpeg cannot be found.
+    """
+
+    def __init__(self, video_path, size, fps, ffmpeg="ffmpeg"):
+
+        extension = os.path.splitext(video_path)[1].lower()
+        if extension not in VIDEO_CODECS:
+            raise ValueError(f"Format vidéo non supporté : {extension}. Formats possibles : {list(VIDEO_CODECS)}")
+
+        executable = find_ffmpeg(ffmpeg)
+
+        self._path = video_path
+        self._process = subprocess.Popen(
+            [executable, "-y", "-loglevel", "error",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", f"{fps:g}", "-i", "-",
+             *VIDEO_CODECS[extension], video_path],
+            stdin=subprocess.PIPE
+        )
+
+    def append(self, frame):
+        self._process.stdin.write(frame.tobytes())
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg s'est terminé avec le code {self._process.returncode}.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+            return
+
+        self._process.kill()
+        self._process.wait()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+def create_gif(gif_path, duration=200, font_size=50, width=None, step=1, n_jobs=1):
 
     """
     Creates a GIF from PNG images in a specified directory.
 
     Images are sorted naturally, annotated with the epoch number, and combined into a GIF.
+    Frames are decoded, resized and quantized to a shared palette one at a time and 
+    appended to the GIF as they come, so memory stays bounded whatever the number of epochs.
     The resulting GIF is saved at the specified path.
 
     Args:
         gif_path (str): Path where the GIF will be saved.
         duration (int, optional): Duration of each frame in milliseconds. Default is 200ms.
         font_size (int, optional): Font size for epoch annotation. Default is 50.
+        width (int, optional): Width of the frames, the height keeping the aspect ratio. Defaults to the image width.
+        step (int, optional): Keeps one image out of `step`. Default is 1.
+        n_jobs (int, optional): Number of parallel jobs preparing frames (-1 for all available cores). Default is 1.
 
     Returns:
         None
     """
 
     try:
-        image_files = [os.path.join(images_dir, f) for f in os.listdir(images_dir) if f.endswith('.png')]
-        image_files.sort(key=natural_sort_key) 
+        image_files = list_frames(step)
+        size = get_frame_size(image_files[0], width)
+        palette = build_palette(image_files, size, font_size)
+
+        with GifWriter(gif_path, duration) as writer:
+            for frame in iter_frames(image_files, size, font_size, palette, n_jobs):
+                writer.append(frame)
+        
+        print(f"GIF généré avec succès : {gif_path}")
+    except Exception as e:
+        print(f"Une erreur est survenue lors de la création du GIF : {str(e)}")
 
-        if not image_files:
-            raise ValueError("Aucune image PNG trouvée dans le dossier spécifié.")
+def create_video(video_path, duration=200, font_size=50, width=None, step=1, n_jobs=1, ffmpeg="ffmpeg"):
 
-        images = []
+    """
+    Creates an MP4 or WebM video from PNG images in a specified directory.
 
-        for i, image_path in enumerate(image_files):
-            image = Image.open(image_path).convert("RGBA")
+    Frames are prepared like for `create_gif` and streamed to a local ffmpeg encoder.
 
-            draw = ImageDraw.Draw(image)
+    Args:
+        video_path (str): Path where the video will be saved, ending with '.mp4' or '.webm'.
+        duration (int, optional): Duration of each frame in milliseconds. Default is 200ms.
+        font_size (int, optional): Font size for epoch annotation. Default is 50.
+        width (int, optional): Width of the frames, the height keeping the aspect ratio. Defaults to the image width.
+        step (int, optional): Keeps one image out of `step`. Default is 1.
+        n_jobs (int, optional): Number of parallel jobs preparing frames (-1 for all available cores). Default is 1.
+        ffmpeg (str, optional): Name or path of the ffmpeg executable. Default is 'ffmpeg'.
 
-            try:
-                font = ImageFont.truetype("arial.ttf", font_size)  
-            except IOError:
-                font = ImageFont.load_default() 
+    Returns:
+        None
+    """
 
-            epoch = ''.join(re.findall(r'\d+', image_path))
-            draw.text((10, 10), f"Epoch {epoch}", font=font, fill=(255, 0, 0, 255))  
+    try:
+        image_files = list_frames(step)
+        size = get_frame_size(image_files[0], width)
 
-            images.append(image)
+        with VideoWriter(video_path, size, 1000 / duration, ffmpeg) as writer:
+            for frame in iter_frames(image_files, size, font_size, n_jobs=n_jobs):
+                writer.append(frame)
 
-        images[0].save(gif_path, save_all=True, append_images=images[1:], optimize=False, duration=duration, loop=0)
-        
-        print(f"GIF généré avec succès : {gif_path}")
+        print(f"Vidéo générée avec succès : {video_path}")
     except Exception as e:
-        print(f"Une erreur est survenue lors de la création du GIF : {str(e)}")
\ No newline at end of file
+        print(f"Une erreur est survenue lors de la création de la vidéo : {str(e)}")
@@ -1,17 +1,48 @@
 import os
 import re
+import numpy as np
 from PIL import Image
-import tensorflow as tf
-from .config import *
-from .gan_generator import Generator
+from gan_config import config
+from domain.gan_checkpoints import CheckpointStore, CHECKPOINT_EXTENSION
+from .tflite_generator import TFLiteGenerator
+
+def get_ema_model_name(model_api):
+
+    """
+    Returns the name of the EMA generator saved with a generator, e.g. 'generator_epoch_1440_ema.keras'.
+    """
+
+    return re.sub(r'\.(keras|ckpt)$', r'_ema.\1', model_api)
+
+def get_discriminator_model_name(model_api):
+
+    """
+    Returns the name of the discriminator saved with a generator, e.g. 'discriminator_epoch_1440.keras'
+    for 'generator_epoch_1440.keras' or 'generator_epoch_1440_ema.keras'.
+    """
+
+    return re.sub(r'generator_epoch_(\d+)(_ema)?\.(keras|ckpt)$', r'discriminator_epoch_\1.\3', model_api)
+
+def model_exists(model_path):
+
+    """
+    Checks whether a model exists, as a file of the models directory or as a checkpoint of the store ('.ckpt').
+    """
+
+    if model_path.endswith(CHECKPOINT_EXTENSION):
+        return CheckpointStore().has(model_path)
+
+    return os.path.isfile(model_path)
 
 def get_latest_generator_model():
 
     """
     Returns the path of the latest generator model file.
 
-    Searches for files matching the pattern 'generator_epoch_XXXX.keras' in the models directory, 
+    The latest checkpoint of the store is read from its index, e.g. 'generator_epoch_1440.ckpt'.
+    If the store is empty, searches for files matching the pattern 'generator_epoch_XXXX.keras' in the models directory, 
     sorts them by epoch number, and returns the path to the latest model.
+    EMA generators ('generator_epoch_XXXX_ema.keras') are not considered.
 
     Returns:
         str: Path to the latest generator model file.
@@ -20,46 +51,140 @@ def get_latest_generator_model():
         FileNotFoundError: If no matching model files are found in the models directory.
     """
 
-    model_files = [f for f in os.listdir(models_dir) if re.match(r'generator_epoch_\d+\.keras', f)]
+    latest_epoch = CheckpointStore().latest_epoch()
+    if latest_epoch is not None:
+        return os.path.join(config.paths.models_dir, f"generator_epoch_{latest_epoch}{CHECKPOINT_EXTENSION}")
+
+    model_files = [f for f in os.listdir(config.paths.models_dir) if re.match(r'generator_epoch_\d+\.keras', f)]
 
     if not model_files:
-        raise FileNotFoundError(f"Aucun modèle trouvé dans le dossier {models_dir}.")
+        raise FileNotFoundError(f"Aucun modèle trouvé dans le dossier {config.paths.models_dir}.")
     model_files.sort(key=lambda x: int(re.search(r'\d+', x).group())) 
 
-    return os.path.join(models_dir, model_files[-1])  
+    return os.path.join(config.paths.models_dir, model_files[-1])  
 
 
-def load_generator_model(model_api):
+def load_keras_model(model_path):
+
+    """
+    Loads a Keras model from a '.keras' file or from the checkpoint store ('.ckpt', memory-mapped weights).
+    """
+
+    if model_path.endswith(CHECKPOINT_EXTENSION):
+        return CheckpointStore().load_model(model_path, mmap=True)
+
+    # TensorFlow is only imported for Keras models; the models are registered for deserialization
+    import tensorflow as tf
+    import domain.gan_models
+    return tf.keras.models.load_model(model_path)
+
+
+def load_generator_model(model_api, ema=False, acceptance_rate=None):
 
     """
     Loads a generator model from the specified file or the latest available model.
 
     If a model name is provided, it loads the specified model. 
     Otherwise, it loads the latest available model from the models directory.
+    Models exported to '.tflite' by `export_model` are run with the TFLite interpreter 
+    instead of Keras. Checkpoints of the store ('.ckpt') are rebuilt from memory-mapped weights.
 
     Args:
         model_api (str): Name of the model file to load. If empty, loads the latest model.
+        ema (bool): Loads the exponential moving average of the generator saved with the
+            '.keras' model instead of its raw weights. Default is False.
+        acceptance_rate (float, optional): Also loads the discriminator saved with the generator and
+            returns a `RejectionSampler`, keeping this fraction of the best scored samples. Default is None.
 
     Returns:
-        tf.keras.Model: The loaded generator model.
+        tf.keras.Model, TFLiteGenerator or RejectionSampler: The loaded generator model.
 
     Raises:
-        FileNotFoundError: If the specified model file does not exist.
+        FileNotFoundError: If the specified model file, or the discriminator saved with it, does not exist.
+        ValueError: If `acceptance_rate` is used with a '.tflite' model, which has no discriminator.
     """
 
     if model_api:  
-        model_path = os.path.join(models_dir, model_api)
-        if not os.path.isfile(model_path):
+        model_path = os.path.join(config.paths.models_dir, model_api)
+        if not model_exists(model_path):
             raise FileNotFoundError(f"Le modèle spécifié {model_path} n'existe pas.")
     else: 
         model_path = get_latest_generator_model()
+
+    if ema and not re.search(r'_ema\.(keras|ckpt)$', model_path):
+        model_path = get_ema_model_name(model_path)
+        if not model_exists(model_path):
+            raise FileNotFoundError(f"Aucun générateur EMA n'a été sauvegardé avec ce modèle : {model_path}")
     
+    if acceptance_rate is not None:
+        if model_path.endswith('.tflite'):
+            raise ValueError(f"L'échantillonnage par rejet nécessite un modèle Keras, pas {model_path}.")
+        discriminator_path = get_discriminator_model_name(model_path)
+        if not model_exists(discriminator_path):
+            raise FileNotFoundError(f"Aucun discriminateur n'a été sauvegardé avec ce modèle : {discriminator_path}")
+
     print(f"Chargement du modèle : {model_path}")
-    generator = tf.keras.models.load_model(model_path)
+    if model_path.endswith('.tflite'):
+        generator = TFLiteGenerator(model_path)
+    else:
+        generator = load_keras_model(model_path)
+
+    if acceptance_rate is not None:
+        from domain.gan_sampling import RejectionSampler
+        generator = RejectionSampler(generator, load_keras_model(discriminator_path), acceptance_rate)
 
     return generator
 
 
+def sample_noise(batch_size=1):
+
+    """
+    Samples latent vectors for the generator.
+
+    Args:
+        batch_size (int): Number of latent vectors. Default is 1.
+
+    Returns:
+        np.ndarray: Standard normal noise of shape (batch_size, latent_dim), as float32.
+    """
+
+    return np.random.normal(size=(batch_size, config.training.latent_dim)).astype("float32")
+
+
+def denormalize(generated_images):
+
+    """
+    Rescales generator outputs from the [-1, 1] range to 8-bit pixels.
+
+    Args:
+        generated_images (array-like): Generated images in [-1, 1].
+
+    Returns:
+        np.ndarray: Images in the 0-255 range, as uint8.
+    """
+
+    generated_images = (np.asarray(generated_images) + 1) / 2.0  
+
+    return (generated_images * 255).astype("uint8")  
+
+
+def encode_png(generated_image, output):
+
+    """
+    Saves a single 8-bit image as a PNG file.
+
+    Args:
+        generated_image (np.ndarray): Image of shape (height, width, 3), as uint8.
+        output (str or file object): Path or writable binary buffer to save the image to.
+
+    Returns:
+        None
+    """
+
+    image = Image.fromarray(generated_image)
+    image.save(output, format="PNG")
+
+
 def generate_image(generator, output):
 
     """
@@ -69,17 +194,44 @@ def generate_image(generator, output):
     The generated image is rescaled to the 0-255 range and saved as a PNG file.
 
     Args:
-        generator (tf.keras.Model): The generator model used to generate the image.
-        output (str): Path to save the generated image file.
+        generator (tf.keras.Model or TFLiteGenerator): The generator model used to generate the image.
+        output (str or file object): Path or writable binary buffer to save the generated image to.
 
     Returns:
         None
     """
 
-    noise = tf.random.normal([1, latent_dim])
-    generated_image = generator(noise)
-    generated_image = (generated_image[0] + 1) / 2.0  
-    generated_image = (generated_image * 255).numpy().astype("uint8")  
+    noise = sample_noise()
+    generated_image = denormalize(generator(noise))[0]
 
-    image = Image.fromarray(generated_image)
-    image.save(output)
\ No newline at end of file
+    encode_png(generated_image, output)
+
+
+def generate_images(generator, output_dir, n_images, batch_size=64):
+
+    """
+    Generates images in batches and saves them as PNG files ('image_00000.png', ...).
+
+    Args:
+        generator (tf.keras.Model, TFLiteGenerator or RejectionSampler): The generator model. With a
+            `RejectionSampler`, each batch keeps the best scored of the oversampled candidates.
+        output_dir (str): Directory the images are saved to, created if needed.
+        n_images (int): Number of images to generate.
+        batch_size (int): Number of images generated per forward pass. Default is 64.
+
+    Returns:
+        list: Paths of the saved images.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = []
+    for start in range(0, n_images, batch_size):
+        generated_images = denormalize(generator(sample_noise(min(batch_size, n_images - start)), training=False))
+        for i, generated_image in enumerate(generated_images, start=start):
+            paths.append(os.path.join(output_dir, f"image_{i:05d}.png"))
+            encode_png(generated_image, paths[-1])
+
+    print(f"{n_images} images sauvegardées dans {output_dir}")
+
+    return paths
\ No newline at end of file
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class QueueFullError(RuntimeError):
+
+    """
+    Raised when the inference executor cannot accept any more work.
+    """
+
+class InferenceExecutor:
+
+    """
+    Runs generator inference on a dedicated pool of worker threads.
+
+    At most `max_workers + queue_size` jobs are admitted at the same time. Further 
+    submissions are rejected immediately with a QueueFullError, so the API can answer 
+    with a 429 instead of piling requests up on the server threads. TensorFlow releases 
+    the GIL while running its kernels, so the workers run in parallel on several cores.
+
+    Args:
+        max_workers (int): Number of threads running inference.
+        queue_size (int): Number of jobs allowed to wait for a free worker.
+    """
+
+    def __init__(self, max_workers, queue_size):
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._closed = False
+
+    def submit(self, fn, *args, **kwargs):
+
+        """
+        Schedules `fn(*args, **kwargs)` on the inference pool.
+
+        Returns:
+            concurrent.futures.Future: Future holding the result of the call.
+
+        Raises:
+            QueueFullError: If the pool is saturated or shutting down.
+        """
+
+        if self._closed or not self._slots.acquire(blocking=False):
+            raise QueueFullError("Le serveur d'inférence est saturé.")
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except RuntimeError:
+            self._slots.release()
+            raise QueueFullError("Le serveur d'inférence est en cours d'arrêt.")
+
+        future.add_done_callback(lambda _: self._slots.release())
+
+        return future
+
+    def shutdown(self, wait=True):
+
+        """
+        Stops accepting new jobs and releases the worker threads.
+
+        Args:
+            wait (bool): If True, waits for queued and running jobs to finish. 
+                Otherwise, queued jobs are cancelled.
+        """
+
+        self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,302 @@
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from gan_config import config, add_config_arguments, configure_from_args
+from .generate_image import load_generator_model, denormalize
+from .generate_gif import GifWriter, VideoWriter, VIDEO_CODECS
+
+# Containers a walk can be rendered to
+WALK_FORMATS = (".gif", *VIDEO_CODECS)
+
+# Keyframes used to compute the palette of a GIF
+PALETTE_SAMPLES = 8
+
+# Seeds are passed to `np.random.default_rng`, which only takes non-negative integers
+MAX_SEED = 2**32
+
+def lerp(start, end, t):
+
+    """
+    Linear interpolation between two batches of latent vectors.
+
+    Args:
+        start (np.ndarray): Latent vectors of shape (n, latent_dim).
+        end (np.ndarray): Latent vectors of shape (n, latent_dim).
+        t (np.ndarray): Positions in [0, 1] of shape (n,), 0 giving `start` and 1 giving `end`.
+
+    Returns:
+        np.ndarray: Interpolated latent vectors of shape (n, latent_dim), as float32.
+    """
+
+    return (start + (end - start) * t[:, np.newaxis]).astype(np.float32)
+
+def slerp(start, end, t):
+
+    """
+    Spherical interpolation between two batches of latent vectors.
+
+    The vectors follow the arc between `start` and `end` instead of the chord, so they keep the norm
+    of Gaussian samples all along the walk; with `lerp`, intermediate vectors get closer to the origin,
+    where the generator produces blurry, average faces. Nearly parallel vectors are interpolated linearly.
+
+    Args:
+        start (np.ndarray): Latent vectors of shape (n, latent_dim).
+        end (np.ndarray): Latent vectors of shape (n, latent_dim).
+        t (np.ndarray): Positions in [0, 1] of shape (n,), 0 giving `start` and 1 giving `end`.
+
+    Returns:
+        np.ndarray: Interpolated latent vectors of shape (n, latent_dim), as float32.
+    """
+
+    norms = np.linalg.norm(start, axis=1) * np.linalg.norm(end, axis=1)
+    omega = np.arccos(np.clip(np.sum(start * end, axis=1) / np.maximum(norms, 1e-12), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+
+    parallel = sin_omega < 1e-6
+    sin_omega = np.where(parallel, 1.0, sin_omega)
+    start_weights = np.where(parallel, 1 - t, np.sin((1 - t) * omega) / sin_omega)
+    end_weights = np.where(parallel, t, np.sin(t * omega) / sin_omega)
+
+    return (start * start_weights[:, np.newaxis] + end * end_weights[:, np.newaxis]).astype(np.float32)
+
+INTERPOLATIONS = {
+    'slerp': slerp,
+    'lerp': lerp
+}
+
+def seed_latents(seeds):
+
+    """
+    Returns the latent vector of each seed, the same for a given seed and `LATENT_DIM` across runs.
+
+    Returns:
+        np.ndarray: Latent vectors of shape (len(seeds), latent_dim), as float32.
+    """
+
+    return np.stack([
+        np.random.default_rng(seed).standard_normal(config.training.latent_dim, dtype=np.float32) for seed in seeds
+    ])
+
+def count_walk_frames(n_seeds, frames_per_seed, loop=False):
+
+    """
+    Returns the number of frames of a walk through `n_seeds` seeds.
+
+    Each of the segments between consecutive seeds has `frames_per_seed` frames. An open walk ends
+    on a frame of the last seed, a looping walk goes back to the first seed without repeating it.
+    """
+
+    return n_seeds * frames_per_seed if loop else (n_seeds - 1) * frames_per_seed + 1
+
+def walk_latents(keyframes, frames_per_seed, interpolation='slerp', loop=False, chunk_size=64):
+
+    """
+    Yields the latent vectors of a walk through keyframe latents, chunk by chunk.
+
+    Frame `i` lies on the segment `i // frames_per_seed`, at `t = (i % frames_per_seed) / frames_per_seed`.
+    Only the vectors of the current chunk are computed, so memory does not grow with the walk length.
+
+    Args:
+        keyframes (np.ndarray): Latent vectors the walk goes through, of shape (n_seeds, latent_dim).
+        frames_per_seed (int): Number of frames from one keyframe to the next.
+        interpolation (str): Name of the interpolation in `INTERPOLATIONS`. Default is 'slerp'.
+        loop (bool): Goes back from the last keyframe to the first one. Default is False.
+        chunk_size (int): Number of latent vectors per chunk. Default is 64.
+
+    Returns:
+        generator: Latent vectors of shape (chunk_size, latent_dim), the last chunk possibly shorter.
+    """
+
+    interpolate = INTERPOLATIONS[interpolation]
+    n_frames = count_walk_frames(len(keyframes), frames_per_seed, loop)
+
+    for start in range(0, n_frames, chunk_size):
+        frames = np.arange(start, min(start + chunk_size, n_frames))
+        segments = frames // frames_per_seed
+        t = (frames % frames_per_seed) / frames_per_seed
+
+        yield interpolate(keyframes[segments % len(keyframes)], keyframes[(segments + 1) % len(keyframes)], t)
+
+def get_walk_generator(generator):
+
+    """
+    Returns the generator to render a walk with.
+
+    A `RejectionSampler` would replace frames by unrelated samples, so the generator it wraps is used instead.
+    """
+
+    gan_sampling = sys.modules.get("domain.gan_sampling")
+    if gan_sampling is not None and isinstance(generator, gan_sampling.RejectionSampler):
+        return generator.generator
+
+    return generator
+
+def prepare_frames(generator, latents, size=None, palette=None):
+
+    """
+    Generates a chunk of frames with a single batched generator call.
+
+    Args:
+        generator (tf.keras.Model or TFLiteGenerator): The generator.
+        latents (np.ndarray): Latent vectors of the frames.
+        size (tuple, optional): Size of the output frames. Defaults to the generator's.
+        palette (PIL.Image.Image, optional): 'P' image holding the palette to quantize the frames to.
+
+    Returns:
+        list: The frames, as 'RGB' PIL images or quantized to the palette.
+    """
+
+    frames = []
+    for generated_image in denormalize(generator(latents, training=False)):
+        frame = Image.fromarray(generated_image)
+        if size is not None and frame.size != size:
+            frame = frame.resize(size, Image.LANCZOS)
+        frames.append(frame.quantize(palette=palette) if palette is not None else frame)
+
+    return frames
+
+def iter_walk_frames(generator, latent_chunks, size=None, palette=None):
+
+    """
+    Yields the frames of a walk, generating the next chunk while the current one is being encoded.
+
+    At most two chunks of frames are held in memory, whatever the number of frames.
+    """
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="walk") as executor:
+        pending = None
+        for latents in latent_chunks:
+            future = executor.submit(prepare_frames, generator, latents, size, palette)
+            if pending is not None:
+                yield from pending.result()
+            pending = future
+
+        if pending is not None:
+            yield from pending.result()
+
+def build_walk_palette(images, size):
+
+    """
+    Builds a 256-colour palette shared by all the frames of a walk.
+
+    Args:
+        images (np.ndarray): Images of a few keyframes spread over the walk, as uint8.
+        size (tuple): Size of the output frames.
+
+    Returns:
+        PIL.Image.Image: A 1x1 'P' image holding the palette.
+    """
+
+    montage = Image.new("RGB", (size[0], size[1] * len(images)))
+    for row, image in enumerate(images):
+        montage.paste(Image.fromarray(image).resize(size, Image.LANCZOS), (0, row * size[1]))
+
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(montage.quantize(colors=256, method=Image.Quantize.MEDIANCUT).getpalette())
+
+    return palette
+
+def render_walk(generator, output, seeds, frames_per_seed=None, interpolation=None, loop=False,
+                duration=None, width=None, chunk_size=None, ffmpeg="ffmpeg"):
+
+    """
+    Renders a latent walk through the latent vectors of several seeds to a GIF or a video.
+
+    The latent vectors are interpolated chunk by chunk (see `walk_latents`), each chunk is generated
+    with one batched generator call, and its frames are streamed to the encoder as they come: the GIF
+    is written frame by frame with a palette computed on the keyframes, videos are piped to ffmpeg.
+    Memory is bounded by the chunk size, so walks of thousands of frames can be rendered.
+
+    Args:
+        generator (tf.keras.Model, TFLiteGenerator or RejectionSampler): The generator. A `RejectionSampler`
+            is rendered with the generator it wraps.
+        output (str): Path of the walk, ending with '.gif', '.mp4' or '.webm'.
+        seeds (list): Seeds of the latent vectors the walk goes through, at least two, in [0, 2**32).
+        frames_per_seed (int, optional): Number of frames from one seed to the next. Defaults to `WALK.FRAMES_PER_SEED`.
+        interpolation (str, optional): 'slerp' or 'lerp'. Defaults to `WALK.INTERPOLATION`.
+        loop (bool): Goes back from the last seed to the first one. Default is False.
+        duration (int, optional): Duration of each frame in milliseconds. Defaults to `WALK.DURATION`.
+        width (int, optional): Width of the frames, the height keeping the aspect ratio. Defaults to the generator's.
+        chunk_size (int, optional): Number of frames generated per call. Defaults to `WALK.CHUNK_SIZE`.
+        ffmpeg (str): Name or path of the ffmpeg executable, for videos. Default is 'ffmpeg'.
+
+    Returns:
+        int: Number of frames rendered.
+
+    Raises:
+        ValueError: If the format, the interpolation, the seeds or the number of frames is invalid.
+    """
+
+    walk = config.walk
+    frames_per_seed = frames_per_seed or walk.frames_per_seed
+    interpolation = interpolation or walk.interpolation
+    duration = duration or walk.duration
+    chunk_size = chunk_size or walk.chunk_size
+
+    extension = os.path.splitext(output)[1].lower()
+    if extension not in WALK_FORMATS:
+        raise ValueError(f"Format non supporté : {extension}. Formats possibles : {list(WALK_FORMATS)}")
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Interpolation inconnue : {interpolation}. Interpolations possibles : {list(INTERPOLATIONS)}")
+    if len(seeds) < 2:
+        raise ValueError("Une promenade latente nécessite au moins deux graines.")
+    if not all(0 <= seed < MAX_SEED for seed in seeds):
+        raise ValueError(f"Les graines doivent être comprises entre 0 et {MAX_SEED - 1}.")
+    if frames_per_seed < 1:
+        raise ValueError(f"Le nombre d'images par graine doit être positif : {frames_per_seed}")
+
+    generator = get_walk_generator(generator)
+    keyframes = seed_latents(seeds)
+
+    # A few keyframes spread over the walk give the frame size and the colours of the GIF palette
+    samples = np.unique(np.linspace(0, len(keyframes) - 1, min(PALETTE_SAMPLES, len(keyframes))).round().astype(int))
+    sample_images = denormalize(generator(keyframes[samples], training=False))
+
+    height, frame_width = sample_images.shape[1:3]
+    if width:
+        frame_width, height = width, round(height * width / frame_width)
+    size = (frame_width - frame_width % 2, height - height % 2)
+
+    latent_chunks = walk_latents(keyframes, frames_per_seed, interpolation, loop, chunk_size)
+    n_frames = 0
+
+    if extension == ".gif":
+        palette = build_walk_palette(sample_images, size)
+        with GifWriter(output, duration) as writer:
+            for frame in iter_walk_frames(generator, latent_chunks, size, palette):
+                writer.append(frame)
+                n_frames += 1
+    else:
+        with VideoWriter(output, size, 1000 / duration, ffmpeg) as writer:
+            for frame in iter_walk_frames(generator, latent_chunks, size):
+                writer.append(frame)
+                n_frames += 1
+
+    print(f"Promenade latente de {n_frames} images générée : {output}")
+
+    return n_frames
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Render a latent walk through the latent vectors of several seeds.")
+    parser.add_argument("output", help="Output file ending with .gif, .mp4 or .webm")
+    parser.add_argument("seeds", nargs="+", type=int, help="Seeds of the latent vectors to go through")
+    parser.add_argument("--model", default="", help="Model file of the models directory (default: latest)")
+    parser.add_argument("--ema", action="store_true", help="Use the EMA generator")
+    parser.add_argument("--frames", type=int, default=None, help="Frames from one seed to the next")
+    parser.add_argument("--interpolation", choices=list(INTERPOLATIONS), default=None)
+    parser.add_argument("--loop", action="store_true", help="Go back to the first seed")
+    parser.add_argument("--duration", type=int, default=None, help="Duration of each frame in milliseconds")
+    parser.add_argument("--width", type=int, default=None, help="Width of the frames")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(parser, args)
+
+    generator = load_generator_model(args.model, ema=args.ema)
+    render_walk(generator, args.output, args.seeds, args.frames, args.interpolation, args.loop, args.duration, args.width)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import csv
+
+# Metrics of the epoch CSV log followed by the incremental monitoring
+LOG_METRICS = ('Gen_Loss_Avg', 'Disc_Loss_Avg', 'Epoch_Duration')
+
+class LogTail:
+
+    """
+    Reads the rows appended to a CSV log file since the previous read.
+
+    The file offset is kept between reads, so following a running training only parses
+    the new epochs. A last line without its newline is left for the next read, as it
+    may still be being written.
+
+    Args:
+        path (str): Path to the CSV log file.
+        chunk_size (int): Number of bytes read at once. Default is 1 MiB.
+    """
+
+    def __init__(self, path, chunk_size=1 << 20):
+
+        self.path = path
+        self.chunk_size = chunk_size
+        self.header = None
+        self._offset = 0
+
+    def read_new(self):
+
+        """
+        Yields the rows appended since the previous call.
+
+        Yields:
+            dict: One row per epoch, mapping column names to string values.
+        """
+
+        with open(self.path, 'rb') as file:
+            file.seek(self._offset)
+            remainder = b""
+
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    break
+
+                lines = (remainder + chunk).split(b"\n")
+                remainder = lines.pop()
+
+                for line in lines:
+                    self._offset += len(line) + 1
+                    line = line.decode('utf-8').rstrip("\r")
+                    if not line:
+                        continue
+
+                    values = next(csv.reader([line]))
+                    if self.header is None:
+                        self.header = values
+                    else:
+                        yield dict(zip(self.header, values))
+
+class DecimatedSeries:
+
+    """
+    Summarizes a metric over windows of consecutive epochs in bounded memory.
+
+    Each window keeps its first epoch, mean, min, max and the exponential moving average
+    at its end. When more than `max_points` windows exist, adjacent windows are merged
+    and the window length doubles, so the series never holds more than `max_points` points
+    however long the run.
+
+    Args:
+        max_points (int): Maximum number of windows kept. Default is 500.
+        alpha (float): Smoothing factor of the exponential moving average. Default is 0.05.
+    """
+
+    def __init__(self, max_points=500, alpha=0.05):
+
+        self.max_points = max_points
+        self.alpha = alpha
+        self.window = 1
+        self.ema = None
+        # Each window is [first epoch, count, total, min, max, ema]
+        self._windows = []
+
+    def add(self, epoch, value):
+
+        """
+        Adds the value of one epoch.
+        """
+
+        self.ema = value if self.ema is None else self.alpha * value + (1 - self.alpha) * self.ema
+
+        if self._windows and self._windows[-1][1] < self.window:
+            window = self._windows[-1]
+            window[1] += 1
+            window[2] += value
+            window[3] = min(window[3], value)
+            window[4] = max(window[4], value)
+            window[5] = self.ema
+        else:
+            self._windows.append([epoch, 1, value, value, value, self.ema])
+
+        if len(self._windows) > self.max_points:
+            self._merge()
+
+    def _merge(self):
+
+        merged = []
+        for i in range(0, len(self._windows) - 1, 2):
+            first, second = self._windows[i], self._windows[i + 1]
+            merged.append([
+                first[0], first[1] + second[1], first[2] + second[2],
+                min(first[3], second[3]), max(first[4], second[4]), second[5]
+            ])
+
+        if len(self._windows) % 2:
+            merged.append(self._windows[-1])
+
+        self._windows = merged
+        self.window *= 2
+
+    def __len__(self):
+        return len(self._windows)
+
+    def columns(self):
+
+        """
+        Returns the windows as columns.
+
+        Returns:
+            dict: Lists of 'Epoch' (first epoch of each window), 'Mean', 'Min', 'Max' and 'EMA'.
+        """
+
+        return {
+            'Epoch': [w[0] for w in self._windows],
+            'Mean': [w[2] / w[1] for w in self._windows],
+            'Min': [w[3] for w in self._windows],
+            'Max': [w[4] for w in self._windows],
+            'EMA': [w[5] for w in self._windows]
+        }
+
+class RunMonitor:
+
+    """
+    Follows a CSV log file and keeps decimated statistics of its metrics.
+
+    Args:
+        path (str): Path to the CSV log file.
+        max_points (int): Maximum number of windows kept per metric. Default is 500.
+        alpha (float): Smoothing factor of the exponential moving averages. Default is 0.05.
+    """
+
+    def __init__(self, path, max_points=500, alpha=0.05):
+
+        self.tail = LogTail(path)
+        self.series = {metric: DecimatedSeries(max_points, alpha) for metric in LOG_METRICS}
+        self.epochs = 0
+        self.last_epoch = None
+
+    def update(self):
+
+        """
+        Reads the new epochs of the log.
+
+        Returns:
+            int: Number of new epochs.
+        """
+
+        new_epochs = 0
+
+        for row in self.tail.read_new():
+            epoch = int(row['Epoch'])
+            for metric, series in self.series.items():
+                series.add(epoch, float(row[metric]))
+            self.last_epoch = epoch
+            new_epochs += 1
+
+        self.epochs += new_epochs
+
+        return new_epochs
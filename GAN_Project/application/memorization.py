@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from gan_config import config, add_config_arguments, configure_from_args
+from domain.gan_checkpoints import CheckpointStore, CHECKPOINT_EXTENSION
+from .generate_image import load_generator_model, denormalize
+
+FEATURES_PREFIX = "processed_"
+REPORT_COLUMNS = ["epoch", "model", "samples", "mean", "p50", "p99", "max", "memorized_rate", "closest_image"]
+
+def embed_images(images, feature_size=None):
+
+    """
+    Computes the features used to compare generated and training images.
+
+    Images are box-downsampled to `FEATURE_SIZE`, then each one is centered and scaled to unit norm,
+    so that the dot product of two features is the correlation of their pixels (1 for identical images).
+
+    Args:
+        images (iterable): Images as PIL images or (height, width, 3) uint8 arrays.
+        feature_size (tuple, optional): (height, width) of the downsampled images. Defaults to `MEMORIZATION.FEATURE_SIZE`.
+
+    Returns:
+        np.ndarray: Features of shape (n, height * width * 3), as float32.
+    """
+
+    height, width = feature_size or config.memorization.feature_size
+
+    features = []
+    for image in images:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        features.append(np.asarray(image.convert("RGB").resize((width, height), Image.BOX), dtype=np.float32).reshape(-1))
+
+    features = np.stack(features)
+    features -= features.mean(axis=1, keepdims=True)
+    features /= np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-6)
+
+    return features
+
+def embed_image_file(path):
+
+    with Image.open(path) as image:
+        return embed_images([image])[0]
+
+def get_processed_features(rebuild=False):
+
+    """
+    Returns the features of the processed images, computed once and cached as a memory-mapped matrix.
+
+    The cache ('processed_<fingerprint>.npy' in the features directory) is keyed on the names, sizes
+    and modification times of the images and on `FEATURE_SIZE`, and rebuilt when any of them changes.
+    Features are stored as float16 and written row by row, so neither building nor reading the cache
+    needs the whole matrix in memory.
+
+    Args:
+        rebuild (bool): Recomputes the features even if the cache is up to date.
+
+    Returns:
+        tuple: (list of image names, read-only np.memmap of shape (n, features) in the same order)
+
+    Raises:
+        ValueError: If the processed data directory has no images.
+    """
+
+    from domain.data_loader import IMAGE_EXTENSIONS
+
+    processed_data_dir = config.paths.processed_data_dir
+    features_dir = config.paths.features_dir
+
+    entries = sorted(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in os.scandir(processed_data_dir)
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not entries:
+        raise ValueError(f"No images found in '{processed_data_dir}'.")
+
+    fingerprint = hashlib.sha256(json.dumps([entries, config.memorization.feature_size]).encode()).hexdigest()[:16]
+    features_path = os.path.join(features_dir, f"{FEATURES_PREFIX}{fingerprint}.npy")
+    names_path = os.path.join(features_dir, f"{FEATURES_PREFIX}{fingerprint}.json")
+    names = [name for name, _, _ in entries]
+
+    if rebuild or not (os.path.exists(features_path) and os.path.exists(names_path)):
+        print(f"Calcul des caractéristiques de {len(names)} images...")
+        height, width = config.memorization.feature_size
+        temporary_path = f"{features_path}.{os.getpid()}.tmp"
+
+        features = np.lib.format.open_memmap(temporary_path, mode='w+', dtype=np.float16, shape=(len(names), height * width * 3))
+        # Decoding and resizing release the GIL, so threads are enough to use several cores
+        with ThreadPoolExecutor() as executor:
+            paths = (os.path.join(processed_data_dir, name) for name in names)
+            for row, feature in enumerate(executor.map(embed_image_file, paths)):
+                features[row] = feature
+        features.flush()
+        del features
+        os.replace(temporary_path, features_path)
+
+        with open(names_path, mode='w', encoding='UTF-8') as file:
+            json.dump(names, file)
+
+        # Caches of previous versions of the processed images are not needed anymore
+        for name in os.listdir(features_dir):
+            if name.startswith(FEATURES_PREFIX) and fingerprint not in name:
+                os.remove(os.path.join(features_dir, name))
+
+    return names, np.load(features_path, mmap_mode='r')
+
+def nearest_neighbours(queries, features, k=None, block_size=None):
+
+    """
+    Finds the `k` most similar training features of each query, in bounded memory.
+
+    The features are scanned in blocks of `block_size` rows: each block is scored against all the
+    queries with one matrix product, and merged into the running top-k with `np.argpartition`.
+    Memory use is O(queries x (block_size + k)) whatever the number of training images.
+
+    Args:
+        queries (np.ndarray): Features of shape (n_queries, features), see `embed_images`.
+        features (np.ndarray): Training features of shape (n, features), possibly memory-mapped.
+        k (int, optional): Number of neighbours. Defaults to `MEMORIZATION.TOP_K`.
+        block_size (int, optional): Rows of `features` scored at a time. Defaults to `MEMORIZATION.BLOCK_SIZE`.
+
+    Returns:
+        tuple: (similarities, indices), both of shape (n_queries, k), most similar first.
+    """
+
+    k = min(k or config.memorization.top_k, len(features))
+    block_size = block_size or config.memorization.block_size
+
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_indices = np.zeros((len(queries), k), dtype=np.int64)
+
+    for start in range(0, len(features), block_size):
+        block = np.asarray(features[start:start + block_size], dtype=np.float32)
+        scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_indices = np.where(top < k, np.take_along_axis(best_indices, np.minimum(top, k - 1), axis=1), start + top - k)
+        best_scores = np.take_along_axis(scores, top, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+
+    return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+def list_generator_checkpoints():
+
+    """
+    Lists the saved generators, from the checkpoint store and the '.keras' files of the models directory.
+
+    Returns:
+        dict: Model name by epoch, e.g. {1440: 'generator_epoch_1440.ckpt'}, the store taking precedence.
+    """
+
+    models = {}
+    for name in os.listdir(config.paths.models_dir):
+        match = re.fullmatch(r'generator_epoch_(\d+)\.keras', name)
+        if match:
+            models[int(match.group(1))] = name
+
+    for name, checkpoint in CheckpointStore().read_index()['checkpoints'].items():
+        if re.fullmatch(r'generator_epoch_\d+', name):
+            models[checkpoint['epoch']] = name + CHECKPOINT_EXTENSION
+
+    return dict(sorted(models.items()))
+
+def memorization_scores(generator, names, features, n_samples=10000, batch_size=None, seed=0):
+
+    """
+    Scores how closely the samples of a generator reproduce training images.
+
+    Samples are generated, embedded and searched batch by batch, and only the similarity of each
+    sample to its nearest training image is kept, so memory does not grow with `n_samples`.
+
+    Args:
+        generator (tf.keras.Model or TFLiteGenerator): The generator.
+        names (list): Names of the training images, see `get_processed_features`.
+        features (np.ndarray): Training features, see `get_processed_features`.
+        n_samples (int): Number of generated samples.
+        batch_size (int, optional): Samples generated and searched at a time. Defaults to `MEMORIZATION.BATCH_SIZE`.
+        seed (int): Seed of the latent vectors, so that checkpoints are compared on the same latents.
+
+    Returns:
+        dict: Statistics of the nearest-neighbour similarity of the samples ('mean', 'p50', 'p99', 'max'),
+            share of samples above `MEMORIZATION.THRESHOLD` ('memorized_rate') and training image
+            closest to any sample ('closest_image').
+    """
+
+    batch_size = batch_size or config.memorization.batch_size
+    rng = np.random.default_rng(seed)
+
+    similarities = np.empty(n_samples, dtype=np.float32)
+    closest_image, closest_similarity = None, -np.inf
+
+    for start in range(0, n_samples, batch_size):
+        noise = rng.standard_normal((min(batch_size, n_samples - start), config.training.latent_dim), dtype=np.float32)
+        queries = embed_images(denormalize(generator(noise, training=False)))
+
+        scores, indices = nearest_neighbours(queries, features, k=1)
+        similarities[start:start + len(noise)] = scores[:, 0]
+
+        best = int(np.argmax(scores[:, 0]))
+        if scores[best, 0] > closest_similarity:
+            closest_image, closest_similarity = names[indices[best, 0]], float(scores[best, 0])
+
+    return {
+        'samples': n_samples,
+        'mean': float(similarities.mean()),
+        'p50': float(np.percentile(similarities, 50)),
+        'p99': float(np.percentile(similarities, 99)),
+        'max': float(similarities.max()),
+        'memorized_rate': float(np.mean(similarities >= config.memorization.threshold)),
+        'closest_image': closest_image
+    }
+
+def check_memorization(epochs=None, n_samples=10000, ema=False, batch_size=None, output=None):
+
+    """
+    Reports, for each saved checkpoint, how closely generated faces reproduce training faces.
+
+    Every checkpoint is scored on the same latent vectors against the cached features of the
+    processed images (see `get_processed_features` and `memorization_scores`). A `memorized_rate`
+    growing with the epochs is a sign that the generator is reproducing the training set.
+
+    Args:
+        epochs (list, optional): Epochs to check. Defaults to all the saved generators.
+        n_samples (int): Number of generated samples per checkpoint.
+        ema (bool): Checks the EMA generators saved with the checkpoints.
+        batch_size (int, optional): Samples generated and searched at a time. Defaults to `MEMORIZATION.BATCH_SIZE`.
+        output (str, optional): CSV file of the report. Defaults to 'memorization_YYYYMMDD_HHMMSS.csv' in the logs directory.
+
+    Returns:
+        list: One dict per checkpoint, with the epoch, the model and its `memorization_scores`.
+
+    Raises:
+        FileNotFoundError: If a requested epoch has no saved generator.
+    """
+
+    models = list_generator_checkpoints()
+    if not models:
+        raise FileNotFoundError(f"Aucun modèle trouvé dans le dossier {config.paths.models_dir}.")
+
+    for epoch in epochs or []:
+        if epoch not in models:
+            raise FileNotFoundError(f"Aucun générateur sauvegardé à l'époque {epoch}.")
+
+    names, features = get_processed_features()
+    output = output or os.path.join(config.paths.logs_dir, f"memorization_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+
+    report = []
+    with open(output, mode='w', encoding='UTF-8') as file:
+        file.write(",".join(REPORT_COLUMNS) + "\n")
+
+        for epoch in sorted(epochs or models):
+            generator = load_generator_model(models[epoch], ema=ema)
+            row = {'epoch': epoch, 'model': models[epoch], **memorization_scores(generator, names, features, n_samples, batch_size)}
+            report.append(row)
+
+            file.write(",".join(f"{row[column]:.4f}" if isinstance(row[column], float) else str(row[column]) for column in REPORT_COLUMNS) + "\n")
+            file.flush()
+            print(f"Époque {epoch} : similarité max {row['max']:.3f}, p99 {row['p99']:.3f}, "
+                  f"{row['memorized_rate']:.2%} au-dessus de {config.memorization.threshold} (image : {row['closest_image']})")
+
+    print(f"Rapport sauvegardé : {output}")
+
+    return report
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Check whether generated faces reproduce training faces.")
+    parser.add_argument("epochs", nargs="*", type=int, help="Epochs to check (default: all saved generators)")
+    parser.add_argument("--samples", type=int, default=10000, help="Generated samples per checkpoint")
+    parser.add_argument("--ema", action="store_true", help="Check the EMA generators")
+    parser.add_argument("--output", default=None, help="CSV report (default: logs/memorization_YYYYMMDD_HHMMSS.csv)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(parser, args)
+
+    check_memorization(args.epochs or None, args.samples, args.ema, output=args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+# Latency buckets in seconds, from sub-millisecond encoding up to slow CPU inference
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+def format_labels(labelnames, labels, extra=""):
+
+    """
+    Formats label values as a Prometheus label set, e.g. '{stage="forward"}'.
+    """
+
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+
+    """
+    Base class of the metrics exposed on the '/metrics' endpoint.
+
+    Label values are passed positionally, in the order of `labelnames`, to keep
+    the cost of an update to a dictionary lookup under a lock.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): Help text of the metric.
+        labelnames (tuple): Names of the metric's labels.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+
+        """
+        Returns the metric's samples as (suffix, label set, value) tuples.
+        """
+
+        with self._lock:
+            return [("", format_labels(self.labelnames, labels), value) for labels, value in self._values.items()]
+
+    def render(self):
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{labels} {value}" for suffix, labels, value in self.samples()]
+
+        return "\n".join(lines)
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+
+        with self._lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._values.items()}
+
+        samples = []
+        for labels, (counts, total, count) in values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append(("_bucket", format_labels(self.labelnames, labels, f'le="{le}"'), cumulative))
+            samples.append(("_sum", format_labels(self.labelnames, labels), total))
+            samples.append(("_count", format_labels(self.labelnames, labels), count))
+
+        return samples
+
+class StageTimer:
+
+    """
+    Records the time elapsed between consecutive laps in a histogram labelled by stage.
+
+    Args:
+        histogram (Histogram): Histogram with a single 'stage' label.
+    """
+
+    def __init__(self, histogram):
+
+        self._histogram = histogram
+        self._last = perf_counter()
+
+    def lap(self, stage):
+        now = perf_counter()
+        self._histogram.observe(now - self._last, stage)
+        self._last = now
+
+def generate_latest():
+
+    """
+    Renders every registered metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics page.
+    """
+
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+REQUESTS = Counter("gan_http_requests_total", "HTTP requests handled by the API.", ("endpoint", "status"))
+REQUEST_DURATION = Histogram("gan_http_request_duration_seconds", "Time spent handling HTTP requests.", ("endpoint",))
+IN_FLIGHT = Gauge("gan_http_requests_in_flight", "HTTP requests currently being handled.")
+STAGE_DURATION = Histogram("gan_image_stage_duration_seconds", "Time spent in each stage of image generation.", ("stage",))
+MODEL_INFO = Gauge("gan_model_info", "Generator model served by default.", ("model",))
+RESIDENT_MODELS = Gauge("gan_resident_models", "Generator models held in memory.")
+PROCESS_RSS = Gauge("process_resident_memory_bytes", "Resident memory size of the serving process in bytes.")
@@ -0,0 +1,269 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+from gan_config import config
+from .generate_image import get_latest_generator_model, get_ema_model_name, load_generator_model, model_exists
+
+MODEL_PATTERN = re.compile(r'generator_epoch_\d+(_\w+)?\.(keras|tflite|ckpt)')
+
+def warm_up(generator):
+
+    """
+    Runs one forward pass so the first request does not pay for graph tracing and allocations.
+
+    Args:
+        generator (tf.keras.Model or TFLiteGenerator): The generator model to warm up.
+
+    Returns:
+        tf.keras.Model or TFLiteGenerator: The same generator model.
+    """
+
+    generator(np.random.normal(size=(1, config.training.latent_dim)).astype("float32"), training=False)
+
+    return generator
+
+def get_latest_served_model():
+
+    """
+    Returns the name of the model to serve from the latest checkpoint: its EMA generator
+    when one was saved and `USE_EMA` is enabled, the raw generator otherwise.
+
+    Returns:
+        str: Name of the model file.
+    """
+
+    latest = os.path.basename(get_latest_generator_model())
+    ema = get_ema_model_name(latest)
+
+    if config.serving.use_ema and model_exists(os.path.join(config.paths.models_dir, ema)):
+        return ema
+
+    return latest
+
+class ModelRegistry:
+
+    """
+    Keeps a bounded set of generator models in memory and swaps the default one at runtime.
+
+    Models are identified by their file name in the models directory
+    (e.g. 'generator_epoch_1440.keras'). With `SERVING.ACCEPTANCE_RATE`, each generator is served
+    with its discriminator as a `RejectionSampler`. At most `max_resident` models are kept,
+    the least recently used one being evicted first; the default model is never evicted.
+    New models are loaded and warmed up before being published, so requests keep being
+    served by the previous model until the swap.
+
+    Args:
+        model_api (str): Name of the model file to serve by default. If empty, the latest model
+            is served and the registry follows new checkpoints on `refresh`.
+        max_resident (int, optional): Maximum number of models kept in memory. Defaults to the configuration.
+    """
+
+    def __init__(self, model_api="", max_resident=None):
+
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._default = None
+
+        self.max_resident = max(1, max_resident or config.serving.max_resident_models)
+        self.pinned = bool(model_api)
+
+        default = model_api or get_latest_served_model()
+        self._load(default)
+        self._default = default
+
+    @property
+    def default(self):
+        return self._default
+
+    def resident(self):
+
+        """
+        Returns the names of the models currently held in memory, least recently used first.
+        """
+
+        with self._lock:
+            return list(self._models)
+
+    def validate(self, name):
+
+        """
+        Checks that a model name refers to a generator file of the models directory.
+
+        Raises:
+            ValueError: If the name does not match 'generator_epoch_XXXX.keras', a checkpoint of the store
+                ('.ckpt') or an exported '.tflite' model.
+        """
+
+        if not MODEL_PATTERN.fullmatch(name):
+            raise ValueError(f"Nom de modèle invalide : {name}")
+
+    def get(self, name=None):
+
+        """
+        Returns a generator model, loading it first if it is not resident.
+
+        Args:
+            name (str, optional): Name of the model file. Defaults to the current default model.
+
+        Returns:
+            tuple: (model name, tf.keras.Model)
+
+        Raises:
+            ValueError: If the model name is invalid.
+            FileNotFoundError: If the model file does not exist.
+        """
+
+        name = name or self._default
+
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return name, self._models[name]
+
+        return name, self._load(name)
+
+    def activate(self, name):
+
+        """
+        Loads and warms up a model, then makes it the default one.
+
+        Args:
+            name (str): Name of the model file.
+        """
+
+        self._load(name)
+        with self._lock:
+            self._default = name
+            self._evict()
+        print(f"Modèle servi par défaut : {name}")
+
+    def refresh(self):
+
+        """
+        Activates the latest generator of the models directory if it is newer than the default one.
+
+        Does nothing while the default model is pinned, at creation or by an explicit reload.
+
+        Returns:
+            str: Name of the default model after the refresh.
+        """
+
+        if not self.pinned:
+            latest = get_latest_served_model()
+            if latest != self._default:
+                self._load(latest)
+                # A model may have been pinned while the latest one was loading
+                with self._lock:
+                    if not self.pinned:
+                        self._default = latest
+                        self._evict()
+                        print(f"Modèle servi par défaut : {latest}")
+
+        return self._default
+
+    def reload_async(self, name=None):
+
+        """
+        Activates a model (or the latest one) in a background thread.
+
+        Args:
+            name (str, optional): Name of the model file, which stays the default model until the next
+                reload. If None, the latest model is activated and the registry stops being pinned,
+                following new checkpoints again.
+
+        Returns:
+            threading.Thread: The started loading thread.
+        """
+
+        if name:
+            self.validate(name)
+
+        thread = threading.Thread(target=self._reload, args=(name,), daemon=True)
+        thread.start()
+
+        return thread
+
+    def watch(self, interval=None):
+
+        """
+        Starts a background thread polling the models directory for new checkpoints.
+
+        Args:
+            interval (float, optional): Polling interval in seconds. Defaults to the configuration.
+        """
+
+        interval = interval or config.serving.model_watch_interval
+        if self.pinned or not interval or self._watcher is not None:
+            return
+
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+
+        """
+        Stops the background watcher, if any.
+        """
+
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _reload(self, name):
+
+        pinned = self.pinned
+
+        try:
+            if name:
+                # Pinned before loading, so that the watcher does not switch back to the latest model
+                self.pinned = True
+                self.activate(name)
+            else:
+                self.pinned = False
+                self.refresh()
+                # A registry created pinned has not started its watcher
+                self.watch()
+        except Exception as e:
+            self.pinned = pinned
+            print(f"Échec du rechargement du modèle : {str(e)}")
+
+    def _watch(self, interval):
+
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Échec du rechargement du modèle : {str(e)}")
+
+    def _load(self, name):
+
+        self.validate(name)
+
+        # Loads are serialized, but requests on resident models are never blocked by them
+        with self._load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    return self._models[name]
+
+            generator = warm_up(load_generator_model(name, acceptance_rate=config.serving.acceptance_rate))
+
+            with self._lock:
+                self._models[name] = generator
+                self._evict(keep=name)
+
+        return generator
+
+    def _evict(self, keep=None):
+
+        while len(self._models) > self.max_resident:
+            candidates = [name for name in self._models if name not in (keep, self._default)]
+            if not candidates:
+                break
+            del self._models[candidates[0]]
@@ -1,7 +1,19 @@
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from .config import *
+import sqlite3
+from contextlib import closing
+from gan_config import config
+from .log_tail import RunMonitor
+
+def list_log_files():
+
+    """
+    Returns the names of the log files in the logs directory, oldest first.
+
+    Returns:
+        list: Names of the files matching 'log_YYYYMMDD_HHMMSS.csv', sorted chronologically.
+    """
+
+    return sorted(f for f in os.listdir(config.paths.logs_dir) if f.startswith('log_') and f.endswith('.csv'))
 
 def get_latest_log_file():
 
@@ -18,17 +30,40 @@ def get_latest_log_file():
         ValueError: If no log files matching the pattern are found.
     """
 
-    log_files = [f for f in os.listdir(logs_dir) if f.startswith('log_') and f.endswith('.csv')]
+    log_files = list_log_files()
     
     if not log_files:
         raise ValueError("Aucun fichier au format 'log_YYYYMMDD_HHMMSS.csv' trouvé dans le dossier spécifié.")
 
-    log_files.sort()
-
     latest_file = log_files[-1]
 
     return latest_file
 
+def get_log_file_path(log_file=None):
+
+    """
+    Returns the path of a log file, or of the latest one.
+
+    Args:
+        log_file (str, optional): Name of the log file. Defaults to the latest log file.
+
+    Returns:
+        str: Path to the log file.
+
+    Raises:
+        FileNotFoundError: If the specified log file does not exist or is not a CSV file.
+    """
+
+    if log_file:
+        logs_file_dir = os.path.join(config.paths.logs_dir, log_file) 
+        if not os.path.isfile(logs_file_dir) or not log_file.endswith('.csv'):
+            raise FileNotFoundError(f"Le fichier de logs '{logs_file_dir}' n'existe pas ou n'est pas au bon format.")
+
+    else:
+        logs_file_dir = os.path.join(config.paths.logs_dir, get_latest_log_file()) 
+
+    return logs_file_dir
+
 def monitoring(log_file=None):
 
     """
@@ -47,35 +82,248 @@ def monitoring(log_file=None):
         FileNotFoundError: If the specified log file does not exist or is not a CSV file.
     """
 
-    if log_file:
-        logs_file_dir = os.path.join(logs_dir, log_file) 
-        if not os.path.isfile(logs_file_dir) or not log_file.endswith('.csv'):
-            raise FileNotFoundError(f"Le fichier de logs '{logs_file_dir}' n'existe pas ou n'est pas au bon format.")
-
-    else:
-        logs_file_dir = os.path.join(logs_dir, get_latest_log_file()) 
+    # pandas and matplotlib are only needed once a log is plotted
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MaxNLocator
 
-    df = pd.read_csv(logs_file_dir)
+    df = pd.read_csv(get_log_file_path(log_file))
     
     df['Epoch'] = df['Epoch'].astype(int)
 
-    plt.plot(df['Epoch'], df['Gen_Loss_Avg'], label='Gen Loss Avg', marker='o')
-    plt.plot(df['Epoch'], df['Disc_Loss_Avg'], label='Disc Loss Avg', marker='o')
+    # Markers and one tick per epoch only stay readable on short runs
+    marker = 'o' if len(df) <= 50 else None
+
+    plt.plot(df['Epoch'], df['Gen_Loss_Avg'], label='Gen Loss Avg', marker=marker)
+    plt.plot(df['Epoch'], df['Disc_Loss_Avg'], label='Disc Loss Avg', marker=marker)
     plt.xlabel('Epoch')
     plt.ylabel('Loss')
     plt.title('Losses')
-    plt.xticks(df['Epoch'])  
+    plt.gca().xaxis.set_major_locator(MaxNLocator(integer=True))
     plt.legend()
     plt.grid(True)
     plt.show()
 
-    plt.plot(df['Epoch'], df['Epoch_Duration'], label='Epoch Duration', color='orange', marker='o')
+    plt.plot(df['Epoch'], df['Epoch_Duration'], label='Epoch Duration', color='orange', marker=marker)
     plt.xlabel('Epoch')
     plt.ylabel('Duration (seconds)')
     plt.title('Epoch Duration')
-    plt.xticks(df['Epoch']) 
+    plt.gca().xaxis.set_major_locator(MaxNLocator(integer=True))
     plt.grid(True)
     plt.show()
     
     stats = df[['Epoch_Duration', 'Gen_Loss_Avg', 'Disc_Loss_Avg']].describe().loc[['mean', 'std', 'min', 'max']]
     print("\nStats:\n", stats)
+
+def plot_decimated(ax, series, label, color=None):
+
+    """
+    Plots the moving average of a decimated series with its min/max band.
+    """
+
+    columns = series.columns()
+    line, = ax.plot(columns['Epoch'], columns['EMA'], label=label, color=color)
+    ax.fill_between(columns['Epoch'], columns['Min'], columns['Max'], color=line.get_color(), alpha=0.2, linewidth=0)
+
+def follow_monitoring(log_file=None, interval=5, max_points=500, alpha=0.05):
+
+    """
+    Follows a training log while it is being written and refreshes the plots.
+
+    Only the epochs appended since the last refresh are read, and each metric is kept as 
+    at most `max_points` windows (moving average and min/max band), so a refresh costs 
+    the same on the first epochs and on very long runs. Needs an interactive matplotlib 
+    backend (e.g. `%matplotlib widget` in a notebook). Stops on KeyboardInterrupt.
+
+    Args:
+        log_file (str, optional): Name of the log file to follow. Defaults to the latest log file.
+        interval (float): Refresh interval in seconds. Default is 5.
+        max_points (int): Maximum number of points plotted per metric. Default is 500.
+        alpha (float): Smoothing factor of the moving averages. Default is 0.05.
+
+    Returns:
+        RunMonitor: The statistics gathered when following stopped.
+    """
+
+    import matplotlib.pyplot as plt
+
+    run = RunMonitor(get_log_file_path(log_file), max_points, alpha)
+    fig, (ax_loss, ax_duration) = plt.subplots(2, 1, sharex=True, figsize=(8, 7))
+    plt.ion()
+
+    try:
+        while True:
+            if run.update():
+                ax_loss.clear()
+                plot_decimated(ax_loss, run.series['Gen_Loss_Avg'], 'Gen Loss Avg')
+                plot_decimated(ax_loss, run.series['Disc_Loss_Avg'], 'Disc Loss Avg')
+                ax_loss.set_ylabel('Loss')
+                ax_loss.set_title(f'Losses (epoch {run.last_epoch})')
+                ax_loss.legend()
+                ax_loss.grid(True)
+
+                ax_duration.clear()
+                plot_decimated(ax_duration, run.series['Epoch_Duration'], 'Epoch Duration', color='orange')
+                ax_duration.set_xlabel('Epoch')
+                ax_duration.set_ylabel('Duration (seconds)')
+                ax_duration.grid(True)
+
+                fig.canvas.draw_idle()
+
+            plt.pause(interval)
+    except KeyboardInterrupt:
+        pass
+
+    return run
+
+def compare_runs(log_files=None, last=5, max_points=500, alpha=0.05):
+
+    """
+    Compares the losses and epoch durations of several training runs.
+
+    Each log is streamed once into decimated statistics, so only `max_points` windows 
+    per run and metric are held in memory whatever the length of the runs.
+
+    Args:
+        log_files (list, optional): Names of the log files to compare. Defaults to the `last` most recent logs.
+        last (int): Number of recent logs compared when `log_files` is not given. Default is 5.
+        max_points (int): Maximum number of points plotted per run and metric. Default is 500.
+        alpha (float): Smoothing factor of the moving averages. Default is 0.05.
+
+    Returns:
+        dict: RunMonitor of each run, by log file name.
+    """
+
+    import matplotlib.pyplot as plt
+
+    log_files = log_files or list_log_files()[-last:]
+    runs = {}
+
+    for log_file in log_files:
+        runs[log_file] = RunMonitor(get_log_file_path(log_file), max_points, alpha)
+        runs[log_file].update()
+
+    fig, axes = plt.subplots(3, 1, sharex=True, figsize=(8, 10))
+    titles = {'Gen_Loss_Avg': 'Generator Loss', 'Disc_Loss_Avg': 'Discriminator Loss', 'Epoch_Duration': 'Epoch Duration (seconds)'}
+
+    for ax, (metric, title) in zip(axes, titles.items()):
+        for log_file, run in runs.items():
+            plot_decimated(ax, run.series[metric], log_file[4:-4])
+        ax.set_title(title)
+        ax.grid(True)
+
+    axes[0].legend()
+    axes[-1].set_xlabel('Epoch')
+    plt.show()
+
+    print(f"{'Run':<20}{'Epochs':>8}{'Gen Loss':>10}{'Disc Loss':>11}{'Duration':>10}")
+    for log_file, run in runs.items():
+        print(f"{log_file[4:-4]:<20}{run.epochs:>8}{run.series['Gen_Loss_Avg'].ema or 0:>10.4f}"
+              f"{run.series['Disc_Loss_Avg'].ema or 0:>11.4f}{run.series['Epoch_Duration'].ema or 0:>10.2f}")
+
+    return runs
+
+def get_step_log_file(log_file=None):
+
+    """
+    Returns the path of the per-step SQLite log paired with a CSV log file.
+
+    Args:
+        log_file (str, optional): Name of the CSV log file. Defaults to the latest log file.
+
+    Returns:
+        str: Path to the SQLite log file.
+
+    Raises:
+        FileNotFoundError: If the run has no per-step log.
+    """
+
+    log_file = log_file or get_latest_log_file()
+    step_log_file_dir = os.path.join(config.paths.logs_dir, os.path.splitext(log_file)[0] + ".sqlite")
+
+    if not os.path.isfile(step_log_file_dir):
+        raise FileNotFoundError(f"Le fichier de logs par étape '{step_log_file_dir}' n'existe pas.")
+
+    return step_log_file_dir
+
+def load_step_metrics(log_file=None, max_points=2000):
+
+    """
+    Loads the per-step metrics of a run, averaged over consecutive steps.
+
+    Aggregation runs in SQLite, so only `max_points` rows are loaded whatever the length 
+    of the run. The database can be read while training is still writing to it.
+
+    Args:
+        log_file (str, optional): Name of the CSV log file of the run. Defaults to the latest log file.
+        max_points (int): Maximum number of rows returned. Default is 2000.
+
+    Returns:
+        pd.DataFrame: One row per group of steps with the first global step, epoch, mean losses, 
+            fraction of steps training the generator and the discriminator, mean step time and throughput.
+    """
+
+    import pandas as pd
+
+    with closing(sqlite3.connect(get_step_log_file(log_file))) as connection:
+        count = connection.execute("SELECT COUNT(*) FROM steps").fetchone()[0]
+        bucket = max(1, -(-count // max_points))
+
+        df = pd.read_sql_query(
+            "SELECT MIN(rowid) AS Step, MIN(epoch) AS Epoch, "
+            "AVG(gen_loss) AS Gen_Loss, AVG(disc_loss) AS Disc_Loss, "
+            "AVG(gen_step) AS Gen_Step_Rate, AVG(disc_step) AS Disc_Step_Rate, "
+            "AVG(step_time) AS Step_Time, AVG(images_per_s) AS Images_Per_S "
+            "FROM steps GROUP BY (rowid - 1) / ? ORDER BY Step",
+            connection, params=(bucket,)
+        )
+
+    return df
+
+def step_monitoring(log_file=None, max_points=2000):
+
+    """
+    Visualizes per-step training metrics and prints summary statistics.
+
+    Plots generator and discriminator loss, the fraction of steps training each model 
+    and the throughput over training steps.
+
+    Args:
+        log_file (str, optional): Name of the CSV log file of the run. Defaults to the latest log file.
+        max_points (int): Maximum number of points plotted per curve. Default is 2000.
+
+    Returns:
+        None
+    """
+
+    import matplotlib.pyplot as plt
+
+    df = load_step_metrics(log_file, max_points)
+
+    plt.plot(df['Step'], df['Gen_Loss'], label='Gen Loss')
+    plt.plot(df['Step'], df['Disc_Loss'], label='Disc Loss')
+    plt.xlabel('Step')
+    plt.ylabel('Loss')
+    plt.title('Losses per Step')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+    plt.plot(df['Step'], df['Gen_Step_Rate'], label='Generator trained')
+    plt.plot(df['Step'], df['Disc_Step_Rate'], label='Discriminator trained')
+    plt.xlabel('Step')
+    plt.ylabel('Fraction of steps')
+    plt.title('Training Decisions')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+    plt.plot(df['Step'], df['Images_Per_S'], label='Images/s', color='orange')
+    plt.xlabel('Step')
+    plt.ylabel('Images per second')
+    plt.title('Throughput')
+    plt.grid(True)
+    plt.show()
+
+    stats = df[['Step_Time', 'Images_Per_S', 'Gen_Loss', 'Disc_Loss']].describe().loc[['mean', 'std', 'min', 'max']]
+    print("\nStats:\n", stats)
\ No newline at end of file
@@ -0,0 +1,79 @@
+import os
+from gan_config import config
+
+def split_cores(preprocess_jobs=None):
+
+    """
+    Shares the CPU cores between preprocessing and training.
+
+    Args:
+        preprocess_jobs (int, optional): Number of preprocessing workers. Defaults to `PIPELINE.PREPROCESS_JOBS`,
+            or half of the cores if it is null.
+
+    Returns:
+        tuple: (number of preprocessing workers, number of TensorFlow intra-op threads for training)
+    """
+
+    cpus = os.cpu_count() or 1
+    preprocess_jobs = preprocess_jobs or config.pipeline.preprocess_jobs or max(1, cpus // 2)
+
+    return preprocess_jobs, max(1, cpus - preprocess_jobs)
+
+def run_pipeline(epochs, batch_size=None, n_image=500, preprocess_jobs=None, min_pool_size=None, **train_kwargs):
+
+    """
+    Downloads, selects and processes the images while training the GAN on those already processed.
+
+    Preprocessing runs in the background and publishes each image as soon as it is processed.
+    Training starts once `min_pool_size` images are available, and each epoch uses all the images
+    processed so far. The cores are split between both stages: preprocessing workers (whose
+    background removal is limited to one thread each by joblib) and TensorFlow's intra-op threads.
+    Once preprocessing has finished, training keeps its threads, so give preprocessing more workers
+    for large datasets and short trainings.
+
+    Must be called before TensorFlow runs any operation in the process, for the thread settings to
+    be applied. With `autotune=True`, the tuned thread settings are used instead, calibrated before
+    preprocessing starts on the first run: the input pipeline threads are then only calibrated if
+    images were processed by an earlier run.
+
+    Args:
+        epochs (int): Total number of epochs to train.
+        batch_size (int or None): Number of samples per batch. May only be None with `autotune`.
+        n_image (int): Number of CelebA images to process.
+        preprocess_jobs (int, optional): Number of preprocessing workers, see `split_cores`.
+        min_pool_size (int, optional): Number of processed images to wait for before training.
+            Defaults to `PIPELINE.MIN_POOL_SIZE`.
+        **train_kwargs: Other arguments of `train_gan` (resume_epoch, progressive...).
+
+    Raises:
+        RuntimeError: If preprocessing failed.
+    """
+
+    from infrastructure.data_loader import BackgroundPreprocessing
+    from domain.data_loader import GrowingDataset
+    from domain.gan_autotune import apply_thread_settings, get_tuned_settings
+    from domain.gan_training import train_gan
+
+    preprocess_jobs, training_threads = split_cores(preprocess_jobs)
+
+    if train_kwargs.get('autotune'):
+        # Calibrated before preprocessing starts, so the probes do not compete with its workers.
+        # `train_gan` then reads the stored settings.
+        get_tuned_settings()
+    else:
+        print(f"Preprocessing with {preprocess_jobs} workers, training with {training_threads} threads.")
+        if not apply_thread_settings(training_threads, 1):
+            print("TensorFlow already ran in this process, restart it to apply the training thread settings.")
+
+    preprocessing = BackgroundPreprocessing(n_image, preprocess_jobs).start()
+    dataset_pool = GrowingDataset(
+        min_pool_size or config.pipeline.min_pool_size,
+        preprocessing.is_done,
+        config.pipeline.poll_interval
+    )
+
+    train_gan(epochs, batch_size, dataset_pool=dataset_pool, **train_kwargs)
+
+    if not preprocessing.is_done():
+        print("Training completed, waiting for the end of preprocessing...")
+    preprocessing.join()
@@ -0,0 +1,421 @@
+import os
+import sys
+import json
+import math
+import queue
+import argparse
+import itertools
+import subprocess
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from gan_config import config, load_config, add_config_arguments, configure_from_args, parse_value, CONFIG_ENV, OVERRIDE_PREFIX
+
+# Grid key of the batch size, which is an argument of `train_gan` and not a configuration value
+BATCH_SIZE_KEY = "BATCH_SIZE"
+
+# Prefix of the lines of a trial's output holding its metrics, one JSON object per epoch
+METRICS_PREFIX = "SWEEP_METRICS "
+
+DIVERSITY_SAMPLES = 64
+
+def expand_grid(grid):
+
+    """
+    Expands a grid of values into the list of all their combinations.
+
+    Args:
+        grid (dict): Values to try by dotted configuration key, e.g. {'TRAINING.LATENT_DIM': [64, 100], 'BATCH_SIZE': [16, 32]}.
+
+    Returns:
+        list: One dict of values per trial.
+    """
+
+    keys = list(grid)
+
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def split_cpus(n_trials, max_parallel=None, threads_per_trial=None):
+
+    """
+    Splits the CPUs available to the process into disjoint sets, one per trial running at the same time.
+
+    Args:
+        n_trials (int): Number of trials of the sweep.
+        max_parallel (int, optional): Maximum number of trials running at the same time. Defaults to
+            `SWEEP.MAX_PARALLEL`, or as many as there are CPUs for if it is null.
+        threads_per_trial (int, optional): CPUs of each trial. Defaults to `SWEEP.THREADS_PER_TRIAL`.
+
+    Returns:
+        list: The CPU ids of each slot.
+    """
+
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    threads_per_trial = min(threads_per_trial or config.sweep.threads_per_trial or 1, len(cpus))
+
+    n_slots = max(1, min(len(cpus) // threads_per_trial, max_parallel or config.sweep.max_parallel or len(cpus), n_trials))
+
+    return [cpus[i * threads_per_trial:(i + 1) * threads_per_trial] for i in range(n_slots)]
+
+def sample_diversity(generator, noise):
+
+    """
+    Returns the mean standard deviation of each pixel over the images generated from `noise`.
+
+    It falls towards 0 when the generator collapses to a few outputs, whatever their quality.
+    """
+
+    images = np.asarray(generator(noise, training=False))
+
+    return float(images.std(axis=0).mean())
+
+class EarlyStopping:
+
+    """
+    Decides from the metrics of each epoch whether a trial should be stopped.
+
+    A trial is stopped as soon as a loss is not finite, or when, for `patience` epochs in a row:
+    - the discriminator loss is below `min_discriminator_loss` (the discriminator has won and the
+      generator gets no useful gradient) or a loss is above `max_loss` (diverged),
+    - after `warmup_epochs` epochs, during which a freshly initialized generator has little diversity:
+      the diversity of the samples is below `min_diversity` (mode collapse),
+      or both losses changed by less than `stall_tolerance` (relative) since the previous epoch (stalled).
+
+    Thresholds default to the `SWEEP` section of the configuration; null disables a rule.
+    """
+
+    def __init__(self, patience=None, warmup_epochs=None, min_discriminator_loss=None, max_loss=None,
+                 min_diversity=None, stall_tolerance=None):
+
+        sweep = config.sweep
+        self.patience = patience or sweep.patience
+        self.warmup_epochs = sweep.warmup_epochs if warmup_epochs is None else warmup_epochs
+        self.min_discriminator_loss = sweep.min_discriminator_loss if min_discriminator_loss is None else min_discriminator_loss
+        self.max_loss = sweep.max_loss if max_loss is None else max_loss
+        self.min_diversity = sweep.min_diversity if min_diversity is None else min_diversity
+        self.stall_tolerance = sweep.stall_tolerance if stall_tolerance is None else stall_tolerance
+
+        self.counts = {'diverged': 0, 'collapsed': 0, 'stalled': 0}
+        self.previous = None
+
+    def check(self, metrics):
+
+        """
+        Records the metrics of an epoch.
+
+        Args:
+            metrics (dict): 'epoch', 'generator_loss', 'discriminator_loss' and 'diversity' of the epoch.
+
+        Returns:
+            str or None: The reason to stop the trial, or None to let it continue.
+        """
+
+        losses = (metrics['generator_loss'], metrics['discriminator_loss'])
+        if not all(math.isfinite(loss) for loss in losses):
+            return "non-finite loss"
+
+        warm = metrics['epoch'] > self.warmup_epochs
+        conditions = {
+            'diverged': (self.min_discriminator_loss is not None and losses[1] < self.min_discriminator_loss)
+                        or (self.max_loss is not None and max(losses) > self.max_loss),
+            'collapsed': warm and self.min_diversity is not None and metrics['diversity'] < self.min_diversity,
+            'stalled': warm and self.stall_tolerance is not None and self.previous is not None and all(
+                abs(loss - previous) <= self.stall_tolerance * max(abs(previous), 1e-8)
+                for loss, previous in zip(losses, self.previous)
+            )
+        }
+        self.previous = losses
+
+        for name, condition in conditions.items():
+            self.counts[name] = self.counts[name] + 1 if condition else 0
+            if self.counts[name] >= self.patience:
+                return f"{name} for {self.counts[name]} epochs"
+
+        return None
+
+def run_trial(epochs, batch_size, cache_path, cpus):
+
+    """
+    Trains one trial, in the process started for it by `run_sweep`.
+
+    The configuration of the trial is read from the environment set by `run_sweep`. The process is
+    pinned to its CPUs (on Linux) with as many TensorFlow intra-op threads, trains on the shared
+    image cache, and prints the metrics of each epoch on a line starting with `METRICS_PREFIX`.
+    """
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    from domain.gan_autotune import apply_thread_settings
+    apply_thread_settings(len(cpus), 1)
+
+    from domain.data_loader import CachedDataset
+    from domain.gan_training import train_gan
+
+    # The same latent vectors at each epoch, so that the diversity of the epochs can be compared
+    noise = np.random.default_rng(0).standard_normal((DIVERSITY_SAMPLES, config.training.latent_dim), dtype=np.float32)
+
+    def report(epoch, loss_avg, models):
+        metrics = {
+            'epoch': epoch + 1,
+            'generator_loss': float(loss_avg['generator']),
+            'discriminator_loss': float(loss_avg['discriminator']),
+            'diversity': sample_diversity(models['generator'], noise)
+        }
+        print(METRICS_PREFIX + json.dumps(metrics), flush=True)
+
+    train_gan(epochs, batch_size, dataset_pool=CachedDataset(cache_path), epoch_callback=report)
+
+class Sweep:
+
+    """
+    Trains a set of trials in parallel processes and stops those going wrong, see `run_sweep`.
+    """
+
+    def __init__(self, sweep_dir, trials, epochs, cache_path, early_stopping):
+
+        self.sweep_dir = sweep_dir
+        self.trials = trials
+        self.epochs = epochs
+        self.cache_path = cache_path
+        self.early_stopping = early_stopping
+        self._lock = threading.Lock()
+        self._metrics_path = os.path.join(sweep_dir, "metrics.jsonl")
+        self._processes = set()
+        self._stopped = False
+
+    def run(self, slots):
+
+        """
+        Runs the trials on the CPU slots, each slot running one trial at a time.
+
+        If the sweep is interrupted (e.g. KeyboardInterrupt) or a trial raises, the trials not started
+        are cancelled and the running ones killed.
+
+        Returns:
+            list: Summary of each trial, see `run_one`.
+        """
+
+        cpu_sets = queue.Queue()
+        for cpus in slots:
+            cpu_sets.put(cpus)
+
+        def run_with_slot(trial_id):
+            cpus = cpu_sets.get()
+            try:
+                return self.run_one(trial_id, cpus)
+            finally:
+                cpu_sets.put(cpus)
+
+        executor = ThreadPoolExecutor(max_workers=len(slots), thread_name_prefix="sweep")
+        try:
+            return list(executor.map(run_with_slot, range(len(self.trials))))
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.kill()
+            raise
+        finally:
+            executor.shutdown()
+
+    def kill(self):
+
+        """
+        Kills the processes of the running trials, and those started from now on.
+        """
+
+        with self._lock:
+            self._stopped = True
+            for process in self._processes:
+                if process.poll() is None:
+                    process.kill()
+
+    def run_one(self, trial_id, cpus):
+
+        """
+        Runs a trial in a new process, streaming its metrics and killing it if `EarlyStopping` says so.
+
+        Returns:
+            dict: Summary of the trial.
+        """
+
+        values = dict(self.trials[trial_id])
+        batch_size = values.pop(BATCH_SIZE_KEY)
+        trial_dir = os.path.join(self.sweep_dir, f"trial_{trial_id:03d}")
+
+        overrides = {
+            **values,
+            'PATHS.MODELS_DIR': os.path.join(trial_dir, "models"),
+            'PATHS.IMAGES_DIR': os.path.join(trial_dir, "images"),
+            'PATHS.LOGS': os.path.join(trial_dir, "logs")
+        }
+        env = dict(os.environ, **{CONFIG_ENV: config.path, "PYTHONUNBUFFERED": "1"})
+        env.update({OVERRIDE_PREFIX + key.upper().replace('.', '__'): json.dumps(value) for key, value in overrides.items()})
+
+        command = [sys.executable, "-m", "application.sweep", "--trial",
+                   json.dumps({'epochs': self.epochs, 'batch_size': batch_size, 'cache_path': self.cache_path, 'cpus': cpus})]
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        summary = {'trial': trial_id, 'values': self.trials[trial_id], 'cpus': cpus, 'status': 'completed',
+                   'reason': None, 'epochs': 0, 'last_metrics': None}
+        early_stopping = self.early_stopping()
+        with self._lock:
+            print(f"[essai {trial_id:03d}] démarré sur les CPU {cpus} : {self.trials[trial_id]}", flush=True)
+
+        os.makedirs(trial_dir, exist_ok=True)
+        with open(os.path.join(trial_dir, "output.log"), mode='w', encoding='UTF-8') as output:
+            process = subprocess.Popen(command, cwd=project_dir, env=env, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, text=True, encoding='UTF-8')
+            with self._lock:
+                self._processes.add(process)
+                if self._stopped:
+                    process.kill()
+
+            try:
+                for line in process.stdout:
+                    output.write(line)
+                    if not line.startswith(METRICS_PREFIX):
+                        continue
+
+                    metrics = json.loads(line[len(METRICS_PREFIX):])
+                    summary['epochs'], summary['last_metrics'] = metrics['epoch'], metrics
+                    self.record(trial_id, metrics)
+
+                    reason = early_stopping.check(metrics)
+                    if reason is not None:
+                        summary['status'], summary['reason'] = 'stopped', reason
+                        print(f"[essai {trial_id:03d}] arrêté à l'époque {metrics['epoch']} : {reason}")
+                        break
+            finally:
+                # Also when reading the output fails, so that no trial outlives the sweep
+                if process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                returncode = process.wait()
+                with self._lock:
+                    self._processes.discard(process)
+
+        if summary['status'] == 'completed' and returncode != 0:
+            summary['status'], summary['reason'] = 'failed', f"exit code {returncode}, see {output.name}"
+            print(f"[essai {trial_id:03d}] échoué : {summary['reason']}")
+
+        return summary
+
+    def record(self, trial_id, metrics):
+
+        """
+        Appends the metrics of an epoch of a trial to 'metrics.jsonl' and prints them.
+        """
+
+        with self._lock:
+            with open(self._metrics_path, mode='a', encoding='UTF-8') as file:
+                file.write(json.dumps({'trial': trial_id, **metrics}) + "\n")
+            print(f"[essai {trial_id:03d}] époque {metrics['epoch']} : G {metrics['generator_loss']:.4g}, "
+                  f"D {metrics['discriminator_loss']:.4g}, diversité {metrics['diversity']:.4f}", flush=True)
+
+def run_sweep(grid=None, trials=None, epochs=10, batch_size=32, max_parallel=None, threads_per_trial=None, early_stopping=None):
+
+    """
+    Trains the GAN for several sets of hyperparameters in parallel, stopping the trials going wrong early.
+
+    Each trial runs `train_gan` in its own process, with its configuration overrides passed through
+    the environment and its own models, images and logs directories. The processes are pinned to
+    disjoint sets of CPUs with as many TensorFlow threads. The processed images are decoded once into
+    a memory-mapped cache shared by all trials (see `CachedDataset`).
+
+    The metrics of each epoch (losses and diversity of the samples) are streamed to 'metrics.jsonl'
+    as they come, and a trial is killed as soon as `EarlyStopping` finds it diverged, collapsed or stalled.
+
+    Args:
+        grid (dict, optional): Values to try by dotted configuration key (see `expand_grid`), all combinations being tried.
+            'BATCH_SIZE' sets the batch size of `train_gan`.
+        trials (list, optional): Explicit list of trials, as dicts of values, instead of or in addition to `grid`.
+        epochs (int): Number of epochs of each trial.
+        batch_size (int): Batch size of the trials not setting 'BATCH_SIZE'.
+        max_parallel (int, optional): Maximum number of trials running at the same time, see `split_cpus`.
+        threads_per_trial (int, optional): CPUs of each trial, see `split_cpus`.
+        early_stopping (callable, optional): Creates the `EarlyStopping` of a trial. Defaults to `EarlyStopping`.
+
+    Returns:
+        list: Summary of each trial: values, status ('completed', 'stopped' or 'failed'), reason, epochs and last metrics.
+
+    Raises:
+        KeyError: If a key of a trial is not in the configuration file.
+        ValueError: If there are no trials, or the processed data directory has no images.
+    """
+
+    from domain.data_loader import build_image_cache
+
+    trials = [{BATCH_SIZE_KEY: batch_size, **{key.upper(): value for key, value in trial.items()}}
+              for trial in (expand_grid(grid) if grid else []) + list(trials or [])]
+    if not trials:
+        raise ValueError("The sweep has no trials.")
+
+    # Invalid keys fail now rather than in every trial
+    for trial in trials:
+        load_config(config.path, {key: value for key, value in trial.items() if key != BATCH_SIZE_KEY})
+
+    sweep_dir = os.path.join(config.paths.sweeps_dir, f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(sweep_dir)
+
+    cache_path = os.path.join(sweep_dir, "images.npy")
+
+    # The cache is only needed while the trials run
+    try:
+        build_image_cache(cache_path)
+
+        slots = split_cpus(len(trials), max_parallel, threads_per_trial)
+        print(f"{len(trials)} essais, {len(slots)} en parallèle avec {len(slots[0])} threads chacun : {sweep_dir}")
+
+        results = Sweep(sweep_dir, trials, epochs, cache_path, early_stopping or EarlyStopping).run(slots)
+    finally:
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    with open(os.path.join(sweep_dir, "summary.json"), mode='w', encoding='UTF-8') as file:
+        json.dump(results, file, indent=4)
+
+    print(f"\n{'Essai':<8}{'Statut':<12}{'Époques':>8}{'G':>12}{'D':>12}{'Diversité':>11}  Valeurs")
+    for result in results:
+        last = result['last_metrics'] or {'generator_loss': math.nan, 'discriminator_loss': math.nan, 'diversity': math.nan}
+        print(f"{result['trial']:<8}{result['status']:<12}{result['epochs']:>8}{last['generator_loss']:>12.4g}"
+              f"{last['discriminator_loss']:>12.4g}{last['diversity']:>11.4f}  {result['values']}")
+
+    return results
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Train the GAN for a grid of hyperparameters in parallel, with early stopping.")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                        help="Values to try, e.g. --grid TRAINING.LATENT_DIM=64,100 --grid BATCH_SIZE=16,32 (repeatable)")
+    parser.add_argument("--epochs", type=int, default=10, help="Epochs of each trial")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size of the trials not sweeping BATCH_SIZE")
+    parser.add_argument("--max-parallel", type=int, default=None, help="Trials running at the same time")
+    parser.add_argument("--threads-per-trial", type=int, default=None, help="CPUs of each trial")
+    parser.add_argument("--trial", help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(parser, args)
+
+    if args.trial:
+        run_trial(**json.loads(args.trial))
+        return
+
+    grid = {}
+    for item in args.grid:
+        key, separator, values = item.partition('=')
+        if not separator:
+            parser.error(f"--grid expects KEY=V1,V2,..., got '{item}'")
+        grid[key] = [parse_value(value) for value in values.split(',')]
+
+    if not grid:
+        parser.error("at least one --grid is required")
+
+    try:
+        run_sweep(grid, epochs=args.epochs, batch_size=args.batch_size, max_parallel=args.max_parallel,
+                  threads_per_trial=args.threads_per_trial)
+    except KeyError as error:
+        parser.error(error.args[0])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import threading
+import numpy as np
+
+def get_interpreter_class():
+
+    """
+    Returns the lightest TFLite interpreter available.
+
+    The standalone LiteRT / tflite-runtime packages are preferred, as they do not need
+    TensorFlow. TensorFlow's own interpreter is used as a fallback.
+
+    Returns:
+        type: The TFLite Interpreter class.
+    """
+
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+    return Interpreter
+
+class TFLiteGenerator:
+
+    """
+    Generator exported to TFLite by `export_model`, callable like the Keras generator.
+
+    TFLite interpreters are not thread-safe, so each thread calling the generator gets its
+    own interpreter; they all share the memory-mapped model file.
+
+    Args:
+        model_path (str): Path to the '.tflite' model file.
+        num_threads (int, optional): Number of threads used by each interpreter.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self._interpreter_class = get_interpreter_class()
+        self._local = threading.local()
+
+        # Load once in the calling thread so that a broken file fails early
+        self._get_interpreter()
+
+    def _get_interpreter(self):
+
+        interpreter = getattr(self._local, 'interpreter', None)
+
+        if interpreter is None:
+            interpreter = self._interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+            interpreter.allocate_tensors()
+            self._local.interpreter = interpreter
+
+        return interpreter
+
+    def __call__(self, inputs, training=False):
+
+        """
+        Generates images from a batch of latent vectors.
+
+        Args:
+            inputs (array-like): Latent vectors of shape (batch, latent_dim).
+            training (bool): Ignored, kept for compatibility with the Keras generator.
+
+        Returns:
+            np.ndarray: Generated images in [-1, 1], of shape (batch, height, width, 3).
+        """
+
+        interpreter = self._get_interpreter()
+        inputs = np.asarray(inputs, dtype=np.float32)
+
+        input_details = interpreter.get_input_details()[0]
+        if tuple(input_details['shape']) != inputs.shape:
+            interpreter.resize_tensor_input(input_details['index'], inputs.shape)
+            interpreter.allocate_tensors()
+
+        interpreter.set_tensor(input_details['index'], inputs)
+        interpreter.invoke()
+
+        return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
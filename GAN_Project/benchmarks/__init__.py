@@ -0,0 +1,3 @@
+"""
+Benchmarks of the project, run from the GAN_Project directory with `python -m benchmarks.<name>`.
+"""
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Statements timed in a fresh interpreter, as run by the notebook, CLI tools and API workers
+TARGETS = {
+    "application": "import application",
+    "monitoring": "from application import monitoring",
+    "create_gif": "from application import create_gif",
+    "run_app": "from application import run_app",
+    "domain": "import domain",
+    "train_gan": "from domain import train_gan",
+    "infrastructure": "import infrastructure",
+    "data_load_transform": "from infrastructure import data_load_transform"
+}
+
+HEAVY_MODULES = ["tensorflow", "keras", "matplotlib", "pandas", "flask", "rembg", "PIL"]
+
+PROBE = """
+import sys, json
+from time import perf_counter
+start = perf_counter()
+{statement}
+duration = perf_counter() - start
+print(json.dumps({{"seconds": duration, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def time_import(statement, repeat=5):
+
+    """
+    Times an import statement in fresh Python interpreters.
+
+    Args:
+        statement (str): The import statement to time.
+        repeat (int): Number of interpreters to start.
+
+    Returns:
+        dict: Median and minimum duration in seconds, and the heavy modules the statement loaded,
+            or the error raised by the statement.
+    """
+
+    durations = []
+    loaded = []
+
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        if process.returncode != 0:
+            return {'error': process.stderr.strip().splitlines()[-1]}
+
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        durations.append(result['seconds'])
+        loaded = result['loaded']
+
+    return {
+        'median_s': statistics.median(durations),
+        'min_s': min(durations),
+        'loaded': loaded
+    }
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the project's packages.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = {name: time_import(statement, args.repeat) for name, statement in TARGETS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Target':<22}{'Median s':>10}{'Min s':>10}  Heavy modules loaded")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<22}{'failed':>20}  {result['error']}")
+            continue
+        print(f"{name:<22}{result['median_s']:>10.3f}{result['min_s']:>10.3f}  {', '.join(result['loaded']) or '-'}")
+
+if __name__ == "__main__":
+    main()
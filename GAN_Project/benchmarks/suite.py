@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from time import perf_counter
+import numpy as np
+from PIL import Image
+from gan_config import config, override, add_config_arguments, configure_from_args
+
+SEED = 1234
+
+def environment():
+
+    """
+    Collects the metadata needed to compare results across machines and commits.
+
+    Returns:
+        dict: Commit, timestamp, Python and library versions, CPU and image settings.
+    """
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=project_dir, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, cwd=project_dir
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    import tensorflow as tf
+    import PIL
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'tensorflow': tf.__version__,
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'tf_intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+        'tf_inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+        'config': config.path,
+        'image_size': list(config.training.image_size),
+        'latent_dim': config.training.latent_dim,
+        'seed': SEED
+    }
+
+def summarize(durations, items=1):
+
+    """
+    Summarizes repeated timings.
+
+    Args:
+        durations (list): Durations in seconds.
+        items (int): Number of items (images, steps...) handled in each timing.
+
+    Returns:
+        dict: Median, minimum and 95th percentile in milliseconds, and items per second at the median.
+    """
+
+    median = statistics.median(durations)
+
+    return {
+        'median_ms': median * 1000,
+        'min_ms': min(durations) * 1000,
+        'p95_ms': float(np.percentile(durations, 95)) * 1000,
+        'items_per_s': items / median if median else None,
+        'repeat': len(durations)
+    }
+
+def write_synthetic_images(directory, n_images, size, prefix="img_"):
+
+    """
+    Writes random RGB PNG images, so that no dataset is needed to run the benchmarks.
+
+    Args:
+        directory (str): Directory where the images are written.
+        n_images (int): Number of images.
+        size (tuple): (height, width) of the images.
+        prefix (str): File name prefix, followed by the image index.
+
+    Returns:
+        list: Names of the written files.
+    """
+
+    rng = np.random.default_rng(SEED)
+    names = []
+
+    for i in range(n_images):
+        pixels = rng.integers(0, 256, size=(*size, 3), dtype=np.uint8)
+        name = f"{prefix}{i + 1}.png"
+        Image.fromarray(pixels).save(os.path.join(directory, name))
+        names.append(name)
+
+    return names
+
+def bench_train_step(batch_sizes=(8, 16, 32), repeat=5):
+
+    """
+    Measures the throughput of a full training step (generator and discriminator) per batch size.
+    """
+
+    import tensorflow as tf
+    from domain.gan_models import build_models
+    from domain.gan_optimizers import initialize_optimizers
+    from domain.gan_training import train_step
+    from domain.gan_augment import create_augmentation
+
+    # The training steps are module-level tf.functions, which can only create variables on their
+    # first trace, so the same models and optimizers are shared by all batch sizes
+    models = build_models()
+    optimizers = initialize_optimizers(models, None)
+    augmentation = create_augmentation()
+    train_flags = {'generator': True, 'discriminator': True}
+    losses = {'generator': tf.constant(0.0), 'discriminator': tf.constant(0.0)}
+    results = {}
+
+    for batch_size in batch_sizes:
+        images = tf.random.uniform([batch_size, *config.training.image_size, 3], -1, 1, seed=SEED)
+
+        # The first step of each batch size traces the tf.functions
+        losses = train_step(images, batch_size, models, train_flags, losses, optimizers, augmentation=augmentation)
+        [loss.numpy() for loss in losses.values()]
+
+        durations = []
+        for _ in range(repeat):
+            start = perf_counter()
+            losses = train_step(images, batch_size, models, train_flags, losses, optimizers, augmentation=augmentation)
+            [loss.numpy() for loss in losses.values()]
+            durations.append(perf_counter() - start)
+
+        results[f"batch_{batch_size}"] = summarize(durations, batch_size)
+
+    return results
+
+def bench_inference(batch_sizes=(1, 8, 64), repeat=20):
+
+    """
+    Measures the latency of the generator's forward pass per batch size.
+    """
+
+    from domain.gan_models import build_models
+
+    generator = build_models()['generator']
+    rng = np.random.default_rng(SEED)
+    results = {}
+
+    for batch_size in batch_sizes:
+        noise = rng.normal(size=(batch_size, config.training.latent_dim)).astype("float32")
+        np.asarray(generator(noise, training=False))
+
+        durations = []
+        for _ in range(repeat):
+            start = perf_counter()
+            np.asarray(generator(noise, training=False))
+            durations.append(perf_counter() - start)
+
+        results[f"batch_{batch_size}"] = summarize(durations, batch_size)
+
+    return results
+
+def bench_process_image(n_images=8, repeat=1):
+
+    """
+    Measures the throughput of `process_image` (background removal and resizing) on synthetic images.
+    """
+
+    from infrastructure import transform
+
+    with tempfile.TemporaryDirectory() as input_dir, tempfile.TemporaryDirectory() as output_dir:
+        names = write_synthetic_images(input_dir, n_images, config.training.image_size)
+
+        with override({'PATHS.PROCESSED_DATA': output_dir}):
+            # Loads the background removal model outside of the timings
+            transform.process_image(names[0], input_folder=input_dir)
+
+            durations = []
+            for _ in range(repeat):
+                start = perf_counter()
+                for name in names:
+                    transform.process_image(name, input_folder=input_dir)
+                durations.append(perf_counter() - start)
+
+    return summarize(durations, n_images)
+
+def bench_dataset(n_images=256, batch_size=32, repeat=3):
+
+    """
+    Measures how many images per second the tf.data training pipeline delivers.
+    """
+
+    from domain import data_loader
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_synthetic_images(data_dir, n_images, config.training.image_size)
+
+        with override({'PATHS.PROCESSED_DATA': data_dir}):
+            dataset = data_loader.load_and_preprocess_dataset(batch_size)
+
+            durations = []
+            for _ in range(repeat + 1):
+                start = perf_counter()
+                for _ in dataset:
+                    pass
+                durations.append(perf_counter() - start)
+
+    # The first pass warms up the pipeline and is left out
+    return summarize(durations[1:], n_images)
+
+def bench_gif(n_frames=50, repeat=3):
+
+    """
+    Measures the time to build a GIF from synthetic epoch images.
+    """
+
+    from application import generate_gif
+
+    with tempfile.TemporaryDirectory() as frames_dir, tempfile.TemporaryDirectory() as output_dir:
+        write_synthetic_images(frames_dir, n_frames, config.training.image_size, prefix="epoch_")
+        gif_path = os.path.join(output_dir, "benchmark.gif")
+
+        with override({'PATHS.IMAGES_DIR': frames_dir}):
+            durations = []
+            for _ in range(repeat):
+                start = perf_counter()
+                generate_gif.create_gif(gif_path)
+                durations.append(perf_counter() - start)
+
+                # create_gif reports its errors instead of raising them
+                if not os.path.exists(gif_path):
+                    raise RuntimeError("create_gif did not write the GIF")
+                os.remove(gif_path)
+
+    return summarize(durations, n_frames)
+
+BENCHMARKS = {
+    "train_step": bench_train_step,
+    "inference": bench_inference,
+    "process_image": bench_process_image,
+    "dataset": bench_dataset,
+    "gif": bench_gif
+}
+
+def run_benchmarks(names=None, quick=False):
+
+    """
+    Runs the selected benchmarks. A failing benchmark reports its error without stopping the others.
+
+    Args:
+        names (list, optional): Names of the benchmarks to run. Defaults to all of them.
+        quick (bool): Runs fewer repetitions, for a fast sanity check rather than a measurement.
+
+    Returns:
+        dict: Environment metadata and the results of each benchmark.
+    """
+
+    import tensorflow as tf
+
+    np.random.seed(SEED)
+    tf.random.set_seed(SEED)
+
+    results = {}
+    for name in names or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr, flush=True)
+        start = time.time()
+        try:
+            # Progress messages of the project's functions must not mix with the JSON output
+            with redirect_stdout(sys.stderr):
+                results[name] = BENCHMARKS[name](repeat=1) if quick else BENCHMARKS[name]()
+        except Exception as e:
+            results[name] = {'error': f"{type(e).__name__}: {e}"}
+        print(f"{name} done in {time.time() - start:.1f} s", file=sys.stderr, flush=True)
+
+    return {'environment': environment(), 'results': results}
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark the training and inference hot paths on synthetic data.")
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"Benchmarks to run among {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--quick", action="store_true", help="Single repetition, for a fast sanity check")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(parser, args)
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    report = json.dumps(run_benchmarks(args.benchmarks, args.quick), indent=2)
+    print(report)
+
+    if args.output:
+        with open(args.output, mode='w', encoding='UTF-8') as file:
+            file.write(report + "\n")
+
+if __name__ == "__main__":
+    main()
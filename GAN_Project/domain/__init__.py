@@ -1,5 +1,12 @@
-from .gan_training import train_gan
+from gan_config import lazy_module
+
+# TensorFlow is only imported once `train_gan` is first accessed
+_lazy_exports = {
+    'train_gan': '.gan_training'
+}
 
 __all__ = [
     'train_gan'
     ]
+
+__getattr__, __dir__ = lazy_module(__name__, _lazy_exports)
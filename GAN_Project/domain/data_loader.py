@@ -1,41 +1,261 @@
 import os
+from time import sleep
+import numpy as np
 import tensorflow as tf
-from .config import *
+from gan_config import config
 
-def load_and_preprocess_dataset(batch_size):
+# Extensions read by `image_dataset_from_directory`
+IMAGE_EXTENSIONS = ('.bmp', '.gif', '.jpeg', '.jpg', '.png')
+
+def load_and_preprocess_dataset(batch_size, threads=None, image_size=None, cache=False):
 
     """
     Loads and preprocesses an image dataset from the directory specified in the configuration.
 
     Args:
         batch_size (int): The number of images per batch.
+        threads (int, optional): Size of a private threadpool running the pipeline, also used as
+            the parallelism of the preprocessing. If None, TensorFlow's shared pool and AUTOTUNE are used.
+        image_size (tuple): (height, width) the images are resized to. Defaults to `IMAGE_SIZE`.
+        cache (bool): Decodes and resizes each image once and keeps it in memory, reshuffling the
+            cached images at each epoch. Meant for the small resolutions of progressive training.
 
     Returns:
         tf.data.Dataset: A preprocessed and batched TensorFlow dataset.
     """
 
+    processed_data_dir = config.paths.processed_data_dir
+    image_size = image_size or config.training.image_size
+
     image_files = [f for f in os.listdir(processed_data_dir) if os.path.isfile(os.path.join(processed_data_dir, f))]
     if len(image_files) == 0:
         raise ValueError(f"No images found in '{processed_data_dir}'.")
     
     print(f"Directory '{processed_data_dir}' contains {len(image_files)} files.")
 
-    # Load dataset from directory
+    # Load dataset from directory, batched after the cache when caching
     dataset = tf.keras.preprocessing.image_dataset_from_directory(
         processed_data_dir,
-        batch_size=batch_size,
+        batch_size=None if cache else batch_size,
         label_mode=None,  
-        shuffle=True  
+        shuffle=not cache
     )
 
-    # Resize and normalize images
+    # Resize and normalize images, antialiased when downscaling for the cache
     def preprocess_image(image):
-        image = tf.image.resize(image, tuple(image_size))
+        image = tf.image.resize(image, tuple(image_size), antialias=cache)
         image = tf.cast(image, tf.float32)  
         image = (image / 127.5) - 1 # Normalize to [-1, 1]
         return image
 
-    dataset = dataset.map(preprocess_image, num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.map(preprocess_image, num_parallel_calls=threads or tf.data.AUTOTUNE)
+
+    if cache:
+        dataset = dataset.cache().shuffle(len(image_files), reshuffle_each_iteration=True).batch(batch_size)
+
     dataset = dataset.prefetch(buffer_size=tf.data.AUTOTUNE)
 
-    return dataset
\ No newline at end of file
+    if threads:
+        # A private pool keeps the input pipeline from competing with the training ops for threads
+        options = tf.data.Options()
+        options.threading.private_threadpool_size = threads
+        options.threading.max_intra_op_parallelism = 1
+        dataset = dataset.with_options(options)
+
+    return dataset
+
+def count_images(directory):
+
+    """
+    Counts the images of a directory, without reading them.
+    """
+
+    return sum(1 for entry in os.scandir(directory) if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+
+class GrowingDataset:
+
+    """
+    Training dataset of a processed data directory that preprocessing is still filling.
+
+    Training starts once `min_pool_size` images are available, and the dataset is rebuilt at the
+    start of each epoch if new images were published meanwhile, so every epoch uses all the images
+    processed so far.
+
+    Args:
+        min_pool_size (int): Number of images to wait for before the first epoch. Fewer images are
+            used if preprocessing ends before.
+        is_complete (callable): Returns True once preprocessing has finished, and raises if it failed.
+        poll_interval (float): Seconds between two checks of the directory while waiting.
+    """
+
+    def __init__(self, min_pool_size, is_complete, poll_interval=5):
+
+        self.min_pool_size = min_pool_size
+        self.is_complete = is_complete
+        self.poll_interval = poll_interval
+        self._built = None
+
+    def wait(self):
+
+        """
+        Blocks until `min_pool_size` images are available or preprocessing has finished.
+
+        Returns:
+            tuple: (number of available images, True if preprocessing has finished)
+        """
+
+        processed_data_dir = config.paths.processed_data_dir
+        count = None
+
+        while True:
+            # Checked before counting, so that the count is final once preprocessing is complete
+            complete = self.is_complete()
+            previous, count = count, count_images(processed_data_dir)
+
+            if count >= self.min_pool_size or complete:
+                return count, complete
+
+            if count != previous:
+                print(f"Waiting for processed images: {count}/{self.min_pool_size}...")
+            sleep(self.poll_interval)
+
+    def update(self, dataset, batch_size, threads=None, image_size=None, cache=False):
+
+        """
+        Returns the dataset to train the next epoch with, rebuilt if images were added since it was built.
+
+        Args:
+            dataset (tf.data.Dataset or None): The current dataset.
+            batch_size, threads, image_size, cache: See `load_and_preprocess_dataset`.
+
+        Returns:
+            tf.data.Dataset: The dataset of all the images processed so far.
+        """
+
+        count, complete = self.wait()
+        image_size = tuple(image_size or config.training.image_size)
+
+        if dataset is None or self._built != (count, image_size):
+            print(f"Training on {count} processed images{'' if complete else ', preprocessing still running'}.")
+            dataset = load_and_preprocess_dataset(batch_size, threads, image_size, cache)
+            self._built = (count, image_size)
+
+        return dataset
+
+def build_image_cache(cache_path, image_size=None):
+
+    """
+    Decodes and resizes the processed images once into a uint8 '.npy' file, see `CachedDataset`.
+
+    Images are written one by one into a memory-mapped file, under a temporary name then renamed.
+
+    Args:
+        cache_path (str): Path of the '.npy' file.
+        image_size (tuple): (height, width) the images are resized to. Defaults to `IMAGE_SIZE`.
+
+    Returns:
+        int: Number of cached images.
+
+    Raises:
+        ValueError: If the processed data directory has no images.
+    """
+
+    from PIL import Image
+
+    processed_data_dir = config.paths.processed_data_dir
+    height, width = image_size or config.training.image_size
+
+    names = sorted(entry.name for entry in os.scandir(processed_data_dir)
+                   if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+    if not names:
+        raise ValueError(f"No images found in '{processed_data_dir}'.")
+
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    images = np.lib.format.open_memmap(temporary_path, mode='w+', dtype=np.uint8, shape=(len(names), height, width, 3))
+    for i, name in enumerate(names):
+        with Image.open(os.path.join(processed_data_dir, name)) as image:
+            image = image.convert("RGB")
+            if image.size != (width, height):
+                image = image.resize((width, height), Image.LANCZOS)
+            images[i] = np.asarray(image)
+    images.flush()
+    del images
+    os.replace(temporary_path, cache_path)
+
+    print(f"Cached {len(names)} images of {height}x{width} in '{cache_path}'.")
+
+    return len(names)
+
+class CachedDataset:
+
+    """
+    Training dataset read from an image cache built by `build_image_cache`, for `train_gan(dataset_pool=...)`.
+
+    The cache is memory-mapped, so processes training on the same cache (e.g. the trials of a sweep)
+    share its pages instead of each decoding the images and holding its own copy. Batches of shuffled
+    indices are gathered from the map, then normalized (and resized, for progressive training) in the graph.
+
+    Args:
+        cache_path (str): Path of the '.npy' cache.
+    """
+
+    def __init__(self, cache_path):
+
+        self.cache_path = cache_path
+        self._built = None
+
+    def wait(self):
+
+        """
+        Returns:
+            tuple: (number of cached images, True)
+        """
+
+        return len(np.load(self.cache_path, mmap_mode='r')), True
+
+    def update(self, dataset, batch_size, threads=None, image_size=None, cache=False):
+
+        """
+        Returns the dataset to train the next epoch with, built once per image size.
+
+        Args:
+            dataset (tf.data.Dataset or None): The current dataset.
+            batch_size, threads, image_size: See `load_and_preprocess_dataset`. The images are
+                already decoded and in memory, so `cache` is not used.
+
+        Returns:
+            tf.data.Dataset: The dataset of the cached images.
+        """
+
+        image_size = tuple(image_size or config.training.image_size)
+        if dataset is not None and self._built == image_size:
+            return dataset
+
+        images = np.load(self.cache_path, mmap_mode='r')
+        print(f"Training on {len(images)} cached images from '{self.cache_path}'.")
+
+        def gather_images(indices):
+            # Sorted indices read the map sequentially, the batch is shuffled anyway
+            return np.ascontiguousarray(images[np.sort(indices)])
+
+        def preprocess_batch(indices):
+            batch = tf.numpy_function(gather_images, [indices], tf.uint8)
+            batch.set_shape([None, *images.shape[1:]])
+            batch = tf.cast(batch, tf.float32)
+            if image_size != images.shape[1:3]:
+                batch = tf.image.resize(batch, image_size, antialias=True)
+            return (batch / 127.5) - 1 # Normalize to [-1, 1]
+
+        dataset = tf.data.Dataset.range(len(images)).shuffle(len(images), reshuffle_each_iteration=True).batch(batch_size)
+        dataset = dataset.map(preprocess_batch, num_parallel_calls=threads or tf.data.AUTOTUNE)
+        dataset = dataset.prefetch(buffer_size=tf.data.AUTOTUNE)
+
+        if threads:
+            options = tf.data.Options()
+            options.threading.private_threadpool_size = threads
+            options.threading.max_intra_op_parallelism = 1
+            dataset = dataset.with_options(options)
+
+        self._built = image_size
+
+        return dataset
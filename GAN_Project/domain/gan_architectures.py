@@ -0,0 +1,111 @@
+# Architectures the models can be built from, by name.
+# Generator channels start with the seed (reshaped dense output), followed by one entry per
+# upsampling block; the discriminator mirrors them with one strided convolution per entry.
+# Lower resolutions use the generator's first blocks and the discriminator's last ones, so every
+# architecture covers several resolutions and a model grows by adding blocks on the image side.
+ARCHITECTURES = {
+    "dcgan": {
+        "generator_channels": [1024, 512, 256, 128, 64],
+        "generator_kernel": 5,
+        "discriminator_channels": [64, 128, 256, 512],
+        "discriminator_kernels": [5, 5, 3, 3],
+        "dropout": 0.3
+    },
+    "dcgan_light": {
+        "generator_channels": [512, 256, 128, 64, 32],
+        "generator_kernel": 3,
+        "discriminator_channels": [32, 64, 128, 256],
+        "discriminator_kernels": [3, 3, 3, 3],
+        "dropout": 0.3
+    }
+}
+
+# Smallest side of the generator's seed feature map
+MIN_SEED_SIZE = 4
+
+def get_architecture(name):
+
+    """
+    Returns the specification of a registered architecture.
+
+    Args:
+        name (str): Name of the architecture in `ARCHITECTURES`.
+
+    Returns:
+        dict: The architecture specification.
+
+    Raises:
+        ValueError: If the architecture is unknown.
+    """
+
+    if name not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture '{name}'. Available architectures: {', '.join(ARCHITECTURES)}.")
+
+    return ARCHITECTURES[name]
+
+def scale_channels(channels, width):
+
+    """
+    Scales a number of channels by a width multiplier, rounded to a multiple of 8 for efficient kernels.
+    """
+
+    return max(8, int(round(channels * width / 8)) * 8)
+
+def upsampling_steps(image_size, max_steps):
+
+    """
+    Computes how many times the generator doubles the resolution of its seed to reach `image_size`.
+
+    As many blocks as the architecture has are used, as long as both sides stay divisible and the
+    seed keeps at least `MIN_SEED_SIZE` pixels per side.
+
+    Args:
+        image_size (tuple): (height, width) of the images.
+        max_steps (int): Number of upsampling steps of the architecture.
+
+    Returns:
+        int: Number of upsampling steps, the output convolution included.
+
+    Raises:
+        ValueError: If the image size cannot be reached by at least two upsampling steps.
+    """
+
+    height, width = image_size
+    steps = 0
+
+    while (steps < max_steps and height % 2**(steps + 1) == 0 and width % 2**(steps + 1) == 0
+           and min(height, width) // 2**(steps + 1) >= MIN_SEED_SIZE):
+        steps += 1
+
+    if steps < 2:
+        raise ValueError(f"Image size {height}x{width} is not supported: both sides must be divisible by 4 "
+                         f"and stay at least {MIN_SEED_SIZE * 4} pixels.")
+
+    return steps
+
+def build_layout(architecture, width, image_size):
+
+    """
+    Resolves an architecture at a given width multiplier and resolution.
+
+    Args:
+        architecture (str): Name of the architecture.
+        width (float): Multiplier applied to every number of channels.
+        image_size (tuple): (height, width) of the images.
+
+    Returns:
+        dict: Seed shape, generator block channels and kernel, discriminator channels, kernels and dropout.
+    """
+
+    spec = get_architecture(architecture)
+    steps = upsampling_steps(image_size, len(spec['generator_channels']))
+    channels = [scale_channels(c, width) for c in spec['generator_channels'][:steps]]
+
+    return {
+        'seed_shape': (image_size[0] // 2**steps, image_size[1] // 2**steps, channels[0]),
+        'generator_channels': channels[1:],
+        'generator_kernel': spec['generator_kernel'],
+        'discriminator_channels': [scale_channels(c, width) for c in spec['discriminator_channels'][-(steps - 1):]],
+        'discriminator_kernels': spec['discriminator_kernels'][-(steps - 1):],
+        'dropout': spec['dropout']
+    }
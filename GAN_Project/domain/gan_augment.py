@@ -0,0 +1,154 @@
+import tensorflow as tf
+from gan_config import config
+
+# Largest translation, as a fraction of the image size, and size of the cutout square
+TRANSLATION_RATIO = 0.125
+CUTOUT_RATIO = 0.5
+
+def random_factors(images):
+
+    """
+    Returns one uniform random number in [0, 1) per image, shaped to broadcast over the images.
+    """
+
+    return tf.random.uniform([tf.shape(images)[0], 1, 1, 1])
+
+def adjust_brightness(images):
+    return images + (random_factors(images) - 0.5)
+
+def adjust_saturation(images):
+    mean = tf.reduce_mean(images, axis=3, keepdims=True)
+    return (images - mean) * (random_factors(images) * 2.0) + mean
+
+def adjust_contrast(images):
+    mean = tf.reduce_mean(images, axis=[1, 2, 3], keepdims=True)
+    return (images - mean) * (random_factors(images) + 0.5) + mean
+
+def translate(images):
+
+    """
+    Shifts each image by up to `TRANSLATION_RATIO` of its size, filling the uncovered border with zeros.
+
+    The shifted images are gathered from the zero-padded batch, so the translation is differentiable.
+    """
+
+    batch, height, width = tf.shape(images)[0], tf.shape(images)[1], tf.shape(images)[2]
+    shift_y = tf.cast(tf.cast(height, tf.float32) * TRANSLATION_RATIO + 0.5, tf.int32)
+    shift_x = tf.cast(tf.cast(width, tf.float32) * TRANSLATION_RATIO + 0.5, tf.int32)
+
+    offsets_y = tf.random.uniform([batch, 1], -shift_y, shift_y + 1, dtype=tf.int32)
+    offsets_x = tf.random.uniform([batch, 1], -shift_x, shift_x + 1, dtype=tf.int32)
+
+    padded = tf.pad(images, [[0, 0], [shift_y, shift_y], [shift_x, shift_x], [0, 0]])
+    rows = tf.range(height)[tf.newaxis, :] + shift_y - offsets_y
+    columns = tf.range(width)[tf.newaxis, :] + shift_x - offsets_x
+
+    images = tf.gather(padded, rows, axis=1, batch_dims=1)
+
+    return tf.gather(images, columns, axis=2, batch_dims=1)
+
+def cutout(images):
+
+    """
+    Sets a square of `CUTOUT_RATIO` of the image size, at a random position in each image, to zero.
+    """
+
+    batch, height, width = tf.shape(images)[0], tf.shape(images)[1], tf.shape(images)[2]
+    half_height = tf.cast(height, tf.float32) * CUTOUT_RATIO / 2
+    half_width = tf.cast(width, tf.float32) * CUTOUT_RATIO / 2
+
+    center_y = tf.random.uniform([batch, 1, 1], 0, tf.cast(height, tf.float32))
+    center_x = tf.random.uniform([batch, 1, 1], 0, tf.cast(width, tf.float32))
+    rows = tf.cast(tf.range(height), tf.float32)[tf.newaxis, :, tf.newaxis]
+    columns = tf.cast(tf.range(width), tf.float32)[tf.newaxis, tf.newaxis, :]
+
+    inside = (tf.abs(rows - center_y) < half_height) & (tf.abs(columns - center_x) < half_width)
+
+    return images * tf.cast(~inside, images.dtype)[..., tf.newaxis]
+
+# Augmentations of each policy, applied in this order
+AUGMENTATIONS = {
+    'color': (adjust_brightness, adjust_saturation, adjust_contrast),
+    'translation': (translate,),
+    'cutout': (cutout,)
+}
+
+class AdaptiveAugment(tf.Module):
+
+    """
+    Differentiable augmentation of the images seen by the discriminator, real and generated alike
+    (DiffAugment), with a probability adapted to discriminator overfitting (ADA).
+
+    Each augmentation of the policy is applied to each image independently with probability `p`.
+    All of them are batched tensor operations, run inside the compiled training steps, and
+    differentiable, so that the generator is trained through the augmentation of its images.
+
+    With `adaptive`, `p` follows the overfitting heuristic r = E[sign(D(real))], tracked as a moving
+    average over the steps: `p` rises while r is above `target` (the discriminator is too sure of the
+    real images) and falls otherwise, by `batch_size / adjust_images` per step. It is capped at
+    `max_probability`, below which the augmentations do not leak into the generated images.
+
+    Args:
+        policy (list, optional): Names of the augmentations in `AUGMENTATIONS`. Defaults to `AUGMENTATION.POLICY`.
+        probability (float, optional): Fixed `p`, or initial `p` when adaptive. Defaults to `AUGMENTATION.PROBABILITY`.
+        adaptive (bool, optional): Adapts `p` during training. Defaults to `AUGMENTATION.ADAPTIVE`.
+    """
+
+    def __init__(self, policy=None, probability=None, adaptive=None):
+
+        super().__init__(name="adaptive_augment")
+
+        augmentation = config.augmentation
+        policy = augmentation.policy if policy is None else policy
+        unknown = [name for name in policy if name not in AUGMENTATIONS]
+        if unknown:
+            raise ValueError(f"Unknown augmentations {unknown}, expected some of {list(AUGMENTATIONS)}.")
+
+        self.policy = tuple(policy)
+        self.adaptive = augmentation.adaptive if adaptive is None else adaptive
+        self.target = augmentation.target
+        self.adjust_images = augmentation.adjust_images
+        self.max_probability = augmentation.max_probability if self.adaptive else 1.0
+
+        probability = augmentation.probability if probability is None else probability
+        self.probability = tf.Variable(float(probability), trainable=False, dtype=tf.float32, name="probability")
+        self.real_sign = tf.Variable(0.0, trainable=False, dtype=tf.float32, name="real_sign")
+
+    def __call__(self, images):
+
+        """
+        Augments a batch of images.
+        """
+
+        for name in self.policy:
+            for augmentation in AUGMENTATIONS[name]:
+                applied = random_factors(images) < self.probability
+                images = tf.where(applied, augmentation(images), images)
+
+        return images
+
+    def update(self, real_output):
+
+        """
+        Updates `p` from the discriminator's outputs for a batch of real images. Does nothing unless adaptive.
+        """
+
+        if not self.adaptive:
+            return
+
+        self.real_sign.assign(0.9 * self.real_sign + 0.1 * tf.reduce_mean(tf.sign(real_output)))
+
+        batch_size = tf.cast(tf.shape(real_output)[0], tf.float32)
+        adjustment = tf.sign(self.real_sign - self.target) * batch_size / self.adjust_images
+        self.probability.assign(tf.clip_by_value(self.probability + adjustment, 0.0, self.max_probability))
+
+def create_augmentation():
+
+    """
+    Creates the augmentation of the configuration, or returns None if its policy is empty.
+    """
+
+    if not config.augmentation.policy:
+        return None
+
+    return AdaptiveAugment()
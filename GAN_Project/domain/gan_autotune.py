@@ -0,0 +1,349 @@
+import os
+import sys
+import json
+import hashlib
+import platform
+import argparse
+import subprocess
+from time import perf_counter
+from datetime import datetime
+import psutil
+from gan_config import config, add_config_arguments, configure_from_args
+
+AUTOTUNE_FILE = "autotune.json"
+
+def get_autotune_path():
+
+    """
+    Returns the path of the file storing the tuned settings of each host, in the logs directory.
+    """
+
+    return os.path.join(config.paths.logs_dir, AUTOTUNE_FILE)
+
+def host_fingerprint():
+
+    """
+    Identifies the host and the training setup the tuned settings are valid for.
+
+    The setup covers everything the cost of a training step depends on: the image size, the latent
+    size, the architecture and its width, and the augmentations applied to the discriminator's inputs.
+
+    Returns:
+        tuple: (fingerprint, host description)
+    """
+
+    import tensorflow as tf
+
+    host = {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'memory_gb': round(psutil.virtual_memory().total / 2**30, 1),
+        'gpus': len(tf.config.list_physical_devices('GPU')),
+        'tensorflow': tf.__version__,
+        'image_size': list(config.training.image_size),
+        'latent_dim': config.training.latent_dim,
+        'architecture': config.training.architecture_name,
+        'architecture_width': config.training.architecture_width,
+        'augmentation_policy': list(config.augmentation.policy)
+    }
+    fingerprint = hashlib.sha1(json.dumps(host, sort_keys=True).encode()).hexdigest()[:16]
+
+    return fingerprint, host
+
+def peak_memory_mb():
+
+    """
+    Returns the peak resident memory of the current process in MB.
+    """
+
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    except ImportError:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2**20
+
+def apply_thread_settings(intra_op, inter_op):
+
+    """
+    Sets TensorFlow's intra-op and inter-op threadpool sizes (0 lets TensorFlow choose).
+
+    They can only be changed before TensorFlow runs its first operation in the process.
+
+    Returns:
+        bool: True if the settings are in effect.
+    """
+
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError:
+        return (tf.config.threading.get_intra_op_parallelism_threads() == intra_op
+                and tf.config.threading.get_inter_op_parallelism_threads() == inter_op)
+
+    return True
+
+def calibrate_step(batch_size, intra_op=0, inter_op=0, steps=3):
+
+    """
+    Times a few training steps of freshly initialized models on random images.
+
+    Meant to run in its own process (see `run_probe`), as thread settings can only be applied
+    to a process once and the peak memory of the process is what is measured.
+
+    Returns:
+        dict: Images per second and peak resident memory in MB.
+    """
+
+    apply_thread_settings(intra_op, inter_op)
+
+    import tensorflow as tf
+    from .gan_models import build_models
+    from .gan_optimizers import initialize_optimizers
+    from .gan_training import train_step
+    from .gan_augment import create_augmentation
+
+    models = build_models()
+    optimizers = initialize_optimizers(models, None)
+    augmentation = create_augmentation()
+    train_flags = {'generator': True, 'discriminator': True}
+    images = tf.random.uniform([batch_size, *config.training.image_size, 3], -1, 1)
+
+    # The first step traces the training functions and creates the optimizer variables
+    losses = train_step(images, batch_size, models, train_flags, {}, optimizers, augmentation=augmentation)
+    [loss.numpy() for loss in losses.values()]
+
+    start = perf_counter()
+    for _ in range(steps):
+        losses = train_step(images, batch_size, models, train_flags, losses, optimizers, augmentation=augmentation)
+        [loss.numpy() for loss in losses.values()]
+    duration = perf_counter() - start
+
+    return {'images_per_s': batch_size * steps / duration, 'peak_memory_mb': peak_memory_mb()}
+
+def run_probe(batch_size, intra_op=0, inter_op=0, steps=3):
+
+    """
+    Runs `calibrate_step` in a fresh Python process.
+
+    Returns:
+        dict or None: The calibration result, or None if the process failed, e.g. ran out of memory.
+    """
+
+    command = [
+        sys.executable, "-m", "domain.gan_autotune", "--probe",
+        str(batch_size), str(intra_op), str(inter_op), str(steps)
+    ]
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, cwd=project_dir, timeout=config.autotune.probe_timeout)
+    except subprocess.TimeoutExpired:
+        return None
+
+    if process.returncode != 0:
+        return None
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def thread_candidates():
+
+    """
+    Returns the (intra-op, inter-op) thread settings tried, TensorFlow's defaults first.
+    """
+
+    cpus = os.cpu_count() or 1
+    candidates = [(0, 0)]
+
+    for intra_op in sorted({cpus, max(1, cpus // 2)}, reverse=True):
+        for inter_op in (1, 2):
+            if (intra_op, inter_op) not in candidates and intra_op + inter_op <= cpus + 2:
+                candidates.append((intra_op, inter_op))
+
+    return candidates
+
+def calibrate_dataset(batch_size, n_batches=10):
+
+    """
+    Picks the number of threads of the input pipeline delivering the most images per second.
+
+    Args:
+        batch_size (int): Number of images per batch.
+        n_batches (int): Number of batches read for each candidate.
+
+    Returns:
+        int or None: Size of the private threadpool, or None for TensorFlow's shared pool.
+
+    Raises:
+        ValueError: If the processed data directory has no images.
+    """
+
+    from .data_loader import load_and_preprocess_dataset
+
+    cpus = os.cpu_count() or 1
+    results = {}
+
+    for threads in [None] + sorted({cpus, max(1, cpus // 2)}, reverse=True):
+        dataset = load_and_preprocess_dataset(batch_size, threads).take(n_batches)
+
+        # The first pass opens the files and fills the prefetch buffer
+        for _ in dataset:
+            pass
+
+        start = perf_counter()
+        for _ in dataset:
+            pass
+        results[threads] = perf_counter() - start
+
+    return min(results, key=results.get)
+
+def load_tuned_settings(fingerprint):
+
+    """
+    Returns the settings stored for a host, or None if it has not been tuned yet.
+    """
+
+    autotune_path = get_autotune_path()
+    if not os.path.exists(autotune_path):
+        return None
+
+    with open(autotune_path, mode='r', encoding='UTF-8') as file:
+        return json.load(file).get(fingerprint)
+
+def save_tuned_settings(fingerprint, settings):
+
+    autotune_path = get_autotune_path()
+    tuned = {}
+    if os.path.exists(autotune_path):
+        with open(autotune_path, mode='r', encoding='UTF-8') as file:
+            tuned = json.load(file)
+
+    tuned[fingerprint] = settings
+
+    with open(autotune_path, mode='w', encoding='UTF-8') as file:
+        json.dump(tuned, file, indent=4)
+
+def get_tuned_settings(force=False):
+
+    """
+    Picks the batch size and thread settings for this host, calibrating them on the first run.
+
+    Batch sizes from the configuration are tried in increasing order, each in a separate process,
+    and the largest one whose peak memory fits in `MEMORY_FRACTION` of the available memory is kept.
+    Intra-op/inter-op thread settings are then compared at that batch size, and the input
+    pipeline threads on the processed dataset. The result is stored in 'logs/autotune.json'
+    under a fingerprint of the host, so later runs on the same machine skip the calibration.
+    If the processed dataset has no images yet, the input pipeline is left to TensorFlow's
+    shared pool and AUTOTUNE (`dataset_threads` is None).
+
+    The thread settings are applied to the current process, which must not have run any
+    TensorFlow operation yet.
+
+    Args:
+        force (bool): Calibrates again even if settings are stored for this host.
+
+    Returns:
+        dict: 'batch_size', 'intra_op_threads', 'inter_op_threads' and 'dataset_threads'.
+
+    Raises:
+        RuntimeError: If no batch size could be calibrated.
+    """
+
+    fingerprint, host = host_fingerprint()
+    settings = None if force else load_tuned_settings(fingerprint)
+
+    if settings is not None:
+        print(f"Using the autotuned settings of this host ({fingerprint}).")
+        apply_settings(settings)
+        return settings
+
+    budget_mb = psutil.virtual_memory().available / 2**20 * config.autotune.memory_fraction
+    print(f"Autotuning for this host ({fingerprint}), memory budget {budget_mb:.0f} MB...")
+
+    batch_size, best = None, None
+    for candidate in sorted(config.autotune.batch_sizes):
+        result = run_probe(candidate, steps=config.autotune.calibration_steps)
+        if result is None:
+            print(f"  batch_size={candidate}: failed (out of memory or timeout)")
+            break
+        if result['peak_memory_mb'] > budget_mb:
+            print(f"  batch_size={candidate}: {result['peak_memory_mb']:.0f} MB, over the memory budget")
+            break
+        print(f"  batch_size={candidate}: {result['images_per_s']:.1f} images/s, {result['peak_memory_mb']:.0f} MB")
+        batch_size, best = candidate, result
+
+    if batch_size is None:
+        raise RuntimeError(f"No batch size among {config.autotune.batch_sizes} fits in {budget_mb:.0f} MB.")
+
+    throughputs = {(0, 0): best['images_per_s']}
+    for intra_op, inter_op in thread_candidates()[1:]:
+        result = run_probe(batch_size, intra_op, inter_op, config.autotune.calibration_steps)
+        if result is not None:
+            print(f"  threads={intra_op}/{inter_op}: {result['images_per_s']:.1f} images/s")
+            throughputs[(intra_op, inter_op)] = result['images_per_s']
+    intra_op, inter_op = max(throughputs, key=throughputs.get)
+
+    settings = {
+        'batch_size': batch_size,
+        'intra_op_threads': intra_op,
+        'inter_op_threads': inter_op,
+        'dataset_threads': None,
+        'images_per_s': throughputs[(intra_op, inter_op)],
+        'peak_memory_mb': best['peak_memory_mb'],
+        'host': host,
+        'tuned_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    # Stored before the input pipeline is calibrated, so the probes are not lost if it fails
+    save_tuned_settings(fingerprint, settings)
+
+    # The input pipeline runs in this process, once the training thread settings are applied
+    apply_thread_settings(intra_op, inter_op)
+    try:
+        settings['dataset_threads'] = calibrate_dataset(batch_size)
+    except ValueError as error:
+        print(f"  dataset_threads: not calibrated ({error}), using TensorFlow's shared pool and AUTOTUNE")
+    else:
+        save_tuned_settings(fingerprint, settings)
+
+    apply_settings(settings)
+
+    return settings
+
+def apply_settings(settings):
+
+    """
+    Applies tuned thread settings to the current process and prints them.
+    """
+
+    print(f"batch_size={settings['batch_size']}, intra_op_threads={settings['intra_op_threads']}, "
+          f"inter_op_threads={settings['inter_op_threads']}, dataset_threads={settings['dataset_threads']}")
+
+    if not apply_thread_settings(settings['intra_op_threads'], settings['inter_op_threads']):
+        print("TensorFlow already ran in this process, restart it to apply the tuned thread settings.")
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Calibrate the batch size and thread settings of training for this host.")
+    parser.add_argument("--force", action="store_true", help="Calibrate again even if this host is already tuned")
+    parser.add_argument("--probe", nargs=4, type=int, metavar=("BATCH_SIZE", "INTRA_OP", "INTER_OP", "STEPS"),
+                        help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(parser, args)
+
+    if args.probe:
+        # Only the last line of the output is read by `run_probe`
+        print(json.dumps(calibrate_step(*args.probe)))
+        return
+
+    print(json.dumps(get_tuned_settings(args.force), indent=4))
+
+if __name__ == "__main__":
+    main()
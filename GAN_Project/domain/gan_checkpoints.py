@@ -0,0 +1,293 @@
+import os
+import json
+import zlib
+import hashlib
+from datetime import datetime
+import numpy as np
+from gan_config import config
+
+# Extension of the names of the models held by the store, e.g. 'generator_epoch_1440.ckpt'
+CHECKPOINT_EXTENSION = ".ckpt"
+
+STORE_DIR = "store"
+INDEX_FILE = "index.json"
+
+# Chunks are only stored compressed when it saves at least this fraction of their size,
+# the others stay raw so that they can be memory-mapped
+MIN_COMPRESSION_GAIN = 0.1
+
+def write_atomic(path, data):
+
+    """
+    Writes a file under a temporary name then renames it, so readers never see a partial file.
+    """
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, mode='wb') as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+
+def checkpoint_name(model_api):
+
+    """
+    Returns the name of a model in the store, e.g. 'generator_epoch_1440_ema' for 'generator_epoch_1440_ema.ckpt'.
+    """
+
+    return os.path.splitext(os.path.basename(model_api))[0]
+
+class CheckpointStore:
+
+    """
+    Content-addressed store of model weights.
+
+    Each weight tensor is split into chunks of `CHUNK_SIZE_MB`, optionally cast to float16, and each
+    chunk is stored once under the SHA-256 of its bytes in 'objects/', compressed with zlib when it
+    shrinks enough. Identical chunks, within a checkpoint or across checkpoints, are stored only once.
+    A JSON manifest per model ('manifests/<name>.json') records its Keras configuration and the
+    chunks of each weight, and 'index.json' maps model names to epochs and holds the latest epoch,
+    so that no directory listing is needed to find a checkpoint.
+
+    Files are written under temporary names and renamed, and the index is written last, so that a
+    serving process reading the store never sees a partial checkpoint.
+
+    Args:
+        root (str, optional): Directory of the store. Defaults to 'store' in the models directory.
+    """
+
+    def __init__(self, root=None):
+
+        self.root = root or os.path.join(config.paths.models_dir, STORE_DIR)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.manifests_dir = os.path.join(self.root, "manifests")
+
+    def read_index(self):
+
+        """
+        Returns the index of the store: {'latest_epoch': int or None, 'checkpoints': {name: {'epoch', 'saved_at'}}}.
+        """
+
+        index_path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {'latest_epoch': None, 'checkpoints': {}}
+
+        with open(index_path, mode='r', encoding='UTF-8') as file:
+            return json.load(file)
+
+    def latest_epoch(self):
+        return self.read_index()['latest_epoch']
+
+    def has(self, name):
+
+        """
+        Checks whether a model is in the store, by name ('generator_epoch_1440' or 'generator_epoch_1440.ckpt').
+        """
+
+        return checkpoint_name(name) in self.read_index()['checkpoints']
+
+    def save(self, epoch, models, float16=None):
+
+        """
+        Saves the models of an epoch as 'generator_epoch_N', 'discriminator_epoch_N' and 'generator_epoch_N_ema'.
+
+        Args:
+            epoch (int): Epoch number (1-based) the models are saved at.
+            models (dict): 'generator', 'discriminator' and optional 'generator_ema' models.
+            float16 (bool, optional): Stores floating-point weights as float16. Defaults to `CHECKPOINTS.FLOAT16`.
+
+        Returns:
+            dict: Bytes of the weights and bytes actually written, new chunks only.
+        """
+
+        float16 = config.checkpoints.float16 if float16 is None else float16
+        names = {'generator': f"generator_epoch_{epoch}", 'discriminator': f"discriminator_epoch_{epoch}",
+                 'generator_ema': f"generator_epoch_{epoch}_ema"}
+        stats = {'weights_bytes': 0, 'written_bytes': 0}
+
+        for key, name in names.items():
+            if key in models:
+                for stat, value in self.save_model(name, models[key], float16).items():
+                    stats[stat] += value
+
+        index = self.read_index()
+        saved_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for key, name in names.items():
+            if key in models:
+                index['checkpoints'][name] = {'epoch': epoch, 'saved_at': saved_at}
+        index['latest_epoch'] = max(epoch, index['latest_epoch'] or 0)
+        write_atomic(os.path.join(self.root, INDEX_FILE), json.dumps(index, indent=4).encode())
+
+        return stats
+
+    def save_model(self, name, model, float16=False):
+
+        """
+        Writes the chunks and the manifest of a model. The model is only listed once `save` updates the index.
+
+        Returns:
+            dict: Bytes of the weights and bytes actually written, new chunks only.
+        """
+
+        import keras
+
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+        chunk_size = int(config.checkpoints.chunk_size_mb * 2**20)
+        stats = {'weights_bytes': 0, 'written_bytes': 0}
+        weights = []
+
+        for variable, value in zip(model.weights, model.get_weights()):
+            stored = value.astype(np.float16) if float16 and value.dtype == np.float32 else value
+            data = np.ascontiguousarray(stored).data.cast('B')
+
+            chunks = []
+            for start in range(0, max(len(data), 1), chunk_size):
+                digest, compressed, written = self._put_chunk(data[start:start + chunk_size])
+                chunks.append([digest, compressed])
+                stats['written_bytes'] += written
+            stats['weights_bytes'] += len(data)
+
+            weights.append({
+                'path': variable.path,
+                'shape': list(value.shape),
+                'dtype': value.dtype.name,
+                'stored_dtype': stored.dtype.name,
+                'chunks': chunks
+            })
+
+        manifest = {'name': name, 'model': keras.saving.serialize_keras_object(model), 'weights': weights}
+        # Update counter of an EMA generator, see `attach_ema_step`
+        if hasattr(model, 'ema_step'):
+            manifest['ema_step'] = int(model.ema_step.numpy())
+        write_atomic(os.path.join(self.manifests_dir, f"{name}.json"), json.dumps(manifest).encode())
+
+        return stats
+
+    def read_manifest(self, name):
+
+        """
+        Returns the manifest of a model: its serialized Keras configuration and the chunks of its weights.
+
+        Raises:
+            FileNotFoundError: If the model is not in the store.
+        """
+
+        name = checkpoint_name(name)
+        manifest_path = os.path.join(self.manifests_dir, f"{name}.json")
+        if not self.has(name) or not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No checkpoint '{name}' in the store {self.root}.")
+
+        with open(manifest_path, mode='r', encoding='UTF-8') as file:
+            return json.load(file)
+
+    def load_weights(self, name, mmap=False):
+
+        """
+        Reads the weights of a model.
+
+        Args:
+            name (str): Name of the model, with or without the '.ckpt' extension.
+            mmap (bool): Memory-maps raw chunks instead of reading them. A weight held in a single
+                raw chunk is returned as a read-only memory map.
+
+        Returns:
+            tuple: (manifest, list of np.ndarray in the order of `model.weights`)
+
+        Raises:
+            FileNotFoundError: If the model is not in the store.
+        """
+
+        manifest = self.read_manifest(name)
+        weights = []
+        for weight in manifest['weights']:
+            stored_dtype, shape = np.dtype(weight['stored_dtype']), tuple(weight['shape'])
+
+            if mmap and len(weight['chunks']) == 1 and not weight['chunks'][0][1] and np.prod(shape, dtype=int) > 0:
+                value = np.memmap(self._object_path(weight['chunks'][0][0], False), dtype=stored_dtype, mode='r', shape=shape)
+            else:
+                value = np.empty(shape, dtype=stored_dtype)
+                buffer = value.reshape(-1).view(np.uint8)
+                offset = 0
+                for digest, compressed in weight['chunks']:
+                    chunk = self._read_chunk(digest, compressed, mmap)
+                    buffer[offset:offset + len(chunk)] = chunk
+                    offset += len(chunk)
+
+            weights.append(value if stored_dtype.name == weight['dtype'] else value.astype(weight['dtype']))
+
+        return manifest, weights
+
+    def load_model(self, name, mmap=False):
+
+        """
+        Rebuilds a model from the store, see `load_weights`.
+
+        The weights are copied into the variables of the model, so memory-mapping the chunks only
+        avoids reading them into an intermediate buffer first.
+
+        Returns:
+            tf.keras.Model: The model with its saved weights.
+        """
+
+        import keras
+        # Registers the custom models for deserialization
+        from . import gan_models
+
+        manifest, weights = self.load_weights(name, mmap)
+        model = keras.saving.deserialize_keras_object(manifest['model'])
+        model.set_weights(weights)
+
+        return model
+
+    def size(self, name):
+
+        """
+        Returns the bytes on disk of the chunks of a model, including those shared with other models.
+        """
+
+        manifest = self.read_manifest(name)
+        chunks = {(digest, compressed) for weight in manifest['weights'] for digest, compressed in weight['chunks']}
+
+        return sum(os.path.getsize(self._object_path(digest, compressed)) for digest, compressed in chunks)
+
+    def _object_path(self, digest, compressed):
+        return os.path.join(self.objects_dir, digest[:2], digest + (".z" if compressed else ".raw"))
+
+    def _put_chunk(self, data):
+
+        """
+        Stores a chunk unless an identical one is already stored.
+
+        Returns:
+            tuple: (SHA-256 of the chunk, True if stored compressed, bytes written)
+        """
+
+        digest = hashlib.sha256(data).hexdigest()
+
+        for compressed in (False, True):
+            if os.path.exists(self._object_path(digest, compressed)):
+                return digest, compressed, 0
+
+        level = config.checkpoints.compression_level
+        payload = zlib.compress(data, level) if level else None
+        compressed = payload is not None and len(payload) <= len(data) * (1 - MIN_COMPRESSION_GAIN)
+        if not compressed:
+            payload = bytes(data)
+
+        object_path = self._object_path(digest, compressed)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        write_atomic(object_path, payload)
+
+        return digest, compressed, len(payload)
+
+    def _read_chunk(self, digest, compressed, mmap=False):
+
+        object_path = self._object_path(digest, compressed)
+
+        if compressed:
+            with open(object_path, mode='rb') as file:
+                return np.frombuffer(zlib.decompress(file.read()), dtype=np.uint8)
+
+        if mmap and os.path.getsize(object_path) > 0:
+            return np.memmap(object_path, dtype=np.uint8, mode='r')
+
+        return np.fromfile(object_path, dtype=np.uint8)
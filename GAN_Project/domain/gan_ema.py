@@ -0,0 +1,132 @@
+import os
+import json
+import math
+import tensorflow as tf
+from gan_config import config
+from .gan_models import Generator
+from .gan_checkpoints import CheckpointStore
+
+def warmup_steps(decay):
+
+    """
+    Returns the number of updates after which the warm-up of `update_ema` reaches `decay`.
+    """
+
+    return math.ceil((10 * decay - 1) / (1 - decay)) if decay < 1 else 0
+
+def attach_ema_step(ema, step=0):
+
+    """
+    Gives an EMA generator its own counter of updates, used by the warm-up of `update_ema`.
+
+    The counter belongs to the EMA rather than to the generator's optimizer, whose step count starts
+    again from 0 whenever it is rebuilt (on resume, at each progressive stage), and is saved with the
+    EMA weights. It is not a Keras weight, so the saved EMA generator keeps the generator's architecture.
+
+    Returns:
+        Generator: The same EMA generator.
+    """
+
+    ema.ema_step = tf.Variable(step, trainable=False, dtype=tf.int64, name="ema_step")
+
+    return ema
+
+def ema_step_path(ema_path):
+
+    """
+    Returns the file holding the update counter of an EMA generator saved as '.keras',
+    e.g. 'generator_epoch_1440_ema.json' for 'generator_epoch_1440_ema.keras'.
+    """
+
+    return os.path.splitext(ema_path)[0] + ".json"
+
+def save_ema_step(ema_path, ema):
+
+    with open(ema_step_path(ema_path), mode='w', encoding='UTF-8') as file:
+        json.dump({'ema_step': int(ema.ema_step.numpy())}, file)
+
+def create_ema_generator(generator):
+
+    """
+    Creates the exponential moving average (EMA) copy of a generator, starting from its current weights.
+
+    Args:
+        generator (Generator): The trained generator.
+
+    Returns:
+        Generator: A generator with the same architecture and weights.
+    """
+
+    # New generators are only built by their first call
+    noise = tf.zeros([1, config.training.latent_dim])
+    generator(noise, training=False)
+
+    ema = Generator.from_config(generator.get_config())
+    ema(noise, training=False)
+    ema.set_weights(generator.get_weights())
+
+    return attach_ema_step(ema)
+
+def update_ema(ema, generator, decay):
+
+    """
+    Moves the EMA generator's weights towards the generator's, inside the training step's graph.
+
+    Trainable weights are averaged; the others (BatchNorm statistics, fade-in factor) are copied.
+    The decay is lowered during the first steps, so that the average does not hold on to the
+    random initialization: decay_t = min(decay, (1 + t) / (10 + t)), t counting the updates of the
+    EMA itself (see `attach_ema_step`).
+
+    Args:
+        ema (Generator): The EMA generator, updated in place.
+        generator (Generator): The trained generator.
+        decay (float): Decay of the moving average, e.g. 0.999.
+    """
+
+    step = tf.cast(ema.ema_step.assign_add(1), tf.float32)
+    decay = tf.minimum(decay, (1.0 + step) / (10.0 + step))
+    trainable = {id(weight) for weight in generator.trainable_weights}
+
+    for ema_weight, weight in zip(ema.weights, generator.weights):
+        if id(weight) in trainable:
+            ema_weight.assign_sub((1.0 - decay) * (ema_weight - weight))
+        else:
+            ema_weight.assign(weight)
+
+def initialize_ema_generator(generator, resume_epoch):
+
+    """
+    Loads the EMA generator saved with the models training resumes from, or creates it.
+
+    The update counter saved with the EMA is restored, so its warm-up does not start over. An EMA
+    saved without one is taken as past its warm-up.
+
+    Args:
+        generator (Generator): The trained generator.
+        resume_epoch (int or None): The epoch training resumes from. If None, the EMA starts from `generator`.
+
+    Returns:
+        Generator: The EMA generator.
+    """
+
+    if resume_epoch is not None:
+        store = CheckpointStore()
+        default_step = warmup_steps(config.training.ema_decay)
+
+        if store.has(f"generator_epoch_{resume_epoch}_ema"):
+            name = f"generator_epoch_{resume_epoch}_ema"
+            step = store.read_manifest(name).get('ema_step', default_step)
+            print(f"EMA generator loaded from the checkpoint store at epoch {resume_epoch} ({step} updates)")
+            return attach_ema_step(store.load_model(name), step)
+
+        ema_path = os.path.join(config.paths.models_dir, f"generator_epoch_{resume_epoch}_ema.keras")
+        if os.path.exists(ema_path):
+            step = default_step
+            if os.path.exists(ema_step_path(ema_path)):
+                with open(ema_step_path(ema_path), mode='r', encoding='UTF-8') as file:
+                    step = json.load(file)['ema_step']
+            print(f"EMA generator loaded from {ema_path} ({step} updates)")
+            return attach_ema_step(tf.keras.models.load_model(ema_path), step)
+        print(f"No EMA generator saved at epoch {resume_epoch}, starting it from the generator.")
+
+    return create_ema_generator(generator)
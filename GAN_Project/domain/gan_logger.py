@@ -1,6 +1,9 @@
 import os
+import sqlite3
 from datetime import datetime
-from .config import *
+from gan_config import config
+
+STEP_COLUMNS = ("epoch", "step", "gen_loss", "disc_loss", "gen_step", "disc_step", "step_time", "images_per_s")
 
 def create_log_file():
 
@@ -12,7 +15,7 @@ def create_log_file():
     """
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file_path = os.path.join(logs_dir, f"log_{timestamp}.csv")
+    log_file_path = os.path.join(config.paths.logs_dir, f"log_{timestamp}.csv")
 
     with open(log_file_path, mode='w') as file:
         file.write("Timestamp,Epoch,Epoch_Duration,Gen_Loss_Avg,Disc_Loss_Avg\n")
@@ -36,4 +39,97 @@ def log_epoch_status(log_file_path, epoch, epoch_duration, loss_avg):
     print(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')} : Epoch {epoch + 1} completed in {epoch_duration:.2f} seconds with gen_loss={loss_avg['generator']:.4f} and disc_loss={loss_avg['discriminator']:.4f}.")
 
     with open(log_file_path, mode="a", encoding='UTF-8') as file:
-        file.write(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')},{epoch + 1},{epoch_duration:.2f},{loss_avg['generator']:.4f},{loss_avg['discriminator']:.4f}\n")
\ No newline at end of file
+        file.write(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')},{epoch + 1},{epoch_duration:.2f},{loss_avg['generator']:.4f},{loss_avg['discriminator']:.4f}\n")
+
+def get_step_log_path(log_file_path):
+
+    """
+    Returns the path of the per-step SQLite log paired with a CSV log file.
+
+    Args:
+        log_file_path (str): Path to the CSV log file.
+
+    Returns:
+        str: Path to the SQLite log file, e.g. 'log_YYYYMMDD_HHMMSS.sqlite'.
+    """
+
+    return os.path.splitext(log_file_path)[0] + ".sqlite"
+
+class StepLogger:
+
+    """
+    Buffers per-step training metrics in memory and flushes them in batches to SQLite.
+
+    Each record holds the epoch, the step index within the epoch, both losses, whether
+    the generator and discriminator were trained at that step, the step duration and
+    the throughput in images per second. Logging a step only appends a tuple to a list;
+    rows are written with a single transaction every `flush_every` steps and at the end of
+    each epoch (`train_gan` calls `flush`), and the database uses WAL journaling so
+    `monitoring` can read it while training is running.
+
+    Args:
+        log_file_path (str): Path to the CSV log file of the run; the SQLite file is created next to it.
+        flush_every (int): Number of buffered steps triggering a flush. Default is 1000.
+    """
+
+    def __init__(self, log_file_path, flush_every=1000):
+
+        self.path = get_step_log_path(log_file_path)
+        self.flush_every = flush_every
+        self._buffer = []
+
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS steps ("
+            "epoch INTEGER, step INTEGER, gen_loss REAL, disc_loss REAL, "
+            "gen_step INTEGER, disc_step INTEGER, step_time REAL, images_per_s REAL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS steps_epoch ON steps(epoch)")
+        self._connection.commit()
+
+    def log_step(self, epoch, step, losses, train_flags, step_time, batch_size):
+
+        """
+        Records the metrics of one training step.
+
+        Args:
+            epoch (int): Current epoch number (0-based, stored 1-based like the CSV log).
+            step (int): Index of the step within the epoch.
+            losses (dict): Generator and discriminator losses of the step, as floats.
+            train_flags (dict): Whether the generator and discriminator were trained at this step.
+            step_time (float): Duration of the step in seconds.
+            batch_size (int): Number of real images in the batch.
+        """
+
+        self._buffer.append((
+            epoch + 1, step, float(losses['generator']), float(losses['discriminator']),
+            int(train_flags['generator']), int(train_flags['discriminator']),
+            step_time, batch_size / step_time if step_time > 0 else 0.0
+        ))
+
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+
+        """
+        Writes the buffered steps to the database.
+        """
+
+        if not self._buffer:
+            return
+
+        with self._connection:
+            self._connection.executemany(f"INSERT INTO steps VALUES ({', '.join('?' * len(STEP_COLUMNS))})", self._buffer)
+        self._buffer = []
+
+    def close(self):
+
+        """
+        Flushes the remaining steps and closes the database.
+        """
+
+        self.flush()
+        self._connection.close()
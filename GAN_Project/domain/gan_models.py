@@ -1,7 +1,13 @@
 import os
+import numpy as np
 import tensorflow as tf
 from keras.saving import register_keras_serializable
-from .config import *
+from gan_config import config
+from .gan_architectures import build_layout
+from .gan_checkpoints import CheckpointStore
+
+# Architecture of the models saved before it became configurable, used to load them
+LEGACY_ARCHITECTURE = {'architecture': "dcgan", 'width': 1.0, 'image_size': (160, 128)}
 
 @register_keras_serializable()
 class Generator(tf.keras.Model):
@@ -9,34 +15,47 @@ class Generator(tf.keras.Model):
     """
     The Generator model for a GAN, which takes a latent vector as input 
     and produces a synthetic image as output.
+
+    Args:
+        architecture (str): Name of the architecture in `ARCHITECTURES`.
+        width (float): Multiplier applied to the number of channels of every layer.
+        image_size (tuple): (height, width) of the generated images.
+        fade_in (bool): Blends the output of the last block with the upsampled output of the
+            previous resolution, weighted by `alpha`, while the last block is faded in.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, architecture=LEGACY_ARCHITECTURE['architecture'], width=LEGACY_ARCHITECTURE['width'],
+                 image_size=LEGACY_ARCHITECTURE['image_size'], fade_in=False, **kwargs):
 
         super(Generator, self).__init__(**kwargs)
 
-        self.Dense_inputs = tf.keras.layers.Dense(5*4*1024, use_bias=False)
-        self.BatchNormalization_inputs = tf.keras.layers.BatchNormalization()
-        self.LeakyReLU_inputs = tf.keras.layers.LeakyReLU()
-        self.Reshape = tf.keras.layers.Reshape((5, 4, 1024))
+        self.architecture = architecture
+        self.width = width
+        self.image_size = tuple(image_size)
+        self.fade_in = fade_in
 
-        self.Conv2DTranspose_1 = tf.keras.layers.Conv2DTranspose(512, (5, 5), strides=(2, 2), padding="same", use_bias=False)
-        self.BatchNormalization_1 = tf.keras.layers.BatchNormalization()
-        self.LeakyReLU_1 = tf.keras.layers.LeakyReLU()
+        layout = build_layout(architecture, width, self.image_size)
+        kernel = (layout['generator_kernel'], layout['generator_kernel'])
+        self.n_blocks = len(layout['generator_channels'])
 
-        self.Conv2DTranspose_2 = tf.keras.layers.Conv2DTranspose(256, (5, 5), strides=(2, 2), padding="same", use_bias=False)
-        self.BatchNormalization_2 = tf.keras.layers.BatchNormalization()
-        self.LeakyReLU_2 = tf.keras.layers.LeakyReLU()
+        self.Dense_inputs = tf.keras.layers.Dense(int(np.prod(layout['seed_shape'])), use_bias=False)
+        self.BatchNormalization_inputs = tf.keras.layers.BatchNormalization()
+        self.LeakyReLU_inputs = tf.keras.layers.LeakyReLU()
+        self.Reshape = tf.keras.layers.Reshape(layout['seed_shape'])
 
-        self.Conv2DTranspose_3 = tf.keras.layers.Conv2DTranspose(128, (5, 5), strides=(2, 2), padding="same", use_bias=False)
-        self.BatchNormalization_3 = tf.keras.layers.BatchNormalization()
-        self.LeakyReLU_3 = tf.keras.layers.LeakyReLU()
+        # Layers are attributes named after their block, as in the models saved before
+        for i, channels in enumerate(layout['generator_channels'], start=1):
+            setattr(self, f"Conv2DTranspose_{i}", tf.keras.layers.Conv2DTranspose(channels, kernel, strides=(2, 2), padding="same", use_bias=False))
+            setattr(self, f"BatchNormalization_{i}", tf.keras.layers.BatchNormalization())
+            setattr(self, f"LeakyReLU_{i}", tf.keras.layers.LeakyReLU())
 
-        self.Conv2DTranspose_4 = tf.keras.layers.Conv2DTranspose(64, (5, 5), strides=(2, 2), padding="same", use_bias=False)
-        self.BatchNormalization_4 = tf.keras.layers.BatchNormalization()
-        self.LeakyReLU_4 = tf.keras.layers.LeakyReLU()
+        self.Conv2DTranspose_output= tf.keras.layers.Conv2DTranspose(3, kernel, strides=(2, 2), padding="same", use_bias=False, activation="tanh")
 
-        self.Conv2DTranspose_output= tf.keras.layers.Conv2DTranspose(3, (5, 5), strides=(2, 2), padding="same", use_bias=False, activation="tanh")
+        if fade_in:
+            # Output layer of the previous resolution, applied before the last block
+            self.Conv2DTranspose_output_previous = tf.keras.layers.Conv2DTranspose(3, kernel, strides=(2, 2), padding="same", use_bias=False, activation="tanh")
+            self.UpSampling_previous = tf.keras.layers.UpSampling2D((2, 2))
+            self.alpha = self.add_weight(name="alpha", shape=(), initializer="zeros", trainable=False)
 
     def call(self, inputs, training=False):
 
@@ -45,28 +64,23 @@ class Generator(tf.keras.Model):
         x = self.LeakyReLU_inputs(x)
         x = self.Reshape(x)
 
-        x = self.Conv2DTranspose_1(x)
-        x = self.BatchNormalization_1(x, training=training)
-        x = self.LeakyReLU_1(x)
-
-        x = self.Conv2DTranspose_2(x)
-        x = self.BatchNormalization_2(x, training=training)
-        x = self.LeakyReLU_2(x)
-
-        x = self.Conv2DTranspose_3(x)
-        x = self.BatchNormalization_3(x, training=training)
-        x = self.LeakyReLU_3(x)
-
-        x = self.Conv2DTranspose_4(x)
-        x = self.BatchNormalization_4(x, training=training)
-        x = self.LeakyReLU_4(x)
+        for i in range(1, self.n_blocks + 1):
+            if self.fade_in and i == self.n_blocks:
+                previous_output = self.UpSampling_previous(self.Conv2DTranspose_output_previous(x))
+            x = getattr(self, f"Conv2DTranspose_{i}")(x)
+            x = getattr(self, f"BatchNormalization_{i}")(x, training=training)
+            x = getattr(self, f"LeakyReLU_{i}")(x)
 
         output = self.Conv2DTranspose_output(x)
 
+        if self.fade_in:
+            output = self.alpha * output + (1.0 - self.alpha) * previous_output
+
         return output
 
     def get_config(self):
         config = super(Generator, self).get_config()
+        config.update({'architecture': self.architecture, 'width': self.width, 'image_size': list(self.image_size), 'fade_in': self.fade_in})
         return config
 
     @classmethod
@@ -79,48 +93,56 @@ class Discriminator(tf.keras.Model):
     """
     The Discriminator model for a GAN, which takes an image as input 
     and outputs a prediction of whether the image is real or fake.
+
+    Args:
+        architecture (str): Name of the architecture in `ARCHITECTURES`.
+        width (float): Multiplier applied to the number of channels of every layer.
+        image_size (tuple): (height, width) of the input images.
+        fade_in (bool): Blends the features of the first two blocks with those of the downsampled
+            image seen at the previous resolution, weighted by `alpha`, while the first block is faded in.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, architecture=LEGACY_ARCHITECTURE['architecture'], width=LEGACY_ARCHITECTURE['width'],
+                 image_size=LEGACY_ARCHITECTURE['image_size'], fade_in=False, **kwargs):
 
         super(Discriminator, self).__init__(**kwargs)
-        
-        self.Conv2_1 = tf.keras.layers.Conv2D(64, (5, 5), strides=(2, 2), padding="same")
-        self.LeakyReLU_1 = tf.keras.layers.LeakyReLU()
-        self.Dropout_1 = tf.keras.layers.Dropout(0.3)
 
-        self.Conv2_2 = tf.keras.layers.Conv2D(128, (5, 5), strides=(2, 2), padding="same")
-        self.LeakyReLU_2 = tf.keras.layers.LeakyReLU()
-        self.Dropout_2 = tf.keras.layers.Dropout(0.3)
+        self.architecture = architecture
+        self.width = width
+        self.image_size = tuple(image_size)
+        self.fade_in = fade_in
 
-        self.Conv2_3 = tf.keras.layers.Conv2D(256, (3, 3), strides=(2, 2), padding="same")
-        self.LeakyReLU_3 = tf.keras.layers.LeakyReLU()
-        self.Dropout_3 = tf.keras.layers.Dropout(0.3)
+        layout = build_layout(architecture, width, self.image_size)
+        self.n_blocks = len(layout['discriminator_channels'])
 
-        self.Conv2_4 = tf.keras.layers.Conv2D(512, (3, 3), strides=(2, 2), padding="same")
-        self.LeakyReLU_4 = tf.keras.layers.LeakyReLU()
-        self.Dropout_4 = tf.keras.layers.Dropout(0.3)    
+        for i, (channels, kernel) in enumerate(zip(layout['discriminator_channels'], layout['discriminator_kernels']), start=1):
+            setattr(self, f"Conv2_{i}", tf.keras.layers.Conv2D(channels, (kernel, kernel), strides=(2, 2), padding="same"))
+            setattr(self, f"LeakyReLU_{i}", tf.keras.layers.LeakyReLU())
+            setattr(self, f"Dropout_{i}", tf.keras.layers.Dropout(layout['dropout']))
 
         self.Flatten_output = tf.keras.layers.Flatten()
         self.Dense_output = tf.keras.layers.Dense(1)
 
+        if fade_in:
+            # Input layer of the previous resolution, applied to the downsampled image
+            channels, kernel = layout['discriminator_channels'][1], layout['discriminator_kernels'][1]
+            self.AveragePooling_previous = tf.keras.layers.AveragePooling2D((2, 2))
+            self.Conv2_previous = tf.keras.layers.Conv2D(channels, (kernel, kernel), strides=(2, 2), padding="same")
+            self.LeakyReLU_previous = tf.keras.layers.LeakyReLU()
+            self.alpha = self.add_weight(name="alpha", shape=(), initializer="zeros", trainable=False)
+
     def call(self, inputs, training=False):
         
-        x = self.Conv2_1(inputs)
-        x = self.LeakyReLU_1(x)
-        x = self.Dropout_1(x, training=training)
+        x = inputs
 
-        x = self.Conv2_2(x)
-        x = self.LeakyReLU_2(x)
-        x = self.Dropout_2(x, training=training)
+        for i in range(1, self.n_blocks + 1):
+            x = getattr(self, f"Conv2_{i}")(x)
+            x = getattr(self, f"LeakyReLU_{i}")(x)
+            x = getattr(self, f"Dropout_{i}")(x, training=training)
 
-        x = self.Conv2_3(x)
-        x = self.LeakyReLU_3(x)
-        x = self.Dropout_3(x, training=training)
-
-        x = self.Conv2_4(x)
-        x = self.LeakyReLU_4(x)
-        x = self.Dropout_4(x, training=training)
+            if self.fade_in and i == 2:
+                previous = self.LeakyReLU_previous(self.Conv2_previous(self.AveragePooling_previous(inputs)))
+                x = self.alpha * x + (1.0 - self.alpha) * previous
 
         x = self.Flatten_output(x)
         output = self.Dense_output(x)
@@ -129,23 +151,48 @@ class Discriminator(tf.keras.Model):
     
     def get_config(self):
         config = super(Discriminator, self).get_config()
+        config.update({'architecture': self.architecture, 'width': self.width, 'image_size': list(self.image_size), 'fade_in': self.fade_in})
         return config
 
     @classmethod
     def from_config(cls, config):
         return cls(**config)
 
+def build_models(architecture=None, width=None, image_size=None):
+
+    """
+    Builds a new Generator and Discriminator, by default with the architecture of the configuration.
+
+    Args:
+        architecture (str): Name of the architecture. Defaults to `ARCHITECTURE.NAME`.
+        width (float): Width multiplier. Defaults to `ARCHITECTURE.WIDTH`.
+        image_size (tuple): (height, width) of the images. Defaults to `IMAGE_SIZE`.
+
+    Returns:
+        dict: A dictionary containing the 'generator' and 'discriminator' models.
+    """
+
+    architecture = architecture or config.training.architecture_name
+    width = width or config.training.architecture_width
+    image_size = image_size or config.training.image_size
+
+    return {
+        'generator': Generator(architecture, width, image_size),
+        'discriminator': Discriminator(architecture, width, image_size)
+    }
 
-def initialize_models(resume_epoch):
+def initialize_models(resume_epoch, image_size=None):
 
     """
     Initializes the Generator and Discriminator models.
     
-    If `resume_epoch` is provided, it attempts to load pre-trained models from the models directory.
+    If `resume_epoch` is provided, it loads the models saved at that epoch from the checkpoint store,
+    or from the '.keras' files of the models directory.
     Otherwise, it creates new instances of Generator and Discriminator.
     
     Args:
         resume_epoch (int or None): The epoch to resume training from. If None, new models are created.
+        image_size (tuple): (height, width) of the images of new models. Defaults to `IMAGE_SIZE`.
     
     Returns:
         dict: A dictionary containing the 'generator' and 'discriminator' models.
@@ -154,17 +201,23 @@ def initialize_models(resume_epoch):
     if resume_epoch is None:
 
         print("Starting new training session...")
-        models = {
-            'generator': Generator(),
-            'discriminator': Discriminator()
-        }
+        models = build_models(image_size=image_size)
         
     else:
 
         print(f"Resuming training from epoch {resume_epoch}...")
         
-        generator_path = os.path.join(f".\{models_dir}", f"generator_epoch_{resume_epoch}.keras")
-        discriminator_path = os.path.join(f".\{models_dir}", f"discriminator_epoch_{resume_epoch}.keras")
+        store = CheckpointStore()
+        if store.has(f"generator_epoch_{resume_epoch}") and store.has(f"discriminator_epoch_{resume_epoch}"):
+            models = {
+                'generator': store.load_model(f"generator_epoch_{resume_epoch}"),
+                'discriminator': store.load_model(f"discriminator_epoch_{resume_epoch}")
+            }
+            print(f"Models loaded from the checkpoint store at epoch {resume_epoch}")
+            return models
+
+        generator_path = os.path.join(config.paths.models_dir, f"generator_epoch_{resume_epoch}.keras")
+        discriminator_path = os.path.join(config.paths.models_dir, f"discriminator_epoch_{resume_epoch}.keras")
 
         if os.path.exists(generator_path) and os.path.exists(discriminator_path):
             models = {
@@ -1,5 +1,5 @@
 import tensorflow as tf
-from .config import *
+from gan_config import config
 
 def initialize_optimizers(models, resume_epoch):
 
@@ -18,8 +18,8 @@ def initialize_optimizers(models, resume_epoch):
     """
 
     optimizers = {
-        'generator': tf.keras.optimizers.Adam(generator_learning_rate),
-        'discriminator': tf.keras.optimizers.Adam(discriminator_learning_rate)
+        'generator': tf.keras.optimizers.Adam(config.training.generator_learning_rate),
+        'discriminator': tf.keras.optimizers.Adam(config.training.discriminator_learning_rate)
     }
     
     if resume_epoch:
@@ -0,0 +1,154 @@
+import os
+from time import perf_counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import tensorflow as tf
+from gan_config import config
+
+# Stages of an epoch, in the order they appear in the summary
+STAGES = ("input_wait", "generator_step", "discriminator_step", "host_sync", "save_model", "save_images", "other")
+
+def profile_stage(profiler, name):
+
+    """
+    Returns a context manager timing a stage, or a no-op one if there is no profiler.
+    """
+
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+class TrainingProfiler:
+
+    """
+    Breaks the duration of each training epoch down into stages.
+
+    Stages are: waiting for the next batch of the tf.data pipeline, generator step,
+    discriminator step, host synchronization (the `.numpy()` calls reading the losses,
+    which wait for pending device work), model saving and image saving. The time not
+    covered by these stages is reported as 'other'.
+
+    A TensorFlow profiler trace can also be recorded over a window of epochs, to be
+    inspected in TensorBoard's Profile tab.
+
+    Args:
+        trace_epochs (tuple, optional): First and last epoch (1-based, inclusive) to trace, e.g. (3, 5).
+    """
+
+    def __init__(self, trace_epochs=None):
+
+        self.trace_epochs = trace_epochs
+        self.trace_dir = None
+        self._tracing = False
+        self.epochs = {}
+        self.steps = 0
+        self._current = None
+
+    def count_step(self):
+        self.steps += 1
+
+    @contextmanager
+    def stage(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._current[name] += perf_counter() - start
+
+    def start_epoch(self, epoch):
+
+        """
+        Starts timing an epoch, and the profiler trace if the epoch opens the trace window.
+
+        Args:
+            epoch (int): Current epoch number (0-based).
+        """
+
+        self._current = dict.fromkeys(STAGES, 0.0)
+
+        if self.trace_epochs and epoch + 1 == self.trace_epochs[0]:
+            self.trace_dir = os.path.join(config.paths.logs_dir, "profile", datetime.now().strftime("%Y%m%d_%H%M%S"))
+            tf.profiler.experimental.start(self.trace_dir)
+            self._tracing = True
+
+    def end_epoch(self, epoch, epoch_duration):
+
+        """
+        Stores the stage durations of an epoch, and stops the profiler trace at the end of the window.
+
+        Args:
+            epoch (int): Current epoch number (0-based).
+            epoch_duration (float): Wall-clock duration of the epoch in seconds, saving included.
+        """
+
+        self._current["other"] = max(0.0, epoch_duration - sum(self._current.values()))
+        self.epochs[epoch + 1] = self._current
+
+        if self.trace_epochs and epoch + 1 == self.trace_epochs[1]:
+            self.close()
+
+    def close(self):
+
+        """
+        Stops the profiler trace if it is still recording, e.g. when training ends inside the trace window.
+        """
+
+        if self._tracing:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+            print(f"Profiler trace saved to '{self.trace_dir}' (open it with TensorBoard).")
+
+    def summary(self):
+
+        """
+        Aggregates the stage durations over all profiled epochs.
+
+        Returns:
+            list: One dict per stage with the total (s), mean per epoch (s), mean per step (ms) and share (%).
+        """
+
+        totals = {stage: sum(epoch[stage] for epoch in self.epochs.values()) for stage in STAGES}
+        overall = sum(totals.values()) or 1.0
+        n_epochs = max(len(self.epochs), 1)
+        n_steps = max(self.steps, 1)
+
+        return [
+            {
+                'stage': stage,
+                'total_s': total,
+                'per_epoch_s': total / n_epochs,
+                'per_step_ms': total / n_steps * 1000,
+                'share_pct': total / overall * 100
+            }
+            for stage, total in totals.items()
+        ]
+
+    def print_summary(self):
+
+        """
+        Prints the stage breakdown as a table.
+        """
+
+        print(f"\n{'Stage':<20}{'Total s':>10}{'Epoch s':>10}{'Step ms':>10}{'Share %':>10}")
+        for row in self.summary():
+            print(f"{row['stage']:<20}{row['total_s']:>10.2f}{row['per_epoch_s']:>10.2f}{row['per_step_ms']:>10.1f}{row['share_pct']:>10.1f}")
+
+    def save(self, log_file_path):
+
+        """
+        Saves the per-epoch stage durations as a CSV file next to the training log.
+
+        Args:
+            log_file_path (str): Path to the CSV log file of the run ('log_YYYYMMDD_HHMMSS.csv').
+
+        Returns:
+            str: Path to the profile file ('profile_YYYYMMDD_HHMMSS.csv').
+        """
+
+        directory, name = os.path.split(log_file_path)
+        profile_path = os.path.join(directory, name.replace("log_", "profile_", 1))
+
+        with open(profile_path, mode='w', encoding='UTF-8') as file:
+            file.write("Epoch," + ",".join(STAGES) + "\n")
+            for epoch, stages in self.epochs.items():
+                file.write(f"{epoch}," + ",".join(f"{stages[stage]:.4f}" for stage in STAGES) + "\n")
+
+        return profile_path
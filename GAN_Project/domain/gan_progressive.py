@@ -0,0 +1,258 @@
+import tensorflow as tf
+from .gan_models import Generator, Discriminator
+from .gan_optimizers import initialize_optimizers
+from .data_loader import load_and_preprocess_dataset
+
+def transfer_weights(source, target, mapping):
+
+    """
+    Copies the weights of layers of a model into layers of another model.
+
+    Args:
+        source (tf.keras.Model): Model the weights are read from.
+        target (tf.keras.Model): Model the weights are written to. Both models must be built.
+        mapping (dict): Target layer attribute names mapped to source layer attribute names.
+    """
+
+    for target_name, source_name in mapping.items():
+        getattr(target, target_name).set_weights(getattr(source, source_name).get_weights())
+
+def generator_layers(generator):
+
+    """
+    Returns the attribute names of the generator's layers holding weights, except its output layer.
+    """
+
+    names = ['Dense_inputs', 'BatchNormalization_inputs']
+    for i in range(1, generator.n_blocks + 1):
+        names += [f"Conv2DTranspose_{i}", f"BatchNormalization_{i}"]
+
+    return names
+
+def rebuild(model, image_size, fade_in, mapping):
+
+    """
+    Builds a model of the same architecture at a resolution and copies weights of `model` into it.
+
+    The new model is run once on zeros to create its variables: the training steps are tf.functions
+    that have already been traced, so they cannot create them.
+
+    Args:
+        model (Generator or Discriminator): The trained model.
+        image_size (tuple): (height, width) of the new model.
+        fade_in (bool): Whether the new model fades in its outermost block.
+        mapping (dict): Layers of the new model mapped to layers of `model`, see `transfer_weights`.
+
+    Returns:
+        Generator or Discriminator: The new model.
+    """
+
+    rebuilt = type(model)(model.architecture, model.width, image_size, fade_in)
+
+    if isinstance(model, Generator):
+        rebuilt(tf.zeros([1, model.Dense_inputs.kernel.shape[0]]), training=False)
+    else:
+        rebuilt(tf.zeros([1, *image_size, 3]), training=False)
+
+    transfer_weights(model, rebuilt, mapping)
+
+    # The update counter of an EMA generator carries over to the rebuilt one
+    if hasattr(model, 'ema_step'):
+        rebuilt.ema_step = model.ema_step
+
+    return rebuilt
+
+def grow_models(models, image_size):
+
+    """
+    Builds models one resolution up, fading in their new blocks, and copies the trained weights into them.
+
+    The generators (trained and EMA) get a new block before their output layer, the previous output
+    layer being kept to render the previous resolution during the fade. The discriminator gets a new
+    block on the image side, the previous input layer being kept to read the downsampled image.
+
+    Args:
+        models (dict): Trained 'generator', 'discriminator' and optional 'generator_ema' at the
+            previous resolution, without fade.
+        image_size (tuple): (height, width) of the new resolution, twice the previous one.
+
+    Returns:
+        dict: The new models, with `alpha` at 0.
+    """
+
+    grown = {}
+
+    for name, model in models.items():
+        if isinstance(model, Generator):
+            mapping = {layer: layer for layer in generator_layers(model)}
+            mapping['Conv2DTranspose_output_previous'] = 'Conv2DTranspose_output'
+        else:
+            # Discriminator blocks move one position deeper, its first block becoming the faded-out input
+            mapping = {f"Conv2_{i + 1}": f"Conv2_{i}" for i in range(2, model.n_blocks + 1)}
+            mapping.update({'Conv2_previous': 'Conv2_1', 'Dense_output': 'Dense_output'})
+
+        grown[name] = rebuild(model, image_size, True, mapping)
+
+    return grown
+
+def complete_fade(models):
+
+    """
+    Replaces models whose new blocks are fully faded in by plain models with the same weights.
+
+    Returns:
+        dict: The models without the layers of the previous resolution.
+    """
+
+    completed = {}
+
+    for name, model in models.items():
+        if isinstance(model, Generator):
+            mapping = {layer: layer for layer in generator_layers(model) + ['Conv2DTranspose_output']}
+        else:
+            mapping = {f"Conv2_{i}": f"Conv2_{i}" for i in range(1, model.n_blocks + 1)}
+            mapping['Dense_output'] = 'Dense_output'
+
+        completed[name] = rebuild(model, model.image_size, False, mapping)
+
+    return completed
+
+class ProgressiveSchedule:
+
+    """
+    Schedule of progressive-resolution training.
+
+    Training starts at the first resolution for `stage_epochs` epochs. Each following resolution
+    is faded in over `fade_epochs` epochs, then trained for `stage_epochs` epochs. Training then
+    continues at the last resolution.
+
+    Args:
+        resolutions (list): (height, width) of each stage, each twice the previous one.
+        stage_epochs (int): Epochs trained at each resolution once its blocks are faded in.
+        fade_epochs (int): Epochs over which the blocks of a new resolution are faded in.
+
+    Raises:
+        ValueError: If a resolution is not twice the previous one.
+    """
+
+    def __init__(self, resolutions, stage_epochs, fade_epochs):
+
+        self.resolutions = [tuple(resolution) for resolution in resolutions]
+        self.stage_epochs = stage_epochs
+        self.fade_epochs = fade_epochs
+
+        for previous, resolution in zip(self.resolutions, self.resolutions[1:]):
+            if resolution != (previous[0] * 2, previous[1] * 2):
+                raise ValueError(f"Progressive resolutions must double at each stage, got {previous} then {resolution}.")
+
+    def stage(self, epoch):
+
+        """
+        Returns the stage of an epoch.
+
+        Args:
+            epoch (int): Epoch number (0-based).
+
+        Returns:
+            tuple: (index of the resolution, True while its blocks are faded in)
+        """
+
+        if epoch < self.stage_epochs:
+            return 0, False
+
+        epoch -= self.stage_epochs
+        for index in range(1, len(self.resolutions)):
+            if epoch < self.fade_epochs:
+                return index, True
+            epoch -= self.fade_epochs
+            if epoch < self.stage_epochs:
+                return index, False
+            epoch -= self.stage_epochs
+
+        return len(self.resolutions) - 1, False
+
+class ProgressiveTraining:
+
+    """
+    Switches models, optimizers and dataset as training moves through a `ProgressiveSchedule`,
+    and raises `alpha` at each step of a fade.
+
+    Args:
+        schedule (ProgressiveSchedule): The resolution schedule.
+        batch_size (int): Number of images per batch.
+        dataset_threads (int, optional): Threads of the input pipeline.
+    """
+
+    def __init__(self, schedule, batch_size, dataset_threads=None):
+
+        self.schedule = schedule
+        self.batch_size = batch_size
+        self.dataset_threads = dataset_threads
+        self.models = None
+        self._stage = None
+        self._fade_steps = 1
+        self._step = 0
+
+    def update(self, epoch, models, optimizers, dataset):
+
+        """
+        Prepares an epoch, growing or completing the models when it starts a new stage.
+
+        Args:
+            epoch (int): Epoch number (0-based).
+            models (dict): Current 'generator' and 'discriminator'.
+            optimizers (dict): Current optimizers.
+            dataset (tf.data.Dataset or None): Current dataset, None before the first epoch.
+
+        Returns:
+            tuple: (models, optimizers, dataset) to train the epoch with.
+
+        Raises:
+            ValueError: If the models do not match the resolution of the epoch's stage.
+        """
+
+        index, fading = self.schedule.stage(epoch)
+        resolution = self.schedule.resolutions[index]
+
+        if self._stage is None:
+            # First epoch of the run, possibly resumed in the middle of the schedule
+            if fading or models['generator'].image_size != resolution:
+                raise ValueError(f"Epoch {epoch + 1} trains at {resolution}{' while fading in' if fading else ''}, "
+                                 f"which models at {models['generator'].image_size} cannot resume.")
+            dataset = load_and_preprocess_dataset(self.batch_size, self.dataset_threads, resolution, cache=True)
+
+        elif (index, fading) != self._stage:
+            if fading:
+                print(f"Growing models to {resolution[0]}x{resolution[1]}...")
+                models = grow_models(models, resolution)
+                dataset = load_and_preprocess_dataset(self.batch_size, self.dataset_threads, resolution, cache=True)
+                self._fade_steps = max(1, self.schedule.fade_epochs * max(1, int(dataset.cardinality())))
+                self._step = 0
+            else:
+                print(f"Blocks at {resolution[0]}x{resolution[1]} faded in.")
+                models = complete_fade(models)
+
+            # The tf.functions of the training steps are already traced, so the optimizers are built here
+            optimizers = initialize_optimizers(models, None)
+            for name, optimizer in optimizers.items():
+                optimizer.build(models[name].trainable_variables)
+
+        self._stage = (index, fading)
+        self.models = models
+
+        return models, optimizers, dataset
+
+    def step(self):
+
+        """
+        Raises `alpha` linearly over the steps of a fade. Does nothing outside of a fade.
+        """
+
+        if not self.models['generator'].fade_in:
+            return
+
+        self._step += 1
+        alpha = min(1.0, self._step / self._fade_steps)
+
+        for model in self.models.values():
+            model.alpha.assign(alpha)
@@ -0,0 +1,73 @@
+import tensorflow as tf
+
+class RejectionSampler(tf.Module):
+
+    """
+    Generator keeping only the samples its discriminator finds the most realistic.
+
+    For n requested images, ceil(n / acceptance_rate) latent vectors are generated in one batch,
+    scored by the discriminator in the same batch, and the n best scored images are returned.
+    The generator, the discriminator and the selection are traced into a single graph, so a call
+    costs one batched forward pass of each model.
+
+    Called like a generator, so that it can be served, warmed up and used by `generate_image`.
+
+    Args:
+        generator (Generator): The generator.
+        discriminator (Discriminator): The discriminator saved with the generator.
+        acceptance_rate (float): Default fraction of the generated candidates that is kept, in (0, 1].
+    """
+
+    def __init__(self, generator, discriminator, acceptance_rate):
+
+        super().__init__(name="rejection_sampler")
+
+        if tuple(generator.image_size) != tuple(discriminator.image_size):
+            raise ValueError(f"Generator and discriminator resolutions differ: {generator.image_size} and {discriminator.image_size}.")
+
+        self.generator = generator
+        self.discriminator = discriminator
+        self.acceptance_rate = check_acceptance_rate(acceptance_rate)
+        self.image_size = generator.image_size
+
+    @tf.function(input_signature=[
+        tf.TensorSpec(shape=[None, None], dtype=tf.float32),
+        tf.TensorSpec(shape=[], dtype=tf.float32)
+    ])
+    def sample(self, noise, acceptance_rate):
+
+        """
+        Returns the `len(noise)` best scored images among the images of `noise` and additional random latents.
+        """
+
+        n_images = tf.shape(noise)[0]
+        n_candidates = tf.cast(tf.math.ceil(tf.cast(n_images, tf.float32) / acceptance_rate), tf.int32)
+
+        extra_noise = tf.random.normal([n_candidates - n_images, tf.shape(noise)[1]])
+        candidates = self.generator(tf.concat([noise, extra_noise], axis=0), training=False)
+
+        scores = tf.reshape(self.discriminator(candidates, training=False), [-1])
+        _, selected = tf.math.top_k(scores, k=n_images)
+
+        return tf.gather(candidates, selected)
+
+    def __call__(self, noise, training=False, acceptance_rate=None):
+
+        acceptance_rate = self.acceptance_rate if acceptance_rate is None else check_acceptance_rate(acceptance_rate)
+
+        return self.sample(tf.convert_to_tensor(noise, dtype=tf.float32), tf.constant(acceptance_rate, dtype=tf.float32))
+
+def check_acceptance_rate(acceptance_rate):
+
+    """
+    Checks that an acceptance rate is in (0, 1].
+
+    Raises:
+        ValueError: If it is not.
+    """
+
+    acceptance_rate = float(acceptance_rate)
+    if not 0 < acceptance_rate <= 1:
+        raise ValueError(f"The acceptance rate must be in (0, 1], got {acceptance_rate}.")
+
+    return acceptance_rate
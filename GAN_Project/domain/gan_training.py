@@ -1,24 +1,32 @@
 from time import time
 import numpy as np
 import tensorflow as tf
-from .config import *
+from gan_config import config
 from .data_loader import load_and_preprocess_dataset
 from .gan_models import initialize_models
 from .gan_losses import generator_loss, discriminator_loss
 from .gan_optimizers import initialize_optimizers
-from .gan_logger import create_log_file, log_epoch_status
+from .gan_logger import create_log_file, log_epoch_status, StepLogger
+from .gan_profiler import TrainingProfiler, profile_stage
+from .gan_autotune import get_tuned_settings
+from .gan_progressive import ProgressiveSchedule, ProgressiveTraining
+from .gan_ema import initialize_ema_generator, update_ema
+from .gan_augment import create_augmentation
 from .gan_utils import save_images, save_model
 
 @tf.function
-def train_generator_step(models, optimizers, noise):
+def train_generator_step(models, optimizers, noise, augmentation=None):
 
     """
     Performs a single training step for the Generator.
 
+    If the models hold a 'generator_ema', its weights are then moved towards the generator's.
+
     Args:
-        models (dict): Dictionary containing 'generator' and 'discriminator' models.
+        models (dict): Dictionary containing 'generator' and 'discriminator' models, and optionally 'generator_ema'.
         optimizers (dict): Dictionary containing optimizers for generator and discriminator.
         noise (tf.Tensor): Random noise used as input for the generator.
+        augmentation (AdaptiveAugment or None): Augmentation of the images seen by the discriminator.
     
     Returns:
         tf.Tensor: Loss for the generator.
@@ -30,6 +38,8 @@ def train_generator_step(models, optimizers, noise):
 
     with tf.GradientTape() as gen_tape:
         generated_images = generator(noise, training=True)
+        if augmentation is not None:
+            generated_images = augmentation(generated_images)
         fake_output = discriminator(generated_images, training=True)
         
         gen_loss = generator_loss(fake_output)
@@ -37,10 +47,13 @@ def train_generator_step(models, optimizers, noise):
     gradients_of_generator = gen_tape.gradient(gen_loss, generator.trainable_variables)
     generator_optimizer.apply_gradients(zip(gradients_of_generator, generator.trainable_variables))
 
+    if 'generator_ema' in models:
+        update_ema(models['generator_ema'], generator, config.training.ema_decay)
+
     return gen_loss
 
 @tf.function
-def train_discriminator_step(models, optimizers, images, noise):
+def train_discriminator_step(models, optimizers, images, noise, augmentation=None):
 
     """
     Performs a single training step for the Discriminator.
@@ -50,6 +63,8 @@ def train_discriminator_step(models, optimizers, images, noise):
         optimizers (dict): Dictionary containing optimizers for generator and discriminator.
         images (tf.Tensor): Real images from the dataset.
         noise (tf.Tensor): Random noise used to generate fake images.
+        augmentation (AdaptiveAugment or None): Augmentation of the real and generated images,
+            whose probability is then adapted to the discriminator's outputs on the real images.
     
     Returns:
         tf.Tensor: Loss for the discriminator.
@@ -61,6 +76,9 @@ def train_discriminator_step(models, optimizers, images, noise):
 
     with tf.GradientTape() as disc_tape:
         generated_images = generator(noise, training=True)
+        if augmentation is not None:
+            images = augmentation(images)
+            generated_images = augmentation(generated_images)
         real_output = discriminator(images, training=True)
         fake_output = discriminator(generated_images, training=True)
         
@@ -69,9 +87,12 @@ def train_discriminator_step(models, optimizers, images, noise):
     gradients_of_discriminator = disc_tape.gradient(disc_loss, discriminator.trainable_variables)
     discriminator_optimizer.apply_gradients(zip(gradients_of_discriminator, discriminator.trainable_variables))
 
+    if augmentation is not None:
+        augmentation.update(real_output)
+
     return disc_loss
 
-def train_step(images, batch_size, models, train_flags, previous_losses, optimizers):
+def train_step(images, batch_size, models, train_flags, previous_losses, optimizers, profiler=None, augmentation=None):
 
     """
     Executes one training step for both Generator and Discriminator.
@@ -83,21 +104,29 @@ def train_step(images, batch_size, models, train_flags, previous_losses, optimiz
         train_flags (dict): Flags to determine if generator or discriminator should be trained.
         previous_losses (dict): Previous epoch's generator and discriminator loss.
         optimizers (dict): Dictionary containing optimizers for generator and discriminator.
+        profiler (TrainingProfiler or None): Profiler timing the generator and discriminator steps.
+        augmentation (AdaptiveAugment or None): Augmentation of the images seen by the discriminator.
     
     Returns:
         dict: Dictionary containing generator and discriminator losses.
     """
 
-    noise = tf.random.normal([batch_size, latent_dim])
+    noise = tf.random.normal([batch_size, config.training.latent_dim])
     
-    losses = {
-        'generator': train_generator_step(models, optimizers, noise) if train_flags['generator'] else previous_losses['generator'],
-        'discriminator': train_discriminator_step(models, optimizers, images, noise) if train_flags['discriminator'] else previous_losses['discriminator']
-    }
+    losses = dict(previous_losses)
+
+    if train_flags['generator']:
+        with profile_stage(profiler, 'generator_step'):
+            losses['generator'] = train_generator_step(models, optimizers, noise, augmentation)
+
+    if train_flags['discriminator']:
+        with profile_stage(profiler, 'discriminator_step'):
+            losses['discriminator'] = train_discriminator_step(models, optimizers, images, noise, augmentation)
 
     return losses
 
-def train_one_epoch(dataset, batch_size, models, train_flags, previous_losses, optimizers):
+def train_one_epoch(dataset, batch_size, models, train_flags, previous_losses, optimizers, epoch=0, step_logger=None, profiler=None, progressive_training=None,
+                    augmentation=None):
 
     """
     Trains the Generator and Discriminator for one epoch.
@@ -109,6 +138,11 @@ def train_one_epoch(dataset, batch_size, models, train_flags, previous_losses, o
         train_flags (dict): Flags to determine if generator or discriminator should be trained.
         previous_losses (dict): Previous epoch's generator and discriminator loss.
         optimizers (dict): Dictionary containing optimizers for generator and discriminator.
+        epoch (int): Current epoch number, recorded with each step.
+        step_logger (StepLogger or None): Logger receiving per-step metrics. If None, steps are not logged.
+        profiler (TrainingProfiler or None): Profiler timing input wait, training steps and host syncs.
+        progressive_training (ProgressiveTraining or None): Raises the fade-in of new blocks after each step.
+        augmentation (AdaptiveAugment or None): Augmentation of the images seen by the discriminator.
     
     Returns:
         tuple: (average losses for generator and discriminator, last batch losses)
@@ -120,13 +154,37 @@ def train_one_epoch(dataset, batch_size, models, train_flags, previous_losses, o
     }
     batch_count = 0
 
-    threshold = train_ratio_threshold
+    threshold = config.training.train_ratio_threshold
+
+    with profile_stage(profiler, 'input_wait'):
+        iterator = iter(dataset)
+
+    while True:
+        with profile_stage(profiler, 'input_wait'):
+            image_batch = next(iterator, None)
+        if image_batch is None:
+            break
 
-    for image_batch in dataset:
-        losses = train_step(image_batch, batch_size, models, train_flags, previous_losses, optimizers)
+        step_start = time()
+        step_flags = dict(train_flags)
+
+        losses = train_step(image_batch, batch_size, models, train_flags, previous_losses, optimizers, profiler, augmentation)
         previous_losses = losses
 
-        gen_loss_np, disc_loss_np = (loss.numpy() for loss in (losses['generator'], losses['discriminator']))
+        with profile_stage(profiler, 'host_sync'):
+            gen_loss_np, disc_loss_np = (loss.numpy() for loss in (losses['generator'], losses['discriminator']))
+
+        if profiler is not None:
+            profiler.count_step()
+
+        if progressive_training is not None:
+            progressive_training.step()
+
+        if step_logger is not None:
+            step_logger.log_step(
+                epoch, batch_count, {'generator': gen_loss_np, 'discriminator': disc_loss_np},
+                step_flags, time() - step_start, image_batch.shape[0]
+            )
         epsilon = 1e-8
         train_ratio = (gen_loss_np - disc_loss_np) / max(gen_loss_np, disc_loss_np, epsilon)
 
@@ -148,46 +206,121 @@ def train_one_epoch(dataset, batch_size, models, train_flags, previous_losses, o
 
     return losses_avg, previous_losses
 
-def train_gan(epochs, batch_size, resume_epoch=None):
+def train_gan(epochs, batch_size=None, resume_epoch=None, trace_epochs=None, autotune=False, progressive=False,
+              dataset_pool=None, epoch_callback=None):
 
     """
     Trains the GAN model for a specified number of epochs.
 
     Args:
         epochs (int): Total number of epochs to train.
-        batch_size (int): Number of samples per batch.
+        batch_size (int or None): Number of samples per batch. May only be None with `autotune`.
         resume_epoch (int or None): The epoch to resume training from. If None, training starts from scratch.
+        trace_epochs (tuple or None): First and last epoch (1-based, inclusive) to record a TensorFlow 
+            profiler trace for, e.g. (3, 5). If None, no trace is recorded.
+        autotune (bool): Uses the batch size and thread settings calibrated for this host, calibrating
+            them on the first run. An explicit `batch_size` takes precedence over the tuned one.
+        progressive (bool): Starts at low resolution and fades in higher-resolution blocks following
+            the `PROGRESSIVE` schedule of the configuration, up to `IMAGE_SIZE`.
+        dataset_pool (GrowingDataset or None): Trains on a processed data directory that preprocessing
+            is still filling, waiting for its minimum pool size and picking up new images at each epoch.
+            Any object with the same `wait` and `update` methods can provide the dataset, e.g. a `CachedDataset`.
+        epoch_callback (callable or None): Called after each epoch as `epoch_callback(epoch, loss_avg, models)`.
+            Training stops early if it returns True.
     
     Returns:
         None
+
+    Raises:
+        ValueError: If no batch size is given without autotune, or if the progressive schedule
+            does not end at `IMAGE_SIZE`.
     """
 
-    models = initialize_models(resume_epoch)
+    dataset_threads = None
+
+    # Waited for first, so that autotune calibrates the input pipeline on the available images
+    if dataset_pool is not None:
+        dataset_pool.wait()
+
+    if autotune:
+        # Must run before any TensorFlow operation, for the thread settings to be applied
+        settings = get_tuned_settings()
+        batch_size = batch_size or settings['batch_size']
+        dataset_threads = settings['dataset_threads']
+    elif batch_size is None:
+        raise ValueError("batch_size is required unless autotune is enabled.")
+
+    progressive_training = None
+
+    if progressive:
+        schedule = ProgressiveSchedule(config.progressive.resolutions, config.progressive.stage_epochs, config.progressive.fade_epochs)
+        if schedule.resolutions[-1] != config.training.image_size:
+            raise ValueError(f"The progressive schedule ends at {schedule.resolutions[-1]} instead of IMAGE_SIZE {config.training.image_size}.")
+        progressive_training = ProgressiveTraining(schedule, batch_size, dataset_threads)
+        models = initialize_models(resume_epoch, schedule.resolutions[0])
+    else:
+        models = initialize_models(resume_epoch)
+
+    if config.training.ema_decay:
+        models['generator_ema'] = initialize_ema_generator(models['generator'], resume_epoch)
 
     train_flags = {'generator': True, 'discriminator': True}
     
     last_losses = {}
 
     optimizers = initialize_optimizers(models, resume_epoch)
+    augmentation = create_augmentation()
 
-    dataset = load_and_preprocess_dataset(batch_size)
+    # Progressive training loads the dataset at the resolution of each stage, a growing pool at each epoch
+    dataset = load_and_preprocess_dataset(batch_size, dataset_threads) if progressive_training is None and dataset_pool is None else None
 
     log_file = create_log_file()
+    step_logger = StepLogger(log_file)
+    profiler = TrainingProfiler(trace_epochs)
 
     start_epoch = resume_epoch if resume_epoch is not None else 0
 
-    for epoch in range(start_epoch, start_epoch + epochs):  
-        start = time()
-
-        loss_avg, last_losses = train_one_epoch(
-            dataset, batch_size, models, train_flags, last_losses, optimizers
-        ) 
-
-        epoch_duration = time() - start
-        log_epoch_status(log_file, epoch, epoch_duration, loss_avg)
-
-        if (epoch+1) % models_save_interval == 0:
-            save_model(epoch, models)
-
-        if (epoch+1) % images_save_interval == 0:
-            save_images(epoch, models)
\ No newline at end of file
+    try:
+        for epoch in range(start_epoch, start_epoch + epochs):  
+            start = time()
+            profiler.start_epoch(epoch)
+
+            if progressive_training is not None:
+                models, optimizers, dataset = progressive_training.update(epoch, models, optimizers, dataset)
+
+            if dataset_pool is not None:
+                with profiler.stage('input_wait'):
+                    dataset = dataset_pool.update(dataset, batch_size, dataset_threads, models['generator'].image_size,
+                                                  cache=progressive_training is not None)
+
+            loss_avg, last_losses = train_one_epoch(
+                dataset, batch_size, models, train_flags, last_losses, optimizers, epoch, step_logger, profiler, progressive_training,
+                augmentation
+            ) 
+
+            epoch_duration = time() - start
+            log_epoch_status(log_file, epoch, epoch_duration, loss_avg)
+            step_logger.flush()
+            if augmentation is not None and augmentation.adaptive:
+                print(f"Augmentation probability: {float(augmentation.probability.numpy()):.3f} "
+                      f"(E[sign(D(real))] = {float(augmentation.real_sign.numpy()):.3f})")
+
+            if (epoch+1) % config.save_intervals.models == 0:
+                with profiler.stage('save_model'):
+                    save_model(epoch, models)
+
+            if (epoch+1) % config.save_intervals.images == 0:
+                with profiler.stage('save_images'):
+                    save_images(epoch, models)
+
+            profiler.end_epoch(epoch, time() - start)
+
+            if epoch_callback is not None and epoch_callback(epoch, loss_avg, models):
+                print(f"Training stopped early after epoch {epoch + 1}.")
+                break
+    finally:
+        step_logger.close()
+        profiler.close()
+
+    profiler.print_summary()
+    profiler.save(log_file)
\ No newline at end of file
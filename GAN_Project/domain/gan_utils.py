@@ -1,7 +1,8 @@
 import os
-import matplotlib.pyplot as plt
 import tensorflow as tf
-from .config import *
+from gan_config import config
+from .gan_checkpoints import CheckpointStore
+from .gan_ema import save_ema_step
 
 def save_images(epoch, models):
 
@@ -13,12 +14,15 @@ def save_images(epoch, models):
         models (dict): Dictionary containing 'generator' and 'discriminator' models.
     """
 
+    # Imported on first use, only image saving needs matplotlib
+    import matplotlib.pyplot as plt
+
     generator = models['generator']
 
     fig, axes = plt.subplots(4, 4, figsize=(6, 7))
     fig.subplots_adjust(wspace=0.02, hspace=0.01)
 
-    noise = tf.random.normal([16, latent_dim]) 
+    noise = tf.random.normal([16, config.training.latent_dim]) 
     generated_images = generator(noise, training=False)  
 
     for i, ax in enumerate(axes.flat):
@@ -30,24 +34,42 @@ def save_images(epoch, models):
         ax.imshow(generated_image)
         ax.axis("off")  
 
-    image_path = os.path.join(images_dir, f"epoch_{epoch + 1}.png")
+    image_path = os.path.join(config.paths.images_dir, f"epoch_{epoch + 1}.png")
     fig.savefig(image_path, bbox_inches="tight", dpi=200)
 
 def save_model(epoch, models):
 
     """
-    Saves the Generator and Discriminator models to the models directory.
+    Saves the Generator and Discriminator models to the models directory, and the EMA generator if any.
+
+    With the 'store' checkpoint format, the weights are added to the deduplicating checkpoint store
+    (see `CheckpointStore`); with 'keras', each model is saved to its own '.keras' file.
     
     Args:
         epoch (int): The current training epoch.
         models (dict): Dictionary containing 'generator' and 'discriminator' models.
+
+    Raises:
+        ValueError: If the checkpoint format is unknown.
     """
 
+    if config.checkpoints.format == "store":
+        CheckpointStore().save(epoch + 1, models)
+        return
+
+    if config.checkpoints.format != "keras":
+        raise ValueError(f"Unknown checkpoint format '{config.checkpoints.format}', expected 'store' or 'keras'.")
+
     generator = models['generator']
     discriminator = models['discriminator']
 
-    generator_path = os.path.join(models_dir, f"generator_epoch_{epoch + 1}.keras")
+    generator_path = os.path.join(config.paths.models_dir, f"generator_epoch_{epoch + 1}.keras")
     generator.save(generator_path)
-    discriminator_path = os.path.join(models_dir, f"discriminator_epoch_{epoch + 1}.keras")
+    discriminator_path = os.path.join(config.paths.models_dir, f"discriminator_epoch_{epoch + 1}.keras")
     discriminator.save(discriminator_path)
 
+    if 'generator_ema' in models:
+        ema_path = os.path.join(config.paths.models_dir, f"generator_epoch_{epoch + 1}_ema.keras")
+        models['generator_ema'].save(ema_path)
+        save_ema_step(ema_path, models['generator_ema'])
+
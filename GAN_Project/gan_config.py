@@ -0,0 +1,519 @@
+"""
+Configuration of the project, shared by the `infrastructure`, `domain` and `application` packages.
+
+`config/config.json` is read once per process, on first access to `config`, and exposed as typed,
+read-only sections: `config.paths.models_dir`, `config.training.latent_dim`, ...
+
+- Paths are resolved against the directory of the configuration file, so the code runs from any
+  working directory. Each directory is only created the first time it is read.
+- `GAN_CONFIG` selects another configuration file.
+- `GAN__<SECTION>__<KEY>=<value>` environment variables override single values, parsed as JSON
+  (e.g. `GAN__TRAINING__LATENT_DIM=64`, `GAN__TRAINING__ARCHITECTURE__NAME=dcgan_light`).
+- `configure` applies overrides from code or the command line. They are exported to the
+  environment, so processes started afterwards (joblib workers, autotune probes) inherit them.
+"""
+
+import os
+import sys
+import json
+import importlib
+from dataclasses import dataclass
+from contextlib import contextmanager
+from functools import lru_cache
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG_PATH = os.path.join(PROJECT_DIR, 'config', 'config.json')
+
+CONFIG_ENV = "GAN_CONFIG"
+OVERRIDE_PREFIX = "GAN__"
+
+@lru_cache(maxsize=None)
+def ensure_dir(path):
+
+    """
+    Creates a directory if needed, once per process.
+    """
+
+    os.makedirs(path, exist_ok=True)
+
+    return path
+
+def lazy_module(name, exports):
+
+    """
+    Builds the module-level `__getattr__` and `__dir__` of a package whose exports are imported on first access.
+
+    Args:
+        name (str): Name of the package, i.e. its `__name__`.
+        exports (dict): Maps each exported name to the relative module defining it, e.g. {'train_gan': '.gan_training'}.
+
+    Returns:
+        tuple: (`__getattr__`, `__dir__`) functions to assign in the package.
+    """
+
+    module = sys.modules[name]
+
+    def __getattr__(attribute):
+        if attribute not in exports:
+            raise AttributeError(f"module {name!r} has no attribute {attribute!r}")
+        value = getattr(importlib.import_module(exports[attribute], name), attribute)
+        setattr(module, attribute, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(module)) | set(exports))
+
+    return __getattr__, __dir__
+
+@dataclass(frozen=True)
+class PathsConfig:
+
+    """
+    Absolute paths of the data, model, image and log directories, created when first read,
+    and of the near-duplicate index.
+    """
+
+    raw_data_dir: str
+    additional_raw_data_dir: str
+    processed_data_dir: str
+    models_dir: str
+    images_dir: str
+    logs_dir: str
+    dedupe_index: str
+    features_dir: str
+    sweeps_dir: str
+
+    def __getattribute__(self, name):
+
+        value = object.__getattribute__(self, name)
+        if name.endswith('_dir'):
+            ensure_dir(value)
+
+        return value
+
+@dataclass(frozen=True)
+class SaveIntervalsConfig:
+
+    models: int
+    images: int
+
+@dataclass(frozen=True)
+class TrainingConfig:
+
+    image_size: tuple
+    latent_dim: int
+    train_ratio_threshold: float
+    ema_decay: float
+    architecture_name: str
+    architecture_width: float
+    generator_learning_rate: float
+    discriminator_learning_rate: float
+
+@dataclass(frozen=True)
+class AugmentationConfig:
+
+    policy: tuple
+    adaptive: bool
+    probability: float
+    target: float
+    adjust_images: int
+    max_probability: float
+
+@dataclass(frozen=True)
+class CheckpointsConfig:
+
+    format: str
+    float16: bool
+    compression_level: int
+    chunk_size_mb: float
+
+@dataclass(frozen=True)
+class ProgressiveConfig:
+
+    resolutions: tuple
+    stage_epochs: int
+    fade_epochs: int
+
+@dataclass(frozen=True)
+class ServingConfig:
+
+    host: str
+    port: int
+    threads: int
+    inference_workers: int
+    queue_size: int
+    request_timeout: float
+    max_resident_models: int
+    model_watch_interval: float
+    use_ema: bool
+    acceptance_rate: float
+
+@dataclass(frozen=True)
+class WalkConfig:
+
+    interpolation: str
+    frames_per_seed: int
+    chunk_size: int
+    duration: int
+    max_seeds: int
+    max_frames: int
+    request_timeout: float
+
+@dataclass(frozen=True)
+class PipelineConfig:
+
+    min_pool_size: int
+    preprocess_jobs: int
+    poll_interval: float
+
+@dataclass(frozen=True)
+class DedupeConfig:
+
+    enabled: bool
+    max_distance: int
+
+@dataclass(frozen=True)
+class MemorizationConfig:
+
+    feature_size: tuple
+    top_k: int
+    threshold: float
+    batch_size: int
+    block_size: int
+
+@dataclass(frozen=True)
+class SweepConfig:
+
+    max_parallel: int
+    threads_per_trial: int
+    patience: int
+    warmup_epochs: int
+    min_discriminator_loss: float
+    max_loss: float
+    min_diversity: float
+    stall_tolerance: float
+
+@dataclass(frozen=True)
+class AutotuneConfig:
+
+    batch_sizes: tuple
+    memory_fraction: float
+    calibration_steps: int
+    probe_timeout: float
+
+@dataclass(frozen=True)
+class Config:
+
+    """
+    Configuration loaded from a file, see `load_config`.
+    """
+
+    path: str
+    paths: PathsConfig
+    save_intervals: SaveIntervalsConfig
+    training: TrainingConfig
+    augmentation: AugmentationConfig
+    checkpoints: CheckpointsConfig
+    progressive: ProgressiveConfig
+    serving: ServingConfig
+    walk: WalkConfig
+    pipeline: PipelineConfig
+    dedupe: DedupeConfig
+    memorization: MemorizationConfig
+    sweep: SweepConfig
+    autotune: AutotuneConfig
+
+def parse_value(value):
+
+    """
+    Parses an override value as JSON, or keeps it as a string (e.g. `dcgan_light`).
+    """
+
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+def apply_overrides(values, overrides):
+
+    """
+    Replaces values of the raw configuration in place.
+
+    Args:
+        values (dict): Content of the configuration file.
+        overrides (dict): New values, by dotted key (e.g. 'TRAINING.LATENT_DIM', case-insensitive).
+
+    Raises:
+        KeyError: If a key is not in the configuration file.
+    """
+
+    for key, value in overrides.items():
+        *sections, name = key.upper().split('.')
+        node = values
+        for section in sections:
+            node = node.get(section) if isinstance(node, dict) else None
+        if not isinstance(node, dict) or name not in node:
+            raise KeyError(f"Unknown configuration key '{key}'.")
+        node[name] = value
+
+def environment_overrides():
+
+    """
+    Returns the overrides set by `GAN__<SECTION>__<KEY>` environment variables, by dotted key.
+    """
+
+    return {
+        key[len(OVERRIDE_PREFIX):].replace('__', '.'): parse_value(value)
+        for key, value in os.environ.items() if key.startswith(OVERRIDE_PREFIX)
+    }
+
+def load_config(path=DEFAULT_CONFIG_PATH, overrides=None):
+
+    """
+    Reads a configuration file. Unlike `config`, the result is not cached.
+
+    Args:
+        path (str): Path of the JSON configuration file.
+        overrides (dict, optional): Values replacing those of the file, see `apply_overrides`.
+
+    Returns:
+        Config: The configuration.
+    """
+
+    path = os.path.abspath(path)
+
+    # 1️⃣ Load configuration file
+    with open(path, 'r', encoding='UTF-8') as file:
+        values = json.load(file)
+    apply_overrides(values, overrides or {})
+
+    # 2️⃣ Resolve paths against the configuration file
+    config_dir = os.path.dirname(path)
+    paths = {name: os.path.normpath(os.path.join(config_dir, value)) for name, value in values['PATHS'].items()}
+
+    training = values['TRAINING']
+    serving = values['SERVING']
+
+    return Config(
+        path=path,
+        # 3️⃣ Extract paths
+        paths=PathsConfig(
+            raw_data_dir=paths['RAW_DATA'],
+            additional_raw_data_dir=paths['ADDITIONAL_RAW_DATA'],
+            processed_data_dir=paths['PROCESSED_DATA'],
+            models_dir=paths['MODELS_DIR'],
+            images_dir=paths['IMAGES_DIR'],
+            logs_dir=paths['LOGS'],
+            dedupe_index=paths['DEDUPE_INDEX'],
+            features_dir=paths['FEATURES_DIR'],
+            sweeps_dir=paths['SWEEPS_DIR']
+        ),
+        # 4️⃣ Extract save intervals
+        save_intervals=SaveIntervalsConfig(
+            models=values['SAVE_INTERVALS']['MODELS'],
+            images=values['SAVE_INTERVALS']['IMAGES']
+        ),
+        # 5️⃣ Extract training parameters, learning rates and augmentation
+        training=TrainingConfig(
+            image_size=tuple(training['IMAGE_SIZE']),
+            latent_dim=training['LATENT_DIM'],
+            train_ratio_threshold=training['TRAIN_RATIO_THRESHOLD'],
+            ema_decay=training['EMA_DECAY'],
+            architecture_name=training['ARCHITECTURE']['NAME'],
+            architecture_width=training['ARCHITECTURE']['WIDTH'],
+            generator_learning_rate=training['LEARNING_RATES']['GENERATOR'],
+            discriminator_learning_rate=training['LEARNING_RATES']['DISCRIMINATOR']
+        ),
+        augmentation=AugmentationConfig(
+            policy=tuple(values['AUGMENTATION']['POLICY']),
+            adaptive=values['AUGMENTATION']['ADAPTIVE'],
+            probability=values['AUGMENTATION']['PROBABILITY'],
+            target=values['AUGMENTATION']['TARGET'],
+            adjust_images=values['AUGMENTATION']['ADJUST_IMAGES'],
+            max_probability=values['AUGMENTATION']['MAX_PROBABILITY']
+        ),
+        # 6️⃣ Extract checkpoint parameters
+        checkpoints=CheckpointsConfig(
+            format=values['CHECKPOINTS']['FORMAT'],
+            float16=values['CHECKPOINTS']['FLOAT16'],
+            compression_level=values['CHECKPOINTS']['COMPRESSION_LEVEL'],
+            chunk_size_mb=values['CHECKPOINTS']['CHUNK_SIZE_MB']
+        ),
+        # 7️⃣ Extract progressive training parameters
+        progressive=ProgressiveConfig(
+            resolutions=tuple(tuple(resolution) for resolution in values['PROGRESSIVE']['RESOLUTIONS']),
+            stage_epochs=values['PROGRESSIVE']['STAGE_EPOCHS'],
+            fade_epochs=values['PROGRESSIVE']['FADE_EPOCHS']
+        ),
+        # 8️⃣ Extract serving and latent walk parameters
+        serving=ServingConfig(
+            host=serving['HOST'],
+            port=serving['PORT'],
+            threads=serving['SERVER_THREADS'],
+            inference_workers=serving['INFERENCE_WORKERS'],
+            queue_size=serving['QUEUE_SIZE'],
+            request_timeout=serving['REQUEST_TIMEOUT'],
+            max_resident_models=serving['MAX_RESIDENT_MODELS'],
+            model_watch_interval=serving['MODEL_WATCH_INTERVAL'],
+            use_ema=serving['USE_EMA'],
+            acceptance_rate=serving['ACCEPTANCE_RATE']
+        ),
+        walk=WalkConfig(
+            interpolation=values['WALK']['INTERPOLATION'],
+            frames_per_seed=values['WALK']['FRAMES_PER_SEED'],
+            chunk_size=values['WALK']['CHUNK_SIZE'],
+            duration=values['WALK']['DURATION'],
+            max_seeds=values['WALK']['MAX_SEEDS'],
+            max_frames=values['WALK']['MAX_FRAMES'],
+            request_timeout=values['WALK']['REQUEST_TIMEOUT']
+        ),
+        # 9️⃣ Extract data pipeline and data quality parameters
+        pipeline=PipelineConfig(
+            min_pool_size=values['PIPELINE']['MIN_POOL_SIZE'],
+            preprocess_jobs=values['PIPELINE']['PREPROCESS_JOBS'],
+            poll_interval=values['PIPELINE']['POLL_INTERVAL']
+        ),
+        dedupe=DedupeConfig(
+            enabled=values['DEDUPE']['ENABLED'],
+            max_distance=values['DEDUPE']['MAX_DISTANCE']
+        ),
+        memorization=MemorizationConfig(
+            feature_size=tuple(values['MEMORIZATION']['FEATURE_SIZE']),
+            top_k=values['MEMORIZATION']['TOP_K'],
+            threshold=values['MEMORIZATION']['THRESHOLD'],
+            batch_size=values['MEMORIZATION']['BATCH_SIZE'],
+            block_size=values['MEMORIZATION']['BLOCK_SIZE']
+        ),
+        # 🔟 Extract sweep and autotune parameters
+        sweep=SweepConfig(
+            max_parallel=values['SWEEP']['MAX_PARALLEL'],
+            threads_per_trial=values['SWEEP']['THREADS_PER_TRIAL'],
+            patience=values['SWEEP']['PATIENCE'],
+            warmup_epochs=values['SWEEP']['WARMUP_EPOCHS'],
+            min_discriminator_loss=values['SWEEP']['MIN_DISCRIMINATOR_LOSS'],
+            max_loss=values['SWEEP']['MAX_LOSS'],
+            min_diversity=values['SWEEP']['MIN_DIVERSITY'],
+            stall_tolerance=values['SWEEP']['STALL_TOLERANCE']
+        ),
+        autotune=AutotuneConfig(
+            batch_sizes=tuple(values['AUTOTUNE']['BATCH_SIZES']),
+            memory_fraction=values['AUTOTUNE']['MEMORY_FRACTION'],
+            calibration_steps=values['AUTOTUNE']['CALIBRATION_STEPS'],
+            probe_timeout=values['AUTOTUNE']['PROBE_TIMEOUT']
+        )
+    )
+
+_config = None
+
+def get_config():
+
+    """
+    Returns the configuration of the process, loading it on the first call.
+    """
+
+    global _config
+
+    if _config is None:
+        _config = load_config(os.environ.get(CONFIG_ENV, DEFAULT_CONFIG_PATH), environment_overrides())
+
+    return _config
+
+def configure(path=None, overrides=None):
+
+    """
+    Selects the configuration file and overrides values, for this process and the processes it starts.
+
+    Values already read by running code (e.g. built models) are not affected.
+
+    Args:
+        path (str, optional): Configuration file. Defaults to the current one.
+        overrides (dict, optional): New values by dotted key, e.g. {'TRAINING.LATENT_DIM': 64}.
+
+    Returns:
+        Config: The new configuration.
+
+    Raises:
+        KeyError: If an overridden key is not in the configuration file.
+    """
+
+    global _config
+
+    path = os.path.abspath(path) if path else os.environ.get(CONFIG_ENV, DEFAULT_CONFIG_PATH)
+    overrides = {key.upper(): value for key, value in (overrides or {}).items()}
+
+    # Loaded before the environment is changed, so an invalid key leaves it untouched
+    config = load_config(path, {**environment_overrides(), **overrides})
+
+    os.environ[CONFIG_ENV] = path
+    for key, value in overrides.items():
+        os.environ[OVERRIDE_PREFIX + key.replace('.', '__')] = json.dumps(value)
+    _config = config
+
+    return config
+
+@contextmanager
+def override(overrides=None, path=None):
+
+    """
+    Applies `configure` within a `with` block, restoring the previous configuration afterwards.
+    """
+
+    global _config
+
+    keys = [CONFIG_ENV] + [OVERRIDE_PREFIX + key.upper().replace('.', '__') for key in (overrides or {})]
+    environ = {key: os.environ.get(key) for key in keys}
+    previous = _config
+
+    try:
+        yield configure(path, overrides)
+    finally:
+        for key, value in environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        _config = previous
+
+def add_config_arguments(parser):
+
+    """
+    Adds the --config and --set options to a command line parser, see `configure_from_args`.
+    """
+
+    parser.add_argument("--config", help=f"Configuration file (default: ${CONFIG_ENV} or config/config.json)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a configuration value, e.g. --set TRAINING.LATENT_DIM=64 (repeatable)")
+
+def configure_from_args(parser, args):
+
+    """
+    Applies the --config and --set options parsed by a parser prepared with `add_config_arguments`.
+    """
+
+    overrides = {}
+    for item in args.set:
+        key, separator, value = item.partition('=')
+        if not separator:
+            parser.error(f"--set expects KEY=VALUE, got '{item}'")
+        overrides[key] = parse_value(value)
+
+    try:
+        return configure(args.config, overrides)
+    except KeyError as error:
+        parser.error(error.args[0])
+
+class ConfigProxy:
+
+    """
+    The configuration of the process, loaded on first attribute access (see `get_config`).
+    """
+
+    def __getattr__(self, name):
+
+        return getattr(get_config(), name)
+
+    def __repr__(self):
+
+        return repr(get_config())
+
+config = ConfigProxy()
@@ -1,5 +1,16 @@
-from .data_loader import data_load_transform
+from gan_config import lazy_module
+
+# joblib, requests and rembg are only imported once `data_load_transform` is first accessed
+_lazy_exports = {
+    "data_load_transform": ".data_loader",
+    "BackgroundPreprocessing": ".data_loader",
+    "dedupe_processed_data": ".dedupe"
+}
 
 __all__ = [
-    "data_load_transform"
-]
\ No newline at end of file
+    "data_load_transform",
+    "BackgroundPreprocessing",
+    "dedupe_processed_data"
+]
+
+__getattr__, __dir__ = lazy_module(__name__, _lazy_exports)
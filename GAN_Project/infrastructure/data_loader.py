@@ -1,11 +1,36 @@
 import os
+import threading
 from joblib import Parallel, delayed
 from .download import download_and_extract_celeba
 from .transform import process_image
+from .dedupe import HashIndex, publish_image
 from .image_selector import select_images
-from .config import *
+from gan_config import config
 
-def process_additional_images(n_jobs):
+def process_images(images, input_folder, n_jobs, index=None):
+
+    """
+    Processes images, publishing each one as soon as it is ready.
+
+    With a hash index, the hash of each processed image is computed by its worker and looked up
+    by this process, which discards the near-duplicates before they reach the processed data directory.
+    Without one, images are published by the workers and no hash is computed.
+    """
+
+    publish = index is None
+
+    if n_jobs == 1:
+        results = (process_image(image, input_folder, publish) for image in images)
+    else:
+        results = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+            delayed(process_image)(image, input_folder, publish) for image in images
+        )
+
+    for output_path, image_hash in results:
+        if index is not None:
+            publish_image(output_path + ".tmp", output_path, image_hash, index)
+
+def process_additional_images(n_jobs, index=None):
 
     """
     Processes additional images placed in the additional data folder.
@@ -13,34 +38,26 @@ def process_additional_images(n_jobs):
 
     
 
-    additional_images = [img for img in os.listdir(additional_raw_data_dir) if img.endswith(('jpg', 'png', 'jpeg'))]
+    additional_images = [img for img in os.listdir(config.paths.additional_raw_data_dir) if img.endswith(('jpg', 'png', 'jpeg'))]
 
     print(f"Processing {len(additional_images)} additional images...")
 
-    if n_jobs == 1:
-        for image in additional_images:
-            process_image(image, input_folder=additional_raw_data_dir)
-    else:    
-        Parallel(n_jobs=n_jobs)(delayed(process_image)(image, input_folder=additional_raw_data_dir) for image in additional_images)
+    process_images(additional_images, config.paths.additional_raw_data_dir, n_jobs, index)
 
 
-def process_celeba_images(n_jobs, selected_images):
+def process_celeba_images(n_jobs, selected_images, index=None):
     
     """
     Processes additional images placed in the additional data folder.
     """
 
-    selected_images_dir = os.path.join(raw_data_dir, 'img_align_celeba', 'img_align_celeba')
+    selected_images_dir = os.path.join(config.paths.raw_data_dir, 'img_align_celeba', 'img_align_celeba')
 
     print(f"Processing {len(selected_images)} additional images...")
 
-    if n_jobs == 1:
-        for image in selected_images:
-            process_image(image, input_folder=selected_images_dir)
-    else:    
-        Parallel(n_jobs=n_jobs)(delayed(process_image)(image, input_folder=selected_images_dir) for image in selected_images)
+    process_images(selected_images, selected_images_dir, n_jobs, index)
 
-def data_load_transform(n_image=500, n_jobs=-1):
+def data_load_transform(n_image=500, n_jobs=-1, dedupe=None):
 
     """
     Orchestrates the entire pipeline: downloads data, selects images, processes them.
@@ -48,6 +65,8 @@ def data_load_transform(n_image=500, n_jobs=-1):
     Args:
         n_image (int): Number of images to process.
         n_jobs (int): Number of parallel jobs (-1 for all available cores, 1 for sequential).
+        dedupe (bool, optional): Skips the near-duplicates of already processed images, using the
+            perceptual hash index (see `infrastructure.dedupe`). Defaults to `DEDUPE.ENABLED`.
     """
 
     print("Starting pipeline execution...")
@@ -59,10 +78,77 @@ def data_load_transform(n_image=500, n_jobs=-1):
     selected_images = select_images(n_image)
     print(f"Selected {len(selected_images)} images to process.")
 
-    # Process celeba images
-    process_celeba_images(n_jobs, selected_images)
+    dedupe = config.dedupe.enabled if dedupe is None else dedupe
+    index = HashIndex() if dedupe else None
+
+    try:
+        # Process celeba images
+        process_celeba_images(n_jobs, selected_images, index)
 
-    # Process additional images
-    process_additional_images(n_jobs)
+        # Process additional images
+        process_additional_images(n_jobs, index)
+    finally:
+        if index is not None:
+            print(f"{len(index.duplicates())} near-duplicates in the index.")
+            index.close()
 
     print("Pipeline successfully executed.")
+
+
+class BackgroundPreprocessing:
+
+    """
+    Runs `data_load_transform` in a background thread, so that training can start on the first
+    processed images. Images are published one by one in the processed data directory.
+
+    Args:
+        n_image (int): Number of images to process.
+        n_jobs (int): Number of parallel jobs (-1 for all available cores, 1 for sequential).
+    """
+
+    def __init__(self, n_image=500, n_jobs=-1):
+
+        self.n_image = n_image
+        self.n_jobs = n_jobs
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="preprocessing", daemon=True)
+
+    def _run(self):
+
+        try:
+            data_load_transform(self.n_image, self.n_jobs)
+        except Exception as e:
+            self.error = e
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def is_done(self):
+
+        """
+        Returns True once preprocessing has finished.
+
+        Raises:
+            RuntimeError: If preprocessing failed.
+        """
+
+        if self._thread.is_alive():
+            return False
+
+        if self.error is not None:
+            raise RuntimeError(f"Preprocessing failed: {self.error}") from self.error
+
+        return True
+
+    def join(self):
+
+        """
+        Waits for the end of preprocessing.
+
+        Raises:
+            RuntimeError: If preprocessing failed.
+        """
+
+        self._thread.join()
+        self.is_done()
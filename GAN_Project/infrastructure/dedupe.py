@@ -0,0 +1,252 @@
+import os
+import sqlite3
+from functools import lru_cache
+import numpy as np
+from PIL import Image
+from gan_config import config
+
+HASH_SIZE = 8
+HIGHFREQ_FACTOR = 4
+
+@lru_cache(maxsize=None)
+def dct_matrix(size):
+
+    """
+    Returns the orthonormal DCT-II matrix of a given size.
+    """
+
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+
+    return matrix
+
+def perceptual_hash(image):
+
+    """
+    Computes the 64-bit perceptual hash (pHash) of an image.
+
+    The image is reduced to 32x32 grayscale and transformed with a 2D DCT. Each of the 8x8 lowest
+    frequencies gives one bit, set if it is above their median. Resizing, recompression or small
+    colour changes flip few bits, so near-duplicates are a small Hamming distance apart.
+
+    Args:
+        image (PIL.Image.Image): The image.
+
+    Returns:
+        int: The hash, as an unsigned 64-bit integer.
+    """
+
+    size = HASH_SIZE * HIGHFREQ_FACTOR
+    pixels = np.asarray(image.convert("L").resize((size, size), Image.LANCZOS), dtype=np.float64)
+
+    matrix = dct_matrix(size)
+    frequencies = (matrix @ pixels @ matrix.T)[:HASH_SIZE, :HASH_SIZE]
+    bits = (frequencies > np.median(frequencies)).flatten()
+
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+class BKTree:
+
+    """
+    Burkhard-Keller tree of hashes, for the search of all hashes within a Hamming distance.
+
+    Each node keeps its children by their distance to it. By the triangle inequality, a search within
+    `radius` of a query at distance `d` of a node only has to visit the children at distances
+    `d - radius` to `d + radius`, which prunes most of the tree for small radiuses.
+    """
+
+    def __init__(self):
+
+        self.root = None
+        self.size = 0
+
+    def add(self, image_hash, name):
+
+        """
+        Adds a hash, with the name of its image.
+        """
+
+        node = [image_hash, name, {}]
+        self.size += 1
+
+        if self.root is None:
+            self.root = node
+            return
+
+        current = self.root
+        while True:
+            distance = hamming_distance(image_hash, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, image_hash, radius):
+
+        """
+        Finds the hashes within a Hamming distance of a hash.
+
+        Returns:
+            list: (distance, name) of the matches, closest first.
+        """
+
+        matches = []
+        candidates = [self.root] if self.root is not None else []
+
+        while candidates:
+            node_hash, name, children = candidates.pop()
+            distance = hamming_distance(image_hash, node_hash)
+            if distance <= radius:
+                matches.append((distance, name))
+            candidates.extend(child for d, child in children.items() if distance - radius <= d <= distance + radius)
+
+        return sorted(matches)
+
+class HashIndex:
+
+    """
+    Persistent index of the perceptual hashes of the processed images, for near-duplicate detection.
+
+    Hashes are stored in a SQLite file together with the image they duplicate, if any, and loaded
+    into a `BKTree` of the kept images when the index is opened. New images are only compared with
+    the tree, so deduplication stays incremental as images are added, without rescanning the corpus.
+
+    Args:
+        path (str, optional): SQLite file of the index. Defaults to `PATHS.DEDUPE_INDEX`.
+        max_distance (int, optional): Largest Hamming distance (out of 64 bits) at which two images
+            are considered near-duplicates. Defaults to `DEDUPE.MAX_DISTANCE`.
+    """
+
+    def __init__(self, path=None, max_distance=None):
+
+        self.path = path or config.paths.dedupe_index
+        self.max_distance = config.dedupe.max_distance if max_distance is None else max_distance
+        self.tree = BKTree()
+        self.names = {}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes (name TEXT PRIMARY KEY, hash TEXT NOT NULL, duplicate_of TEXT)"
+        )
+
+        for name, image_hash, duplicate_of in self.connection.execute("SELECT name, hash, duplicate_of FROM hashes"):
+            self.names[name] = duplicate_of
+            if duplicate_of is None:
+                self.tree.add(int(image_hash, 16), name)
+
+    def find_duplicate(self, image_hash, name=None):
+
+        """
+        Returns the name of the closest kept image within `max_distance` of a hash, other than `name`, or None.
+        """
+
+        for _, match in self.tree.search(image_hash, self.max_distance):
+            if match != name:
+                return match
+
+        return None
+
+    def add(self, name, image_hash):
+
+        """
+        Records the hash of a new processed image.
+
+        An image already indexed under the same name (e.g. processed again) keeps its previous status.
+
+        Returns:
+            str or None: Name of the kept image it duplicates, or None if it is kept.
+        """
+
+        if name in self.names:
+            return self.names[name]
+
+        duplicate_of = self.find_duplicate(image_hash, name)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO hashes (name, hash, duplicate_of) VALUES (?, ?, ?)", (name, f"{image_hash:016x}", duplicate_of)
+            )
+
+        self.names[name] = duplicate_of
+        if duplicate_of is None:
+            self.tree.add(image_hash, name)
+
+        return duplicate_of
+
+    def duplicates(self):
+
+        """
+        Returns the near-duplicates found so far, mapped to the kept image they duplicate.
+        """
+
+        return {name: duplicate_of for name, duplicate_of in self.names.items() if duplicate_of is not None}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def publish_image(staged_path, output_path, image_hash, index=None):
+
+    """
+    Moves a processed image staged by `process_image` into the processed data directory,
+    unless it is a near-duplicate of an image already there, in which case it is discarded.
+
+    Returns:
+        bool: True if the image was published.
+    """
+
+    duplicate_of = index.add(os.path.basename(output_path), image_hash) if index is not None else None
+
+    if duplicate_of is not None:
+        os.remove(staged_path)
+        print(f"Near-duplicate skipped: {os.path.basename(output_path)} (of {duplicate_of})", flush=True)
+        return False
+
+    os.replace(staged_path, output_path)
+
+    return True
+
+def dedupe_processed_data(remove=False):
+
+    """
+    Indexes the processed images missing from the hash index, e.g. those processed before it existed.
+
+    Only images whose name is not in the index are read, so repeated runs are cheap.
+
+    Args:
+        remove (bool): Deletes the near-duplicates found from the processed data directory.
+
+    Returns:
+        dict: Near-duplicates found among the newly indexed images, mapped to the image they duplicate.
+    """
+
+    processed_data_dir = config.paths.processed_data_dir
+    found = {}
+
+    with HashIndex() as index:
+        for name in sorted(os.listdir(processed_data_dir)):
+            if not name.lower().endswith(".png") or name in index.names:
+                continue
+
+            with Image.open(os.path.join(processed_data_dir, name)) as image:
+                duplicate_of = index.add(name, perceptual_hash(image))
+
+            if duplicate_of is not None:
+                found[name] = duplicate_of
+                if remove:
+                    os.remove(os.path.join(processed_data_dir, name))
+
+    print(f"{len(found)} near-duplicates found{' and removed' if remove else ''}.")
+
+    return found
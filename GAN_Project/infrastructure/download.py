@@ -1,7 +1,7 @@
 import os
 import zipfile
 import requests
-from .config import *
+from gan_config import config
 
 def is_data_present():
 
@@ -18,7 +18,7 @@ def is_data_present():
     ]
 
     for file in required_files:
-        if not os.path.exists(os.path.join(raw_data_dir, file)):
+        if not os.path.exists(os.path.join(config.paths.raw_data_dir, file)):
             return False
 
     return True
@@ -32,8 +32,8 @@ def download_and_extract_celeba():
     dataset_url = "https://www.kaggle.com/api/v1/datasets/download/jessicali9530/celeba-dataset"
 
 
-    zip_file_path = os.path.join(raw_data_dir, "celeba-dataset.zip")
-    os.makedirs(raw_data_dir, exist_ok=True)
+    zip_file_path = os.path.join(config.paths.raw_data_dir, "celeba-dataset.zip")
+    os.makedirs(config.paths.raw_data_dir, exist_ok=True)
 
 
     if not is_data_present():
@@ -47,10 +47,10 @@ def download_and_extract_celeba():
 
             print("Extracting files...")
             with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
-                zip_ref.extractall(raw_data_dir)
+                zip_ref.extractall(config.paths.raw_data_dir)
 
             os.remove(zip_file_path)
-            print(f"Data has been extracted to: {raw_data_dir}")
+            print(f"Data has been extracted to: {config.paths.raw_data_dir}")
         else:
             print(f"Error during download. HTTP Status: {response.status_code}")
     else:
@@ -1,7 +1,5 @@
 import os
-import pandas as pd
-import numpy as np
-from .config import *
+from gan_config import config
 
 def select_images(n_images=20000):
     
@@ -9,7 +7,10 @@ def select_images(n_images=20000):
     Selects and returns a list of images to be processed based on landmark data.
     """
 
-    df = pd.read_csv(os.path.join(raw_data_dir, "list_landmarks_align_celeba.csv"), sep=",")
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(os.path.join(config.paths.raw_data_dir, "list_landmarks_align_celeba.csv"), sep=",")
     df.set_index("image_id", inplace=True)
 
     df_normalized = (df - df.mean(axis=0)) / df.std(axis=0)
@@ -1,19 +1,32 @@
 import sys
 import os
 from PIL import Image
-from rembg import remove
-from .config import *
+from gan_config import config
+from .dedupe import perceptual_hash
 
-def process_image(file, input_folder):
+def process_image(file, input_folder, publish=True):
 
     """
     Processes a single image by removing the background and resizing it.
+
+    Args:
+        file (str): Name of the image.
+        input_folder (str): Folder of the image.
+        publish (bool): Moves the image to the processed data directory. Otherwise it is left at
+            the returned path + '.tmp', for the caller to publish or discard (see `publish_image`).
+
+    Returns:
+        tuple: (path of the processed image, its perceptual hash if it is left for the caller to
+            publish, None otherwise)
     """
 
-    image_shape = tuple(image_size)[::-1]
+    # Imported on first use, rembg pulls in onnxruntime and its models
+    from rembg import remove
+
+    image_shape = config.training.image_size[::-1]
 
     input_path = os.path.join(input_folder, file)
-    output_path = os.path.join(processed_data_dir, file[:-3] + "png")
+    output_path = os.path.join(config.paths.processed_data_dir, file[:-3] + "png")
 
     image = Image.open(input_path)
     image = image.convert("RGBA")
@@ -21,6 +34,12 @@ def process_image(file, input_folder):
     output_image = remove(image, bgcolor=(54, 99, 4, 255))
     output_image = output_image.resize(image_shape, Image.LANCZOS)
 
-    output_image.save(output_path)
+    # Written under a temporary name first, so training never reads a partially written image
+    output_image.save(output_path + ".tmp", format="PNG")
+    if publish:
+        os.replace(output_path + ".tmp", output_path)
     print(f"Processed image: {file}" , flush=True)
-    sys.stdout.flush()
\ No newline at end of file
+    sys.stdout.flush()
+
+    # The hash is only needed to deduplicate the images the caller publishes
+    return output_path, None if publish else perceptual_hash(output_image)
\ No newline at end of file
@@ -0,0 +1,49 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gan_config import override
+
+@pytest.fixture
+def tiny_config(tmp_path):
+
+    """
+    Points every path of the configuration to a temporary directory and shrinks the models.
+    """
+
+    paths = {
+        "PATHS.RAW_DATA": "raw_data", "PATHS.ADDITIONAL_RAW_DATA": "raw_additional_data",
+        "PATHS.PROCESSED_DATA": "processed_data", "PATHS.MODELS_DIR": "saved_models",
+        "PATHS.IMAGES_DIR": "generated_images", "PATHS.LOGS": "logs",
+        "PATHS.DEDUPE_INDEX": "dedupe_index.sqlite", "PATHS.FEATURES_DIR": "features",
+        "PATHS.SWEEPS_DIR": "sweeps"
+    }
+
+    with override({
+        **{key: str(tmp_path / value) for key, value in paths.items()},
+        "TRAINING.ARCHITECTURE.WIDTH": 0.25,
+        "TRAINING.IMAGE_SIZE": [40, 32],
+        "PROGRESSIVE.RESOLUTIONS": [[20, 16], [40, 32]]
+    }):
+        yield tmp_path
+
+@pytest.fixture
+def probes(tiny_config, monkeypatch):
+
+    """
+    Replaces the probe processes by a fixed throughput and memory for each batch size, and leaves
+    the thread settings of the test process alone.
+    """
+
+    from domain import gan_autotune
+
+    def run_probe(batch_size, intra_op=0, inter_op=0, steps=3):
+        return {'images_per_s': 10.0 * batch_size + intra_op, 'peak_memory_mb': 1.0}
+
+    monkeypatch.setattr(gan_autotune, 'run_probe', run_probe)
+    monkeypatch.setattr(gan_autotune, 'thread_candidates', lambda: [(0, 0), (1, 1)])
+    monkeypatch.setattr(gan_autotune, 'apply_thread_settings', lambda intra_op, inter_op: True)
+
+    return tiny_config
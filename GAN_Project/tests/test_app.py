@@ -0,0 +1,92 @@
+import io
+import os
+import threading
+import pytest
+import tensorflow as tf
+from PIL import Image
+from gan_config import config, override
+from domain.gan_models import build_models
+from application.app import create_app
+
+@pytest.fixture
+def app(tiny_config):
+
+    with override({"CHECKPOINTS.FORMAT": "keras", "WALK.MAX_SEEDS": 10, "WALK.MAX_FRAMES": 100}):
+        generator = build_models()['generator']
+        generator(tf.zeros([1, config.training.latent_dim]))
+        generator.save(os.path.join(config.paths.models_dir, "generator_epoch_1.keras"))
+
+        app = create_app(max_workers=1, queue_size=0, watch=False)
+        yield app
+        app.extensions['gan']['executor'].shutdown()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_walk_is_rendered_as_gif(client):
+
+    response = client.get("/walk?seeds=1,2,3&frames=4&loop=true")
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/gif"
+    assert response.headers['X-Seeds'] == "1,2,3"
+    assert Image.open(io.BytesIO(response.data)).n_frames == 12
+
+@pytest.mark.parametrize("query", [
+    "seeds=1",
+    "seeds=1,a",
+    "seeds=-1,2",
+    f"seeds=0,{2**32}",
+    "seeds=" + ",".join(map(str, range(11))),
+    "seeds=1,2&frames=0",
+    "seeds=1,2&frames=200",
+    "seeds=1,2&width=1",
+    "seeds=1,2&interpolation=cubic",
+    "seeds=1,2&format=avi",
+    "seeds=1,2&model=../config.json"
+])
+def test_invalid_walk_is_rejected(client, query):
+
+    response = client.get(f"/walk?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.json
+
+def test_image_is_generated(client):
+
+    response = client.get("/image")
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert response.headers['X-Model'] == "generator_epoch_1.keras"
+    assert Image.open(io.BytesIO(response.data)).size == (32, 40)
+
+@pytest.mark.parametrize("query", ["model=../config.json", "model=generator_epoch_1.h5", "acceptance=0.5"])
+def test_invalid_image_request_is_rejected(client, query):
+
+    # Rejection sampling is disabled, so `acceptance` is rejected too
+    response = client.get(f"/image?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.json
+
+def test_missing_model_is_not_found(client):
+
+    assert client.get("/image?model=generator_epoch_9.keras").status_code == 404
+
+@pytest.mark.parametrize("path", ["/image", "/walk?seeds=1,2&frames=2"])
+def test_saturated_executor_answers_429(app, client, path):
+
+    # The executor has a single worker and no queue, so one blocked job saturates it
+    release = threading.Event()
+    future = app.extensions['gan']['executor'].submit(release.wait)
+
+    try:
+        response = client.get(path)
+    finally:
+        release.set()
+        future.result()
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == "1"
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+from domain.gan_augment import AdaptiveAugment, AUGMENTATIONS
+
+BATCH_SIZE = 16
+
+def real_outputs(sign):
+    return tf.fill([BATCH_SIZE, 1], float(sign))
+
+@pytest.mark.parametrize("real_sign, direction", [(1.0, 1), (-1.0, -1), (0.0, -1)])
+def test_probability_follows_the_sign_of_real_outputs(real_sign, direction):
+
+    augment = AdaptiveAugment(probability=0.5, adaptive=True)
+    augment.real_sign.assign(real_sign)
+
+    augment.update(real_outputs(real_sign))
+
+    step = BATCH_SIZE / augment.adjust_images
+    assert float(augment.probability.numpy()) == pytest.approx(0.5 + direction * step)
+
+def test_probability_rises_once_the_discriminator_overfits():
+
+    augment = AdaptiveAugment(probability=0.0, adaptive=True)
+    probabilities = []
+    for _ in range(30):
+        augment.update(real_outputs(1.0))
+        probabilities.append(float(augment.probability.numpy()))
+
+    # Stays at 0 until the moving average of the signs goes past the target, then rises at each step
+    assert probabilities[0] == 0.0
+    assert probabilities[-1] > 0.0
+    assert all(later >= earlier for earlier, later in zip(probabilities, probabilities[1:]))
+
+def test_probability_stays_within_bounds():
+
+    augment = AdaptiveAugment(probability=0.0, adaptive=True)
+    augment.real_sign.assign(-1.0)
+    augment.update(real_outputs(-1.0))
+    assert float(augment.probability.numpy()) == 0.0
+
+    augment.probability.assign(augment.max_probability)
+    augment.real_sign.assign(1.0)
+    augment.update(real_outputs(1.0))
+    assert float(augment.probability.numpy()) == pytest.approx(augment.max_probability)
+
+def test_fixed_probability_is_not_updated():
+
+    augment = AdaptiveAugment(probability=0.3, adaptive=False)
+    augment.update(real_outputs(1.0))
+
+    assert float(augment.probability.numpy()) == pytest.approx(0.3)
+
+@pytest.mark.parametrize("name", list(AUGMENTATIONS))
+def test_augmentations_preserve_shape_and_dtype(name):
+
+    images = tf.random.uniform([4, 40, 32, 3], -1.0, 1.0, seed=0)
+
+    for augmentation in AUGMENTATIONS[name]:
+        augmented = augmentation(images)
+        assert augmented.shape == images.shape and augmented.dtype == images.dtype
+
+    augment = AdaptiveAugment(policy=[name], probability=1.0, adaptive=False)
+    with tf.GradientTape() as tape:
+        tape.watch(images)
+        augmented = augment(images)
+        total = tf.reduce_sum(augmented)
+    assert augmented.shape == images.shape and augmented.dtype == images.dtype
+    # Differentiable, so that the generator is trained through the augmentation of its images
+    assert tape.gradient(total, images) is not None
+
+def test_zero_probability_leaves_images_unchanged():
+
+    images = tf.random.uniform([4, 40, 32, 3], -1.0, 1.0, seed=0)
+    augment = AdaptiveAugment(policy=list(AUGMENTATIONS), probability=0.0, adaptive=False)
+
+    np.testing.assert_array_equal(augment(images), images)
+
+def test_unknown_augmentation_is_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveAugment(policy=['rotation'])
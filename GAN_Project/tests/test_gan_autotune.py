@@ -0,0 +1,24 @@
+import pytest
+from domain import gan_autotune
+from domain.gan_autotune import get_tuned_settings, host_fingerprint, load_tuned_settings
+
+def test_tuned_settings_fall_back_to_autotune_without_images(probes):
+
+    settings = get_tuned_settings(force=True)
+
+    assert settings['dataset_threads'] is None
+    assert load_tuned_settings(host_fingerprint()[0]) == settings
+
+def test_tuned_settings_keep_the_probes_if_dataset_calibration_fails(probes, monkeypatch):
+
+    def calibrate_dataset(batch_size, n_batches=10):
+        raise RuntimeError("input pipeline failed")
+
+    monkeypatch.setattr(gan_autotune, 'calibrate_dataset', calibrate_dataset)
+
+    with pytest.raises(RuntimeError):
+        get_tuned_settings(force=True)
+
+    stored = load_tuned_settings(host_fingerprint()[0])
+    assert stored['batch_size'] == max(gan_autotune.config.autotune.batch_sizes)
+    assert (stored['intra_op_threads'], stored['inter_op_threads']) == (1, 1)
@@ -0,0 +1,116 @@
+import os
+import json
+import numpy as np
+import pytest
+import tensorflow as tf
+from gan_config import config, override
+from domain.gan_checkpoints import CheckpointStore, MIN_COMPRESSION_GAIN
+from domain.gan_models import build_models
+
+@pytest.fixture
+def models(tiny_config):
+
+    models = build_models(image_size=(20, 16))
+    models['generator'](tf.zeros([1, config.training.latent_dim]))
+    models['discriminator'](tf.zeros([1, 20, 16, 3]))
+
+    return models
+
+def object_files(store):
+    return {os.path.join(directory, name) for directory, _, names in os.walk(store.objects_dir) for name in names}
+
+def test_checkpoint_round_trip(models):
+
+    store = CheckpointStore()
+    store.save(3, models)
+
+    for key, name in (('generator', "generator_epoch_3"), ('discriminator', "discriminator_epoch_3")):
+        for mmap in (False, True):
+            loaded = store.load_model(f"{name}.ckpt", mmap=mmap)
+            for saved, restored in zip(models[key].get_weights(), loaded.get_weights()):
+                np.testing.assert_array_equal(saved, restored)
+
+    manifest = store.read_manifest("generator_epoch_3")
+    assert manifest['name'] == "generator_epoch_3"
+    assert [weight['path'] for weight in manifest['weights']] == [variable.path for variable in models['generator'].weights]
+    assert all(weight['dtype'] == weight['stored_dtype'] == "float32" for weight in manifest['weights'])
+
+    with pytest.raises(FileNotFoundError):
+        store.read_manifest("generator_epoch_4")
+
+def test_identical_epochs_share_their_chunks(models):
+
+    store = CheckpointStore()
+    first = store.save(1, models)
+    objects = object_files(store)
+
+    second = store.save(2, models)
+
+    assert first['written_bytes'] > 0
+    assert second == {'weights_bytes': first['weights_bytes'], 'written_bytes': 0}
+    assert object_files(store) == objects
+    assert store.size("generator_epoch_2") == store.size("generator_epoch_1")
+
+    # An EMA generator equal to the raw one adds no chunk either
+    third = store.save(3, {'generator': models['generator'], 'generator_ema': models['generator']})
+    assert third['written_bytes'] == 0 and object_files(store) == objects
+
+def test_index_holds_the_latest_epoch(models):
+
+    store = CheckpointStore()
+    assert store.latest_epoch() is None
+
+    store.save(5, models)
+    store.save(2, {'generator': models['generator']})
+
+    index = store.read_index()
+    assert index['latest_epoch'] == 5
+    assert index['checkpoints']["generator_epoch_2"]['epoch'] == 2
+    assert store.has("discriminator_epoch_5.ckpt") and not store.has("discriminator_epoch_2")
+    with open(os.path.join(store.root, "index.json"), encoding='UTF-8') as file:
+        assert json.load(file) == index
+
+def test_only_compressible_chunks_are_compressed(models):
+
+    store = CheckpointStore()
+    rng = np.random.default_rng(0)
+
+    compressible = np.zeros(4096, dtype=np.float32).data.cast('B')
+    incompressible = rng.standard_normal(4096).astype(np.float32).data.cast('B')
+
+    _, compressed, written = store._put_chunk(compressible)
+    assert compressed and written <= len(compressible) * (1 - MIN_COMPRESSION_GAIN)
+
+    _, compressed, written = store._put_chunk(incompressible)
+    assert not compressed and written == len(incompressible)
+
+    with override({"CHECKPOINTS.COMPRESSION_LEVEL": 0}):
+        _, compressed, _ = CheckpointStore(os.path.join(store.root, "raw"))._put_chunk(compressible)
+    assert not compressed
+
+def test_large_weights_are_split_into_chunks(models):
+
+    with override({"CHECKPOINTS.CHUNK_SIZE_MB": 1 / 1024}):
+        store = CheckpointStore()
+        store.save(1, models)
+
+        manifest = store.read_manifest("generator_epoch_1")
+        largest = max(manifest['weights'], key=lambda weight: np.prod(weight['shape']))
+        assert len(largest['chunks']) == -(-int(np.prod(largest['shape'])) * 4 // 1024)
+
+        loaded = store.load_model("generator_epoch_1", mmap=True)
+        for saved, restored in zip(models['generator'].get_weights(), loaded.get_weights()):
+            np.testing.assert_array_equal(saved, restored)
+
+def test_float16_checkpoints_are_loaded_as_float32(models):
+
+    store = CheckpointStore()
+    stats = store.save(1, models, float16=True)
+    _, weights = store.load_weights("generator_epoch_1")
+
+    manifest = store.read_manifest("generator_epoch_1")
+    assert {weight['stored_dtype'] for weight in manifest['weights'] if weight['dtype'] == "float32"} == {"float16"}
+    for saved, restored in zip(models['generator'].get_weights(), weights):
+        assert restored.dtype == saved.dtype
+        np.testing.assert_allclose(saved, restored, rtol=1e-3, atol=1e-3)
+    assert stats['weights_bytes'] < sum(weight.nbytes for model in models.values() for weight in model.get_weights())
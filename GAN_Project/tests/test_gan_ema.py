@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import pytest
+import tensorflow as tf
+from gan_config import config, override
+from domain.gan_models import build_models
+from domain.gan_ema import create_ema_generator, update_ema, initialize_ema_generator, warmup_steps
+from domain.gan_progressive import grow_models
+from domain.gan_utils import save_model
+
+def train_ema(steps):
+
+    generator = build_models(image_size=(20, 16))['generator']
+    ema = create_ema_generator(generator)
+    for _ in range(steps):
+        for weight in generator.trainable_weights:
+            weight.assign_add(tf.ones_like(weight))
+        update_ema(ema, generator, config.training.ema_decay)
+
+    return generator, ema
+
+@pytest.mark.parametrize("checkpoint_format", ["store", "keras"])
+def test_ema_step_is_restored_on_resume(tiny_config, checkpoint_format):
+
+    with override({"CHECKPOINTS.FORMAT": checkpoint_format}):
+        generator, ema = train_ema(12)
+        discriminator = build_models(image_size=(20, 16))['discriminator']
+        discriminator(tf.zeros([1, 20, 16, 3]))
+        save_model(4, {'generator': generator, 'discriminator': discriminator, 'generator_ema': ema})
+
+        restored = initialize_ema_generator(generator, 5)
+
+    assert int(restored.ema_step.numpy()) == 12
+    for saved, loaded in zip(ema.get_weights(), restored.get_weights()):
+        np.testing.assert_allclose(saved, loaded)
+
+def test_restored_ema_is_not_reset_by_a_new_optimizer(tiny_config):
+
+    generator, ema = train_ema(1)
+    ema.ema_step.assign(warmup_steps(config.training.ema_decay))
+    before = [weight.numpy() for weight in ema.trainable_weights]
+
+    # The step count of a rebuilt optimizer starts again from 0, the EMA's does not
+    update_ema(ema, generator, config.training.ema_decay)
+
+    for previous, weight, target in zip(before, ema.trainable_weights, generator.trainable_weights):
+        moved = np.abs(weight.numpy() - previous).max()
+        assert moved <= (1 - config.training.ema_decay) * np.abs(target.numpy() - previous).max() + 1e-6
+
+def test_ema_without_saved_step_is_past_its_warmup(tiny_config):
+
+    generator, ema = train_ema(3)
+    ema.save(os.path.join(config.paths.models_dir, "generator_epoch_2_ema.keras"))
+
+    restored = initialize_ema_generator(generator, 2)
+
+    assert int(restored.ema_step.numpy()) == warmup_steps(config.training.ema_decay)
+
+def test_ema_step_carries_over_progressive_growth(tiny_config):
+
+    generator, ema = train_ema(7)
+
+    grown = grow_models({'generator': generator, 'generator_ema': ema}, (40, 32))
+
+    assert grown['generator_ema'].ema_step is ema.ema_step
+    assert not hasattr(grown['generator'], 'ema_step')
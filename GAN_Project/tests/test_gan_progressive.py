@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+from gan_config import config
+from domain.gan_models import build_models
+from domain.gan_progressive import grow_models, complete_fade
+
+@pytest.fixture
+def grown(tiny_config):
+
+    models = build_models(image_size=(20, 16))
+    models['generator'](tf.zeros([1, config.training.latent_dim]))
+    models['discriminator'](tf.zeros([1, 20, 16, 3]))
+
+    return models, grow_models(models, (40, 32))
+
+def assert_same_weights(source, target):
+    for source_weight, target_weight in zip(source.get_weights(), target.get_weights()):
+        np.testing.assert_array_equal(source_weight, target_weight)
+
+def test_grown_models_keep_the_trained_weights(grown):
+
+    models, grown = grown
+    generator, discriminator = grown['generator'], grown['discriminator']
+
+    assert generator.image_size == discriminator.image_size == (40, 32)
+    assert float(generator.alpha.numpy()) == float(discriminator.alpha.numpy()) == 0.0
+
+    for name in ('Dense_inputs', 'BatchNormalization_inputs', 'Conv2DTranspose_1', 'BatchNormalization_1'):
+        assert_same_weights(getattr(models['generator'], name), getattr(generator, name))
+    assert_same_weights(models['generator'].Conv2DTranspose_output, generator.Conv2DTranspose_output_previous)
+
+    # The discriminator blocks move one position deeper, its first block reading the downsampled image
+    assert_same_weights(models['discriminator'].Conv2_1, discriminator.Conv2_previous)
+    for i in range(2, models['discriminator'].n_blocks + 1):
+        assert_same_weights(getattr(models['discriminator'], f"Conv2_{i}"), getattr(discriminator, f"Conv2_{i + 1}"))
+    assert_same_weights(models['discriminator'].Dense_output, discriminator.Dense_output)
+
+def test_faded_out_models_match_the_previous_resolution(grown):
+
+    models, grown = grown
+    noise = tf.random.normal([4, config.training.latent_dim], seed=0)
+    images = tf.random.uniform([4, 40, 32, 3], -1.0, 1.0, seed=1)
+
+    np.testing.assert_allclose(
+        grown['generator'](noise, training=False),
+        tf.keras.layers.UpSampling2D((2, 2))(models['generator'](noise, training=False)),
+        atol=1e-5
+    )
+    np.testing.assert_allclose(
+        grown['discriminator'](images, training=False),
+        models['discriminator'](tf.keras.layers.AveragePooling2D((2, 2))(images), training=False),
+        atol=1e-5
+    )
+
+def test_faded_in_models_only_use_the_new_blocks(grown):
+
+    _, grown = grown
+    completed = complete_fade(grown)
+
+    noise = tf.random.normal([4, config.training.latent_dim], seed=0)
+    images = tf.random.uniform([4, 40, 32, 3], -1.0, 1.0, seed=1)
+
+    # Still faded out, the previous resolution is rendered instead
+    assert not np.allclose(grown['generator'](noise, training=False), completed['generator'](noise, training=False), atol=1e-6)
+
+    for model in grown.values():
+        model.alpha.assign(1.0)
+
+    np.testing.assert_allclose(grown['generator'](noise, training=False), completed['generator'](noise, training=False), atol=1e-6)
+    np.testing.assert_allclose(grown['discriminator'](images, training=False), completed['discriminator'](images, training=False), atol=1e-6)
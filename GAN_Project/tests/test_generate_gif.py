@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import imageio_ffmpeg
+from PIL import Image
+from application.generate_gif import GifWriter, VideoWriter, find_ffmpeg
+
+def test_bundled_ffmpeg_is_used_when_none_is_installed():
+    assert find_ffmpeg("missing-ffmpeg-executable") == imageio_ffmpeg.get_ffmpeg_exe()
+
+@pytest.mark.parametrize("extension", [".mp4", ".webm"])
+def test_video_is_encoded_frame_by_frame(tmp_path, extension):
+
+    video_path = str(tmp_path / f"video{extension}")
+    rng = np.random.default_rng(0)
+
+    with VideoWriter(video_path, (32, 40), 25, ffmpeg="missing-ffmpeg-executable") as writer:
+        for _ in range(10):
+            writer.append(Image.fromarray(rng.integers(0, 255, (40, 32, 3), dtype=np.uint8)))
+
+    reader = imageio_ffmpeg.read_frames(video_path)
+    metadata = next(reader)
+    assert tuple(metadata['size']) == (32, 40)
+    assert sum(1 for _ in reader) == 10
+
+@pytest.mark.parametrize("extension", [".gif", ".mp4"])
+def test_error_while_writing_is_raised_and_partial_file_removed(tmp_path, extension):
+
+    path = str(tmp_path / f"walk{extension}")
+    frame = Image.new("RGB", (32, 40)).convert("P")
+
+    with pytest.raises(KeyError):
+        with (GifWriter(path, 40) if extension == ".gif" else VideoWriter(path, (32, 40), 25)) as writer:
+            writer.append(frame if extension == ".gif" else frame.convert("RGB"))
+            raise KeyError("frame")
+
+    assert not (tmp_path / f"walk{extension}").exists()
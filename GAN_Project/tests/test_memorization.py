@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from PIL import Image
+from application.memorization import embed_images, nearest_neighbours
+
+def brute_force(queries, features, k):
+
+    scores = queries @ features.T
+    indices = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+
+    return np.take_along_axis(scores, indices, axis=1), indices
+
+@pytest.mark.parametrize("n_features, k, block_size", [
+    (100, 5, 7),     # top-k merged across many blocks, the last one partial
+    (100, 5, 1000),  # a single block
+    (10, 5, 3),      # blocks smaller than k
+    (3, 5, 2),       # fewer features than k
+    (50, 1, 8)
+])
+def test_nearest_neighbours_matches_brute_force(n_features, k, block_size):
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((6, 16), dtype=np.float32)
+    features = rng.standard_normal((n_features, 16), dtype=np.float32)
+
+    scores, indices = nearest_neighbours(queries, features, k, block_size)
+    expected_scores, expected_indices = brute_force(queries, features, min(k, n_features))
+
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+    np.testing.assert_array_equal(indices, expected_indices)
+
+def test_nearest_neighbours_reads_memory_mapped_float16(tmp_path):
+
+    rng = np.random.default_rng(1)
+    features = np.lib.format.open_memmap(str(tmp_path / "features.npy"), mode='w+', dtype=np.float16, shape=(40, 8))
+    values = rng.standard_normal((40, 8))
+    features[:] = values / np.linalg.norm(values, axis=1, keepdims=True)
+    queries = np.asarray(features[[3, 17]], dtype=np.float32)
+
+    _, indices = nearest_neighbours(queries, np.load(str(tmp_path / "features.npy"), mmap_mode='r'), k=1, block_size=16)
+
+    np.testing.assert_array_equal(indices[:, 0], [3, 17])
+
+def test_identical_images_have_unit_similarity(tiny_config):
+
+    image = np.random.default_rng(2).integers(0, 255, (40, 32, 3), dtype=np.uint8)
+    features = embed_images([image, Image.fromarray(image), 255 - image])
+
+    assert features[0] @ features[1] == pytest.approx(1.0, abs=1e-5)
+    assert features[0] @ features[2] == pytest.approx(-1.0, abs=1e-5)
@@ -0,0 +1,70 @@
+import os
+import pytest
+import tensorflow as tf
+from gan_config import config, override
+from domain.gan_models import build_models
+from application.model_registry import ModelRegistry
+
+def save_generator(epoch):
+
+    generator = build_models()['generator']
+    generator(tf.zeros([1, config.training.latent_dim]))
+    generator.save(os.path.join(config.paths.models_dir, f"generator_epoch_{epoch}.keras"))
+
+@pytest.fixture
+def models_dir(tiny_config):
+
+    with override({"CHECKPOINTS.FORMAT": "keras", "SERVING.MODEL_WATCH_INTERVAL": 3600}):
+        save_generator(1)
+        save_generator(2)
+        yield config.paths.models_dir
+
+def test_latest_model_is_served_and_followed(models_dir):
+
+    registry = ModelRegistry()
+    assert registry.default == "generator_epoch_2.keras" and not registry.pinned
+
+    save_generator(3)
+
+    assert registry.refresh() == "generator_epoch_3.keras"
+
+def test_explicit_reload_pins_the_model(models_dir):
+
+    registry = ModelRegistry()
+
+    registry.reload_async("generator_epoch_1.keras").join()
+    save_generator(3)
+
+    assert registry.pinned
+    assert registry.refresh() == "generator_epoch_1.keras"
+
+def test_reload_latest_unpins_and_starts_the_watcher(models_dir):
+
+    registry = ModelRegistry("generator_epoch_1.keras")
+    registry.watch()
+    assert registry.pinned and registry._watcher is None
+
+    registry.reload_async().join()
+
+    try:
+        assert not registry.pinned
+        assert registry.default == "generator_epoch_2.keras"
+        assert registry._watcher is not None
+    finally:
+        registry.stop()
+
+def test_failed_reload_keeps_the_default_model(models_dir):
+
+    registry = ModelRegistry()
+
+    registry.reload_async("generator_epoch_9.keras").join()
+
+    assert not registry.pinned
+    assert registry.default == "generator_epoch_2.keras"
+
+def test_invalid_model_name_is_rejected(models_dir):
+
+    registry = ModelRegistry()
+
+    with pytest.raises(ValueError):
+        registry.reload_async("../config.json")
@@ -0,0 +1,43 @@
+from application.pipeline import run_pipeline
+from domain import gan_autotune, gan_training
+from domain.gan_autotune import host_fingerprint, load_tuned_settings
+from infrastructure import data_loader
+
+def test_autotune_runs_before_preprocessing(probes, monkeypatch):
+
+    events = []
+    run_probe = gan_autotune.run_probe
+
+    def record_probe(*args, **kwargs):
+        events.append('probe')
+        return run_probe(*args, **kwargs)
+
+    class Preprocessing:
+
+        def __init__(self, n_image=500, n_jobs=-1):
+            pass
+
+        def start(self):
+            events.append('preprocessing')
+            return self
+
+        def is_done(self):
+            return True
+
+        def join(self):
+            pass
+
+    def train_gan(epochs, batch_size=None, dataset_pool=None, **kwargs):
+        events.append('training')
+        assert kwargs['autotune']
+
+    monkeypatch.setattr(gan_autotune, 'run_probe', record_probe)
+    monkeypatch.setattr(data_loader, 'BackgroundPreprocessing', Preprocessing)
+    monkeypatch.setattr(gan_training, 'train_gan', train_gan)
+
+    # The processed data directory is still empty when autotune runs
+    run_pipeline(1, n_image=0, preprocess_jobs=1, autotune=True)
+
+    assert events.index('preprocessing') > max(i for i, event in enumerate(events) if event == 'probe')
+    assert events[-1] == 'training'
+    assert load_tuned_settings(host_fingerprint()[0])['dataset_threads'] is None
@@ -0,0 +1,91 @@
+import os
+import sys
+import math
+import subprocess
+import pytest
+from PIL import Image
+from application.sweep import EarlyStopping, Sweep, expand_grid, run_sweep, split_cpus
+
+def test_expand_grid_tries_every_combination():
+
+    trials = expand_grid({'TRAINING.LATENT_DIM': [64, 100], 'BATCH_SIZE': [16, 32, 64]})
+
+    assert len(trials) == 6
+    assert trials[0] == {'TRAINING.LATENT_DIM': 64, 'BATCH_SIZE': 16}
+    assert {(trial['TRAINING.LATENT_DIM'], trial['BATCH_SIZE']) for trial in trials} == {
+        (latent_dim, batch_size) for latent_dim in (64, 100) for batch_size in (16, 32, 64)
+    }
+
+@pytest.mark.parametrize("n_trials, max_parallel, threads_per_trial, expected", [
+    (10, None, 2, [[0, 1], [2, 3], [4, 5], [6, 7]]),
+    (10, 3, 2, [[0, 1], [2, 3], [4, 5]]),
+    (2, None, 3, [[0, 1, 2], [3, 4, 5]]),
+    (10, None, 16, [list(range(8))]),    # more threads than CPUs
+    (1, None, 1, [[0]])
+])
+def test_split_cpus_gives_disjoint_slots(monkeypatch, n_trials, max_parallel, threads_per_trial, expected):
+
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(8)), raising=False)
+
+    assert split_cpus(n_trials, max_parallel, threads_per_trial) == expected
+
+def epoch(number, generator_loss=1.0, discriminator_loss=1.0, diversity=0.5):
+    return {'epoch': number, 'generator_loss': generator_loss, 'discriminator_loss': discriminator_loss, 'diversity': diversity}
+
+def test_early_stopping_stops_on_non_finite_loss():
+    assert EarlyStopping().check(epoch(1, generator_loss=math.nan)) == "non-finite loss"
+
+def test_early_stopping_waits_for_patience():
+
+    early_stopping = EarlyStopping(patience=2, warmup_epochs=0, stall_tolerance=None)
+
+    assert early_stopping.check(epoch(1, discriminator_loss=0.001)) is None
+    # A good epoch resets the count
+    assert early_stopping.check(epoch(2)) is None
+    assert early_stopping.check(epoch(3, generator_loss=50.0)) is None
+    assert early_stopping.check(epoch(4, generator_loss=50.0)) == "diverged for 2 epochs"
+
+def test_early_stopping_ignores_collapse_and_stall_during_warmup():
+
+    early_stopping = EarlyStopping(patience=2, warmup_epochs=2, min_diversity=0.1, stall_tolerance=None)
+
+    assert early_stopping.check(epoch(1, diversity=0.0)) is None
+    assert early_stopping.check(epoch(2, diversity=0.0)) is None
+    assert early_stopping.check(epoch(3, diversity=0.0)) is None
+    assert early_stopping.check(epoch(4, diversity=0.0)) == "collapsed for 2 epochs"
+
+def test_early_stopping_detects_stalled_losses():
+
+    early_stopping = EarlyStopping(patience=2, warmup_epochs=0, min_diversity=None, stall_tolerance=1e-3)
+
+    assert early_stopping.check(epoch(1)) is None
+    assert early_stopping.check(epoch(2, generator_loss=1.0001)) is None
+    assert early_stopping.check(epoch(3, generator_loss=1.0002)) == "stalled for 2 epochs"
+
+def test_failed_sweep_removes_the_image_cache(tiny_config, monkeypatch):
+
+    processed_data = tiny_config / "processed_data"
+    processed_data.mkdir(exist_ok=True)
+    for i in range(3):
+        Image.new("RGB", (32, 40)).save(processed_data / f"{i}.png")
+
+    def run(self, slots):
+        assert os.path.exists(self.cache_path)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(Sweep, 'run', run)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_sweep({'BATCH_SIZE': [8]}, epochs=1)
+
+    assert not list((tiny_config / "sweeps").glob("*/images.npy"))
+
+def test_kill_stops_the_running_trials(tmp_path):
+
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    running = Sweep(str(tmp_path), [], 1, None, EarlyStopping)
+    running._processes.add(process)
+
+    running.kill()
+
+    assert process.wait(timeout=10) != 0